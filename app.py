@@ -3,31 +3,93 @@ FinSage Pro - Modular Bajaj Finserv RAG Chatbot
 Main Flask application
 """
 
-from flask import Flask, render_template, request, jsonify
+# Imported first so the startup profiler times every other import
+import startup_profiler
+import hmac
+import json
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from rag_system import SimpleRAG
-from config import DEBUG_MODE
-from utils import setup_application
+from config import (
+    DEBUG_MODE,
+    ADMIN_API_TOKEN,
+    BATCH_MAX_QUERIES,
+    INIT_RETRY_AFTER,
+    INIT_RETRY_INTERVAL,
+    WARM_UP_ENABLED,
+    METRICS_ENABLED
+)
+from utils import setup_application, BackgroundInitializer
+from tracing import Trace
+import metrics
 
+startup_profiler.mark('imports')
+
+
+NOT_READY_MESSAGE = 'Sorry, the system is not ready. Please try again later.'
 
 # Initialize Flask app
 app = Flask(__name__)
 
-# Initialize RAG system
+# RAG system, set once it is loaded and warmed up
 rag = None
 
 
-def initialize_rag():
-    """Initialize the RAG system"""
+def load_rag():
+    """Build the RAG system and its vector index"""
+    startup_profiler.mark('server startup')
+    print("Initializing RAG system...")
+    instance = SimpleRAG()
+    startup_profiler.mark('construct')
+    if not instance.create_vector_index():
+        raise RuntimeError("the vector index could not be built")
+    startup_profiler.mark('vector index')
+    return instance
+
+
+def publish_rag(instance):
+    """Start serving requests with a loaded RAG system"""
     global rag
-    try:
-        print("Initializing RAG system...")
-        rag = SimpleRAG()
-        rag.create_vector_index()
-        print("RAG system ready!")
-        return True
-    except Exception as e:
-        print(f"Error initializing RAG system: {e}")
+    if WARM_UP_ENABLED:
+        startup_profiler.mark('warm-up')
+    rag = instance
+    print("RAG system ready!")
+    startup_profiler.report()
+
+
+initializer = BackgroundInitializer(
+    load_rag,
+    warm_up=SimpleRAG.warm_up if WARM_UP_ENABLED else None,
+    on_ready=publish_rag,
+    retry_interval=INIT_RETRY_INTERVAL
+)
+
+
+def initialize_rag():
+    """Start loading the RAG system in the background if needed; True once it is ready"""
+    initializer.start()
+    return initializer.ready
+
+
+def rag_ready():
+    """True once the RAG system is loaded and warmed up"""
+    return initializer.ready
+
+
+def preload_rag():
+    """Initialize the RAG system in the foreground, loading the models it would otherwise load on first use"""
+    initializer.start(force=True)
+    if not initializer.wait():
         return False
+    rag.load_models()
+    return True
+
+
+def not_ready(body):
+    """503 response telling the client when to retry while the RAG system loads"""
+    response = jsonify(dict(body, state=initializer.state))
+    response.status_code = 503
+    response.headers['Retry-After'] = str(initializer.retry_after(INIT_RETRY_AFTER))
+    return response
 
 
 @app.route('/')
@@ -49,18 +111,15 @@ def process_query():
                 'sources': []
             })
         
-        # Initialize RAG if not already done
-        if rag is None:
-            if not initialize_rag():
-                return jsonify({
-                    'answer': 'Sorry, the system is not ready. Please try again later.',
-                    'sources': []
-                })
+        # Answer quickly while the RAG system is still loading
+        if not initialize_rag():
+            return not_ready({'answer': NOT_READY_MESSAGE, 'sources': []})
         
-        # Process the query
-        result = rag.process_query(query)
+        # Process the query, timing each stage when TRACE_TIMINGS is on
+        with Trace() as trace:
+            result = rag.process_query(query)
         
-        return jsonify(result)
+        return jsonify(trace.attach(result))
         
     except Exception as e:
         print(f"Error processing query: {e}")
@@ -70,15 +129,174 @@ def process_query():
         })
 
 
+@app.route('/api/query/batch', methods=['POST'])
+def process_query_batch():
+    """Process many queries in one request, returning results in input order"""
+    data = request.json or {}
+    queries = data.get('queries')
+    
+    if not isinstance(queries, list) or not all(isinstance(query, str) for query in queries):
+        return jsonify({'error': 'Provide a list of question strings in "queries".'}), 400
+    if len(queries) > BATCH_MAX_QUERIES:
+        return jsonify({'error': f'At most {BATCH_MAX_QUERIES} queries are allowed per batch.'}), 400
+    
+    # Answer quickly while the RAG system is still loading
+    if not initialize_rag():
+        return not_ready({'error': NOT_READY_MESSAGE})
+    
+    try:
+        queries = [query.strip() for query in queries]
+        with Trace() as trace:
+            answered = rag.process_queries([query for query in queries if query])
+        
+        # Empty questions keep their place in the output
+        answered = iter(answered)
+        results = [
+            next(answered) if query else {'answer': 'Please provide a question.', 'sources': []}
+            for query in queries
+        ]
+        return jsonify(trace.attach({'results': results}))
+        
+    except Exception as e:
+        print(f"Error processing batch: {e}")
+        return jsonify({'error': 'Sorry, I encountered an error processing your request. Please try again.'}), 500
+
+
+def sse_event(event, data):
+    """Format a Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route('/api/query/stream', methods=['POST'])
+def process_query_stream():
+    """Stream the answer to a user query as Server-Sent Events.
+    
+    Emits ``token`` events with answer text as it is generated and a final
+    ``sources`` event, or an ``error`` event if processing fails. With
+    TRACE_TIMINGS a ``timings`` event follows the sources.
+    """
+    data = request.json or {}
+    query = data.get('query', '').strip()
+    
+    # Answer quickly while the RAG system is still loading
+    if query and not initialize_rag():
+        return not_ready({'answer': NOT_READY_MESSAGE, 'sources': []})
+    
+    def events():
+        if not query:
+            yield sse_event('token', {'text': 'Please provide a question.'})
+            yield sse_event('sources', {'sources': []})
+            return
+        
+        try:
+            with Trace() as trace:
+                for event, payload in rag.process_query_stream(query):
+                    if event == 'token':
+                        yield sse_event('token', {'text': payload})
+                    else:
+                        yield sse_event('sources', {'sources': payload})
+            if trace.enabled:
+                yield sse_event('timings', trace.timings())
+        except Exception as e:
+            print(f"Error streaming query: {e}")
+            yield sse_event('error', {
+                'message': 'Sorry, I encountered an error processing your request. Please try again.'
+            })
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def admin_authorized():
+    """Check the admin token sent with an admin request, in constant time"""
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_API_TOKEN) and hmac.compare_digest(token.encode('utf-8'), ADMIN_API_TOKEN.encode('utf-8'))
+
+
+@app.route('/api/admin/documents', methods=['POST'])
+def ingest_document():
+    """Add or replace a single document in the live index"""
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    data = request.json or {}
+    source = data.get('source', '').strip()
+    if not source:
+        return jsonify({'error': 'A document source is required.'}), 400
+    
+    if not initialize_rag():
+        return not_ready({'error': NOT_READY_MESSAGE})
+    
+    try:
+        result = rag.ingest_document(source, data.get('content'), data.get('type', 'transcript'))
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error ingesting document {source}: {e}")
+        return jsonify({'error': 'Failed to ingest document.'}), 500
+
+
+@app.route('/api/admin/documents', methods=['DELETE'])
+@app.route('/api/admin/documents/<path:source>', methods=['DELETE'])
+def delete_document(source=None):
+    """Remove a single document from the live index.
+    
+    The source is part of the URL or, for sources a URL path cannot hold
+    such as absolute paths, sent as ``{"source": ...}`` in the body.
+    """
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    if source is None:
+        source = (request.get_json(silent=True) or {}).get('source', '').strip()
+        if not source:
+            return jsonify({'error': 'A document source is required.'}), 400
+    
+    if not initialize_rag():
+        return not_ready({'error': NOT_READY_MESSAGE})
+    
+    if not rag.delete_document(source):
+        return jsonify({'error': f'Document {source} is not indexed.'}), 404
+    
+    return jsonify({'source': source, 'action': 'deleted'})
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint, reporting the initialization state until the RAG system is ready"""
     return jsonify({
-        'status': 'healthy',
-        'rag_initialized': rag is not None
+        'status': 'healthy' if rag_ready() else initializer.state,
+        'rag_initialized': rag is not None,
+        'initialization': initializer.status(),
+        'caches': rag.cache_stats() if rag is not None else {},
+        'routing': rag.route_stats() if rag is not None else {},
+        'prompts': rag.prompt_stats() if rag is not None else {}
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics of this worker process"""
+    if not METRICS_ENABLED:
+        return jsonify({'error': 'Metrics are disabled.'}), 404
+    
+    families = rag.metric_families() if rag is not None else []
+    families.append(('finsage_ready', 'gauge', 'Whether the RAG system is ready to serve', [({}, int(rag_ready()))]))
+    return Response(metrics.render(families), content_type=metrics.CONTENT_TYPE)
+
+
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 503 until the RAG system is loaded and warmed up, starting it if needed"""
+    if not initialize_rag():
+        return not_ready({'ready': False})
+    return jsonify({'ready': True, 'state': initializer.state})
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
@@ -104,7 +322,7 @@ def main():
     # Setup application (create templates, etc.)
     setup_application()
     
-    # Initialize RAG system
+    # Load the RAG system in the background; queries get a 503 until it is ready
     initialize_rag()
     
     # Run the Flask app
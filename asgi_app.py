@@ -0,0 +1,255 @@
+"""
+FinSage Pro - Modular Bajaj Finserv RAG Chatbot
+Asynchronous ASGI application
+
+Serves the same chat API as app.py with Quart, Flask's asyncio sibling.
+Gemini calls are awaited on the event loop while embedding and FAISS
+search run in a thread pool, so concurrency is not capped by the number of
+worker threads. Run it with an ASGI server, for example:
+
+    hypercorn asgi_app:app --bind 0.0.0.0:5000
+"""
+
+# Imported first so the startup profiler times every other import
+import startup_profiler
+import asyncio
+import json
+from quart import Quart, Response, render_template, request, jsonify
+from rag_system import SimpleRAG
+from config import BATCH_MAX_QUERIES, INIT_RETRY_AFTER, INIT_RETRY_INTERVAL, WARM_UP_ENABLED, METRICS_ENABLED
+from utils import setup_application, BackgroundInitializer
+from tracing import Trace, bind
+import metrics
+
+startup_profiler.mark('imports')
+
+
+NOT_READY_MESSAGE = 'Sorry, the system is not ready. Please try again later.'
+
+# Initialize Quart app
+app = Quart(__name__)
+
+# RAG system, set once it is loaded and warmed up
+rag = None
+
+
+def load_rag():
+    """Build the RAG system; blocking, so it runs in the initializer's thread"""
+    startup_profiler.mark('server startup')
+    print("Initializing RAG system...")
+    instance = SimpleRAG()
+    startup_profiler.mark('construct')
+    if not instance.create_vector_index():
+        raise RuntimeError("the vector index could not be built")
+    startup_profiler.mark('vector index')
+    return instance
+
+
+def publish_rag(instance):
+    """Start serving requests with a loaded RAG system"""
+    global rag
+    if WARM_UP_ENABLED:
+        startup_profiler.mark('warm-up')
+    rag = instance
+    print("RAG system ready!")
+    startup_profiler.report()
+
+
+initializer = BackgroundInitializer(
+    load_rag,
+    warm_up=SimpleRAG.warm_up if WARM_UP_ENABLED else None,
+    on_ready=publish_rag,
+    retry_interval=INIT_RETRY_INTERVAL
+)
+
+
+def initialize_rag():
+    """Start loading the RAG system in the background if needed; True once it is ready"""
+    initializer.start()
+    return initializer.ready
+
+
+def not_ready(body):
+    """503 response telling the client when to retry while the RAG system loads"""
+    response = jsonify(dict(body, state=initializer.state))
+    response.status_code = 503
+    response.headers['Retry-After'] = str(initializer.retry_after(INIT_RETRY_AFTER))
+    return response
+
+
+@app.before_serving
+async def startup():
+    """Prepare templates and start loading the RAG system; requests get a 503 until it is ready"""
+    setup_application()
+    initialize_rag()
+
+
+@app.after_serving
+async def shutdown():
+    """Close the asynchronous Gemini client and thread pool"""
+    if rag is not None:
+        await rag.aclose()
+
+
+@app.route('/')
+async def index():
+    """Serve the main chat interface"""
+    return await render_template('index.html')
+
+
+@app.route('/api/query', methods=['POST'])
+async def process_query():
+    """Process user queries and return responses"""
+    try:
+        data = await request.get_json()
+        query = (data or {}).get('query', '').strip()
+        
+        if not query:
+            return jsonify({
+                'answer': 'Please provide a question.',
+                'sources': []
+            })
+        
+        # Answer quickly while the RAG system is still loading
+        if not initialize_rag():
+            return not_ready({'answer': NOT_READY_MESSAGE, 'sources': []})
+        
+        with Trace() as trace:
+            result = await rag.process_query_async(query)
+        
+        return jsonify(trace.attach(result))
+        
+    except Exception as e:
+        print(f"Error processing query: {e}")
+        return jsonify({
+            'answer': 'Sorry, I encountered an error processing your request. Please try again.',
+            'sources': []
+        })
+
+
+@app.route('/api/query/batch', methods=['POST'])
+async def process_query_batch():
+    """Process many queries in one request, returning results in input order"""
+    data = await request.get_json() or {}
+    queries = data.get('queries')
+    
+    if not isinstance(queries, list) or not all(isinstance(query, str) for query in queries):
+        return jsonify({'error': 'Provide a list of question strings in "queries".'}), 400
+    if len(queries) > BATCH_MAX_QUERIES:
+        return jsonify({'error': f'At most {BATCH_MAX_QUERIES} queries are allowed per batch.'}), 400
+    
+    # Answer quickly while the RAG system is still loading
+    if not initialize_rag():
+        return not_ready({'error': NOT_READY_MESSAGE})
+    
+    try:
+        queries = [query.strip() for query in queries]
+        with Trace() as trace:
+            answered = await asyncio.get_running_loop().run_in_executor(
+                None, bind(rag.process_queries), [query for query in queries if query]
+            )
+        
+        # Empty questions keep their place in the output
+        answered = iter(answered)
+        results = [
+            next(answered) if query else {'answer': 'Please provide a question.', 'sources': []}
+            for query in queries
+        ]
+        return jsonify(trace.attach({'results': results}))
+        
+    except Exception as e:
+        print(f"Error processing batch: {e}")
+        return jsonify({'error': 'Sorry, I encountered an error processing your request. Please try again.'}), 500
+
+
+def sse_event(event, data):
+    """Format a Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route('/api/query/stream', methods=['POST'])
+async def process_query_stream():
+    """Stream the answer to a user query as Server-Sent Events, followed by a ``timings`` event with TRACE_TIMINGS"""
+    data = await request.get_json()
+    query = (data or {}).get('query', '').strip()
+    
+    # Answer quickly while the RAG system is still loading
+    if query and not initialize_rag():
+        return not_ready({'answer': NOT_READY_MESSAGE, 'sources': []})
+    
+    async def events():
+        if not query:
+            yield sse_event('token', {'text': 'Please provide a question.'})
+            yield sse_event('sources', {'sources': []})
+            return
+        
+        try:
+            with Trace() as trace:
+                async for event, payload in rag.process_query_stream_async(query):
+                    if event == 'token':
+                        yield sse_event('token', {'text': payload})
+                    else:
+                        yield sse_event('sources', {'sources': payload})
+            if trace.enabled:
+                yield sse_event('timings', trace.timings())
+        except Exception as e:
+            print(f"Error streaming query: {e}")
+            yield sse_event('error', {
+                'message': 'Sorry, I encountered an error processing your request. Please try again.'
+            })
+    
+    response = Response(events(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.timeout = None
+    return response
+
+
+@app.route('/api/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint, reporting the initialization state until the RAG system is ready"""
+    return jsonify({
+        'status': 'healthy' if initializer.ready else initializer.state,
+        'rag_initialized': rag is not None,
+        'initialization': initializer.status(),
+        'caches': rag.cache_stats() if rag is not None else {},
+        'routing': rag.route_stats() if rag is not None else {},
+        'prompts': rag.prompt_stats() if rag is not None else {}
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics_endpoint():
+    """Prometheus metrics of this server process"""
+    if not METRICS_ENABLED:
+        return jsonify({'error': 'Metrics are disabled.'}), 404
+    
+    families = rag.metric_families() if rag is not None else []
+    families.append(('finsage_ready', 'gauge', 'Whether the RAG system is ready to serve', [({}, int(initializer.ready))]))
+    return Response(metrics.render(families), content_type=metrics.CONTENT_TYPE)
+
+
+@app.route('/api/ready', methods=['GET'])
+async def readiness_check():
+    """Readiness probe: 503 until the RAG system is loaded and warmed up, starting it if needed"""
+    if not initialize_rag():
+        return not_ready({'ready': False})
+    return jsonify({'ready': True, 'state': initializer.state})
+
+
+@app.errorhandler(404)
+async def not_found(error):
+    """Handle 404 errors"""
+    return jsonify({
+        'error': 'Endpoint not found',
+        'message': 'The requested resource was not found on this server.'
+    }), 404
+
+
+@app.errorhandler(500)
+async def internal_error(error):
+    """Handle 500 errors"""
+    return jsonify({
+        'error': 'Internal server error',
+        'message': 'An internal error occurred. Please try again later.'
+    }), 500
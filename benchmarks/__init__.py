@@ -0,0 +1,5 @@
+"""
+Benchmarks for FinSage Pro
+
+Run from the project root, e.g. ``python -m benchmarks.ann_index``.
+"""
@@ -0,0 +1,137 @@
+"""
+Recall and latency benchmark for the configurable FAISS index types
+
+Builds every index type over a synthetic clustered corpus shaped like
+normalised MiniLM embeddings and reports recall@k against the exact flat
+index together with p50/p99 single-query search latency.
+
+    python -m benchmarks.ann_index --num-vectors 1000000 --output ann.json
+"""
+
+import argparse
+import json
+import time
+import numpy as np
+import faiss
+from vector_index import INDEX_TYPES, BinaryIndex, index_params, build_index
+
+
+def make_corpus(num_vectors, dimension, num_clusters, seed, block_size=100000):
+    """Synthetic unit-norm vectors drawn from a Gaussian mixture"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_clusters, dimension)).astype('float32')
+    corpus = np.empty((num_vectors, dimension), dtype='float32')
+
+    for start in range(0, num_vectors, block_size):
+        end = min(start + block_size, num_vectors)
+        labels = rng.integers(0, num_clusters, end - start)
+        block = centers[labels] + 0.5 * rng.standard_normal((end - start, dimension), dtype='float32')
+        faiss.normalize_L2(block)
+        corpus[start:end] = block
+
+    return corpus, centers
+
+
+def make_queries(centers, num_queries, seed):
+    """Queries drawn from the same mixture as the corpus"""
+    rng = np.random.default_rng(seed + 1)
+    labels = rng.integers(0, len(centers), num_queries)
+    queries = centers[labels] + 0.5 * rng.standard_normal((num_queries, centers.shape[1]), dtype='float32')
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def measure(index, queries, ground_truth, k):
+    """Return recall@k and per-query latency percentiles in milliseconds"""
+    latencies = np.empty(len(queries))
+    hits = 0
+
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, found = index.search(queries[i:i + 1], k)
+        latencies[i] = (time.perf_counter() - start) * 1000
+        hits += len(np.intersect1d(found[0], ground_truth[i]))
+
+    return {
+        'recall_at_k': hits / (len(queries) * k),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99))
+    }
+
+
+def run(args):
+    print(f"Generating {args.num_vectors} x {args.dim} synthetic vectors...")
+    corpus, centers = make_corpus(args.num_vectors, args.dim, args.clusters, args.seed)
+    queries = make_queries(centers, args.queries, args.seed)
+    ids = np.arange(args.num_vectors, dtype='int64')
+
+    print("Computing exact ground truth...")
+    exact = faiss.IndexFlatL2(args.dim)
+    exact.add(corpus)
+    _, ground_truth = exact.search(queries, args.k)
+    del exact
+
+    overrides = {
+        'nlist': args.nlist,
+        'nprobe': args.nprobe,
+        'pq_m': args.pq_m,
+        'hnsw_m': args.hnsw_m,
+        'ef_search': args.ef_search
+    }
+    overrides = {key: value for key, value in overrides.items() if value is not None}
+
+    results = []
+    for index_type in args.types:
+        params = index_params(index_type, **overrides)
+        start = time.perf_counter()
+        index, params = build_index(args.dim, [corpus], params)
+        for offset in range(0, args.num_vectors, args.add_batch):
+            index.add_with_ids(corpus[offset:offset + args.add_batch], ids[offset:offset + args.add_batch])
+        build_seconds = time.perf_counter() - start
+        if isinstance(index, BinaryIndex):
+            index.vectors = lambda chunk_ids: corpus[chunk_ids]
+
+        # Label rows with the index actually built, which is flat when too few vectors to train
+        result = {'type': params['type'], 'requested': index_type, 'params': params, 'build_seconds': build_seconds}
+        result.update(measure(index, queries, ground_truth, args.k))
+        results.append(result)
+        label = params['type'] if params['type'] == index_type else f"{params['type']} (requested {index_type})"
+        print(f"{label:<9} recall@{args.k}={result['recall_at_k']:.3f} "
+              f"p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms build={build_seconds:.1f}s")
+        del index
+
+    report = {
+        'benchmark': 'ann_index',
+        'num_vectors': args.num_vectors,
+        'dimension': args.dim,
+        'queries': args.queries,
+        'k': args.k,
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--num-vectors', type=int, default=1000000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--clusters', type=int, default=2000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--types', nargs='+', choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument('--nlist', type=int)
+    parser.add_argument('--nprobe', type=int)
+    parser.add_argument('--pq-m', type=int)
+    parser.add_argument('--hnsw-m', type=int)
+    parser.add_argument('--ef-search', type=int)
+    parser.add_argument('--add-batch', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,127 @@
+"""
+Build and query benchmark for the BM25 keyword index
+
+Builds BM25Index over synthetic earnings-call style chunks of growing
+count and reports build time, postings memory and per-query latency,
+against scoring the same queries by scanning per-chunk term counters:
+
+    python -m benchmarks.bm25 --chunks 1000 10000 100000 --output bm25.json
+"""
+
+import argparse
+import json
+import math
+import time
+from collections import Counter
+import numpy as np
+from lexical_index import BM25Index, tokenize
+
+
+VOCABULARY_SIZE = 20000
+CHUNK_WORDS = 160
+
+# Domain terms planted in a few chunks, as users ask about them
+RARE_TERMS = ['bagic', 'aum', 'gnpa', 'combined', 'disbursements', 'solvency', '4214.5', 'crore']
+
+
+def make_chunks(count, seed):
+    """Chunks of Zipf-distributed filler words with a few planted domain terms"""
+    rng = np.random.default_rng(seed)
+    words = [f"w{i}" for i in range(VOCABULARY_SIZE)]
+    chunks = []
+    for _ in range(count):
+        ranks = np.minimum(rng.zipf(1.2, CHUNK_WORDS), VOCABULARY_SIZE) - 1
+        tokens = [words[rank] for rank in ranks]
+        if rng.random() < 0.05:
+            tokens[rng.integers(0, CHUNK_WORDS)] = RARE_TERMS[rng.integers(0, len(RARE_TERMS))]
+        chunks.append(' '.join(tokens))
+    return chunks
+
+
+def make_queries(count, seed):
+    """Queries mixing a domain term with common filler words"""
+    rng = np.random.default_rng(seed + 1)
+    return [
+        f"{RARE_TERMS[rng.integers(0, len(RARE_TERMS))]} w{rng.integers(0, 50)} w{rng.integers(0, 2000)}"
+        for _ in range(count)
+    ]
+
+
+def scan_scores(counters, lengths, query, k1=1.5, b=0.75):
+    """Reference BM25 that visits every chunk's term counter"""
+    average_length = sum(lengths) / len(lengths)
+    terms = tokenize(query)
+    frequency = {term: sum(1 for counts in counters if term in counts) for term in terms}
+    scores = []
+    for counts, length in zip(counters, lengths):
+        score = 0.0
+        for term in terms:
+            tf = counts.get(term, 0)
+            if tf:
+                idf = math.log1p((len(counters) - frequency[term] + 0.5) / (frequency[term] + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average_length))
+        scores.append(score)
+    return scores
+
+
+def run(args):
+    results = []
+    for count in args.chunks:
+        chunks = make_chunks(count, args.seed)
+        queries = make_queries(args.queries, args.seed)
+
+        start = time.perf_counter()
+        index = BM25Index(np.arange(count), chunks)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query, args.k)
+        query_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+        counters = [Counter(tokenize(chunk)) for chunk in chunks]
+        lengths = [sum(counts.values()) for counts in counters]
+        scan_queries = queries[:max(1, len(queries) // 10)]
+        start = time.perf_counter()
+        for query in scan_queries:
+            scan_scores(counters, lengths, query)
+        scan_us = (time.perf_counter() - start) / len(scan_queries) * 1e6
+
+        # The CSR scores must agree with the reference implementation
+        expected = np.array(scan_scores(counters, lengths, queries[0]), dtype='float32')
+        if not np.allclose(index.scores(queries[0]), expected, rtol=1e-4, atol=1e-5):
+            raise AssertionError("BM25 scores differ from the reference implementation")
+
+        result = {
+            'chunks': count,
+            'terms': len(index.vocabulary),
+            'postings': len(index.rows),
+            'postings_mb': index.nbytes() / 1e6,
+            'build_seconds': build_seconds,
+            'query_us': query_us,
+            'scan_query_us': scan_us
+        }
+        results.append(result)
+        print(f"{count:>7} chunks: {result['terms']} terms, {result['postings']} postings "
+              f"({result['postings_mb']:.1f} MB), build {build_seconds:.2f}s, "
+              f"query {query_us:.0f}us vs scan {scan_us:.0f}us")
+
+    report = {'benchmark': 'bm25', 'k': args.k, 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chunks', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,183 @@
+"""
+Index size and retrieval quality of the fixed and structured chunkers
+
+Chunks a corpus of synthetic earnings-call transcripts (or the given
+files) with the original fixed-width character windows and with the
+structured, token-sized chunker, and reports chunk counts, stored
+vector bytes, text repeated by overlaps, near-duplicates dropped and how many planted facts end up
+cut across chunk boundaries. With ``--retrieval`` the embedding model is
+loaded and each planted fact is asked about, reporting hit@k (a top-k
+chunk contains the fact's figure) and the tokens those k chunks would
+add to a prompt:
+
+    python -m benchmarks.chunking --transcripts 8 --retrieval --output chunking.json
+"""
+
+import argparse
+import json
+import numpy as np
+from config import (
+    EMBEDDINGS_MODEL,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    MIN_CHUNK_LENGTH,
+    CHUNK_TOKENS,
+    CHUNK_OVERLAP_SENTENCES,
+    CHUNK_DEDUP_DISTANCE
+)
+from chunker import Chunker, fixed_chunks
+
+
+SEGMENTS = ['Bajaj Finance', 'BAGIC', 'Bajaj Allianz Life', 'Bajaj Markets', 'Bajaj Finserv Health', 'Bajaj Housing Finance']
+METRICS = ['AUM', 'net profit', 'gross written premium', 'combined ratio', 'disbursements', 'new business premium',
+           'gross NPA', 'return on equity', 'customer franchise', 'solvency ratio']
+SPEAKERS = ['Sanjiv Bajaj - Chairman', 'S. Sreenivasan - CFO', 'Tapan Singhel - MD, BAGIC', 'Tarun Chugh - MD, Bajaj Allianz Life']
+ANALYSTS = ['Abhishek Murarka', 'Nischint Chawathe', 'Shweta Daptardar', 'Avinash Singh', 'Piran Engineer']
+FILLER = [
+    "We remain focused on profitable growth across our businesses.",
+    "Digital adoption continued to improve across customer journeys.",
+    "The macro environment remained supportive during the quarter.",
+    "We continue to invest in technology and distribution.",
+    "Our risk metrics remain within the guided range.",
+    "Competitive intensity in the market stayed high.",
+    "We expect the momentum to continue in the coming quarters.",
+    "Cost efficiency initiatives are progressing as planned.",
+]
+DISCLAIMER = (
+    "Certain statements in this call may be forward-looking statements. Actual results may differ materially "
+    "from those expressed or implied. The company does not undertake to update these statements."
+)
+
+
+def make_transcripts(count, seed):
+    """Synthetic transcripts and their planted (question, figure, sentence) facts"""
+    rng = np.random.default_rng(seed)
+    transcripts = []
+    facts = []
+    for number in range(count):
+        quarter, year = number % 4 + 1, 25 - number // 4
+        turns = [f"Moderator: Good evening and welcome to the Bajaj Finserv Q{quarter} FY{year} earnings call. {DISCLAIMER}"]
+        for turn in range(30):
+            if turn % 3 == 0:
+                analyst = ANALYSTS[rng.integers(0, len(ANALYSTS))]
+                segment = SEGMENTS[rng.integers(0, len(SEGMENTS))]
+                turns.append(f"Moderator: The next question is from the line of {analyst}. Please go ahead.")
+                turns.append(f"{analyst}: Could you talk about the performance of {segment} this quarter?")
+                continue
+            speaker = SPEAKERS[rng.integers(0, len(SPEAKERS))]
+            sentences = [FILLER[i] for i in rng.integers(0, len(FILLER), rng.integers(3, 9))]
+            segment = SEGMENTS[rng.integers(0, len(SEGMENTS))]
+            metric = METRICS[rng.integers(0, len(METRICS))]
+            figure = f"{rng.integers(100, 99999):,}.{rng.integers(0, 10)}"
+            fact = f"{segment} reported {metric} of Rs. {figure} crore in Q{quarter} FY{year}."
+            sentences.insert(rng.integers(0, len(sentences)), fact)
+            facts.append((f"What was the {metric} of {segment} in Q{quarter} FY{year}?", figure, fact))
+            paragraphs = [' '.join(sentences[:len(sentences) // 2]), ' '.join(sentences[len(sentences) // 2:])]
+            turns.append(f"{speaker}: " + '\n\n'.join(paragraphs))
+        turns.append(f"Moderator: That concludes the call. {DISCLAIMER}")
+        transcripts.append('\n\n'.join(turns))
+    return transcripts, facts
+
+
+def chunk_corpus(name, texts, chunker):
+    """Chunk texts with one strategy, returning the chunk texts and duplicates dropped"""
+    chunks = []
+    dropped = 0
+    for text in texts:
+        if name == 'fixed':
+            spans = fixed_chunks(text, CHUNK_SIZE, CHUNK_OVERLAP, MIN_CHUNK_LENGTH)
+        else:
+            spans = chunker.split(text)
+            keep = chunker.deduplicate([text[start:end] for start, end in spans])
+            dropped += len(spans) - len(keep)
+            spans = [spans[i] for i in keep]
+        chunks.extend(text[start:end] for start, end in spans)
+    return chunks, dropped
+
+
+def run(args):
+    if args.files:
+        texts = []
+        for path in args.files:
+            with open(path, 'r', encoding='utf-8') as f:
+                texts.append(f.read())
+        facts = []
+    else:
+        texts, facts = make_transcripts(args.transcripts, args.seed)
+
+    model = None
+    if args.retrieval and facts:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(EMBEDDINGS_MODEL)
+
+    chunker = Chunker(
+        tokenizer=model.tokenizer if model is not None else None,
+        chunk_tokens=CHUNK_TOKENS,
+        overlap_sentences=CHUNK_OVERLAP_SENTENCES,
+        min_length=MIN_CHUNK_LENGTH,
+        dedup_distance=CHUNK_DEDUP_DISTANCE
+    )
+    dimension = model.get_sentence_embedding_dimension() if model is not None else 384
+
+    results = []
+    for name in ('fixed', 'structured'):
+        chunks, dropped = chunk_corpus(name, texts, chunker)
+        tokens = chunker.count_tokens(chunks)
+        figures = [figure for _, figure, _ in facts]
+        result = {
+            'chunker': name,
+            'chunks': len(chunks),
+            'index_bytes': len(chunks) * dimension * 4,
+            'total_tokens': int(sum(tokens)),
+            'max_tokens': int(max(tokens)) if tokens else 0,
+            # Share of stored characters repeated by overlapping chunks
+            'redundancy': sum(len(chunk) for chunk in chunks) / sum(len(text) for text in texts) - 1,
+            'duplicates_dropped': dropped,
+            # Fact sentences that never appear whole inside a single chunk
+            'facts_split': sum(1 for _, _, fact in facts if not any(fact in chunk for chunk in chunks))
+        }
+
+        if model is not None:
+            embeddings = np.asarray(model.encode(chunks, batch_size=64, normalize_embeddings=True), dtype='float32')
+            questions = np.asarray(
+                model.encode([question for question, _, _ in facts], batch_size=64, normalize_embeddings=True),
+                dtype='float32'
+            )
+            top = np.argsort(-(questions @ embeddings.T), axis=1)[:, :args.k]
+            hits = [any(figure in chunks[i] for i in row) for row, figure in zip(top, figures)]
+            result['hit_at_k'] = float(np.mean(hits))
+            result['prompt_tokens_at_k'] = float(np.mean([sum(tokens[i] for i in row) for row in top]))
+
+        results.append(result)
+        print(f"{name:<11} chunks={result['chunks']:<6} index={result['index_bytes'] / 1e6:.2f}MB "
+              f"tokens={result['total_tokens']} (max {result['max_tokens']}) redundancy={result['redundancy']:+.1%} "
+              f"dropped={dropped} "
+              f"facts split={result['facts_split']}/{len(facts)}"
+              + (f" hit@{args.k}={result['hit_at_k']:.1%} prompt tokens={result['prompt_tokens_at_k']:.0f}"
+                 if 'hit_at_k' in result else ''))
+
+    fixed, structured = results
+    if fixed['chunks']:
+        print(f"index size change: {structured['index_bytes'] / fixed['index_bytes'] - 1:+.1%}")
+
+    report = {'benchmark': 'chunking', 'documents': len(texts), 'facts': len(facts), 'k': args.k, 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transcripts', type=int, default=8)
+    parser.add_argument('--files', nargs='+', help='Chunk these text files instead of synthetic transcripts')
+    parser.add_argument('--retrieval', action='store_true',
+                        help='Measure hit@k with the embedding model (loads the model)')
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
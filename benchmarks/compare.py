@@ -0,0 +1,117 @@
+"""
+Compare two benchmark result files and flag regressions
+
+Matches every numeric result in a baseline and a current JSON report
+written by any of these benchmarks with ``--output``. List entries are
+matched by their first field, such as the corpus size, index type or
+server label. Latencies, times and sizes are better when lower;
+throughput, recall and hit rates are better when higher. A metric that
+got worse by more than ``--threshold`` is a regression, and ``--check``
+exits non-zero when there is one:
+
+    python -m benchmarks.compare baseline/pipeline.json pipeline.json --threshold 0.15 --check
+"""
+
+import argparse
+import json
+import sys
+
+
+LOWER_IS_BETTER = ('_ms', '_seconds', '_us', '_bytes', '_tokens')
+HIGHER_IS_BETTER = ('rps', 'per_second', 'throughput', 'recall', 'hit', 'accuracy', 'compression', 'fact_in_context')
+
+
+def direction(name):
+    """1 when higher is better, -1 when lower is better, 0 when the metric is not compared"""
+    if any(term in name for term in HIGHER_IS_BETTER):
+        return 1
+    if name.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def flatten(value, path=''):
+    """{dotted path: number} for every numeric leaf of a report"""
+    if isinstance(value, bool) or value is None:
+        return {}
+    if isinstance(value, (int, float)):
+        return {path: value}
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(flatten(item, f"{path}.{key}" if path else key))
+        return flat
+    if isinstance(value, list):
+        flat = {}
+        for position, item in enumerate(value):
+            label = str(position)
+            # Label entries by their first field so reordered or added entries still line up
+            if isinstance(item, dict) and item:
+                key, first = next(iter(item.items()))
+                if isinstance(first, (str, int, float)) and not isinstance(first, bool):
+                    label = f"{key}={first}"
+            flat.update(flatten(item, f"{path}[{label}]"))
+        return flat
+    return {}
+
+
+def compare(baseline, current, threshold):
+    """Relative change of every comparable metric present in both reports"""
+    base, now = flatten(baseline), flatten(current)
+    changes = []
+    for path in sorted(base.keys() & now.keys()):
+        sign = direction(path.rsplit('.', 1)[-1])
+        if not sign or base[path] == 0:
+            continue
+        change = (now[path] - base[path]) / abs(base[path])
+        changes.append({
+            'metric': path,
+            'baseline': base[path],
+            'current': now[path],
+            'change': change,
+            'regression': change * sign < -threshold,
+            'improvement': change * sign > threshold
+        })
+    return changes
+
+
+def run(args):
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+    if baseline.get('benchmark') != current.get('benchmark'):
+        print(f"Warning: comparing a {baseline.get('benchmark')} report with a {current.get('benchmark')} report")
+
+    changes = compare(baseline, current, args.threshold)
+    for change in changes:
+        if change['regression'] or change['improvement'] or args.all:
+            flag = 'REGRESSION' if change['regression'] else 'improved' if change['improvement'] else ''
+            print(f"{change['metric']:<60} {change['baseline']:>12.4g} -> {change['current']:<12.4g} "
+                  f"{change['change']:+8.1%} {flag}")
+    regressions = [change for change in changes if change['regression']]
+    print(f"{len(changes)} metrics compared, {len(regressions)} regressions beyond {args.threshold:.0%}")
+
+    report = {'benchmark': 'compare', 'baseline': args.baseline, 'current': args.current,
+              'threshold': args.threshold, 'changes': changes}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.check and regressions:
+        sys.exit(f"{len(regressions)} benchmark regressions")
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Relative change counted as a regression')
+    parser.add_argument('--all', action='store_true', help='Print every compared metric, not only the changed ones')
+    parser.add_argument('--check', action='store_true', help='Exit non-zero when there is a regression')
+    parser.add_argument('--output', help='Write the comparison as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
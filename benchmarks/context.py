@@ -0,0 +1,152 @@
+"""
+Prompt-size benchmark for context assembly
+
+Asks about every fact planted in synthetic earnings-call transcripts,
+retrieves chunks with BM25 (so no model is needed) from both the fixed
+and the structured chunking, and compares the tokens of the old prompt,
+which joined whole chunks under an indented template, with the prompt
+built by ContextBuilder. Also reports how often the fact's figure
+survives into the context and the assembly latency. ``--tokenizer``
+counts tokens with the embedding model's tokenizer instead of the word
+estimate:
+
+    python -m benchmarks.context --transcripts 8 --k 5 --output context.json
+"""
+
+import argparse
+import json
+import time
+import numpy as np
+from config import (
+    EMBEDDINGS_MODEL,
+    MIN_CHUNK_LENGTH,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    CHUNK_TOKENS,
+    CHUNK_OVERLAP_SENTENCES,
+    CHUNK_DEDUP_DISTANCE,
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_SENTENCE_WINDOW
+)
+from chunker import Chunker, fixed_chunks
+from context_builder import ContextBuilder
+from lexical_index import BM25Index
+from benchmarks.chunking import make_transcripts
+
+
+# The prompt template used before context assembly, indentation included
+LEGACY_TEMPLATE = """
+        Based on the following context about Bajaj Finserv, please answer the user's question.
+
+        Context:
+        {context}
+
+        Question: {query}
+
+        Instructions:
+        - Provide a clear, accurate answer based on the context
+        - If the context doesn't contain enough information, say so
+        - Focus on being helpful and informative
+        - Use specific numbers and facts when available
+        """
+
+COMPACT_TEMPLATE = (
+    "Answer the question about Bajaj Finserv using the context. "
+    "Be clear and accurate, use specific numbers and facts when available, "
+    "and say so if the context does not contain enough information.\n\n"
+    "Context:\n{context}\n\n"
+    "Question: {query}"
+)
+
+
+def chunk_documents(name, texts, chunker):
+    """Chunk texts as retrievable docs with offsets in their metadata"""
+    docs = []
+    for number, text in enumerate(texts):
+        if name == 'fixed':
+            spans = fixed_chunks(text, CHUNK_SIZE, CHUNK_OVERLAP, MIN_CHUNK_LENGTH)
+        else:
+            spans = chunker.split(text)
+            spans = [spans[i] for i in chunker.deduplicate([text[start:end] for start, end in spans])]
+        for start, end in spans:
+            docs.append({
+                'id': len(docs),
+                'content': text[start:end],
+                'metadata': {'source': f"transcript_{number}.txt", 'start': start, 'end': end},
+                'score': 0.0
+            })
+    return docs
+
+
+def run(args):
+    tokenizer = None
+    if args.tokenizer:
+        from sentence_transformers import SentenceTransformer
+        tokenizer = SentenceTransformer(EMBEDDINGS_MODEL).tokenizer
+
+    chunker = Chunker(
+        tokenizer=tokenizer,
+        chunk_tokens=CHUNK_TOKENS,
+        overlap_sentences=CHUNK_OVERLAP_SENTENCES,
+        min_length=MIN_CHUNK_LENGTH,
+        dedup_distance=CHUNK_DEDUP_DISTANCE
+    )
+    builder = ContextBuilder(chunker.count_tokens, token_budget=CONTEXT_TOKEN_BUDGET,
+                             sentence_window=CONTEXT_SENTENCE_WINDOW)
+    texts, facts = make_transcripts(args.transcripts, args.seed)
+
+    results = []
+    for name in ('fixed', 'structured'):
+        docs = chunk_documents(name, texts, chunker)
+        index = BM25Index([doc['id'] for doc in docs], [doc['content'] for doc in docs])
+
+        legacy_tokens, prompt_tokens, legacy_hits, hits, latencies = [], [], [], [], []
+        for query, figure, _ in facts:
+            retrieved = [docs[i] for i in index.search(query, args.k)[0]]
+            legacy_context = "\n\n".join(doc['content'] for doc in retrieved)
+            legacy_tokens.append(chunker.count_tokens([LEGACY_TEMPLATE.format(context=legacy_context, query=query)])[0])
+            legacy_hits.append(figure in legacy_context)
+
+            start = time.perf_counter()
+            context, _, _ = builder.build(query, retrieved)
+            latencies.append((time.perf_counter() - start) * 1000)
+            prompt_tokens.append(chunker.count_tokens([COMPACT_TEMPLATE.format(context=context, query=query)])[0])
+            hits.append(figure in context)
+
+        result = {
+            'chunker': name,
+            'legacy_prompt_tokens': float(np.mean(legacy_tokens)),
+            'prompt_tokens': float(np.mean(prompt_tokens)),
+            'max_prompt_tokens': int(max(prompt_tokens)),
+            'legacy_fact_in_context': float(np.mean(legacy_hits)),
+            'fact_in_context': float(np.mean(hits)),
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p95_ms': float(np.percentile(latencies, 95))
+        }
+        results.append(result)
+        print(f"{name:<11} prompt tokens {result['legacy_prompt_tokens']:.0f} -> {result['prompt_tokens']:.0f} "
+              f"({result['prompt_tokens'] / result['legacy_prompt_tokens'] - 1:+.1%}, max {result['max_prompt_tokens']}) "
+              f"fact in context {result['legacy_fact_in_context']:.1%} -> {result['fact_in_context']:.1%} "
+              f"assembly p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms")
+
+    report = {'benchmark': 'context', 'questions': len(facts), 'k': args.k,
+              'token_budget': CONTEXT_TOKEN_BUDGET, 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transcripts', type=int, default=8)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--tokenizer', action='store_true',
+                        help="Count tokens with the embedding model's tokenizer (loads the model)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
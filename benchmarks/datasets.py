@@ -0,0 +1,114 @@
+"""
+Synthetic benchmark data: earnings-call transcripts and share-price CSVs
+
+Writes a data directory the offline server (benchmarks/serve.py) can run
+on: the four configured transcript files, any extra transcripts under
+transcripts/, a BFS_Share_Price.csv in the app's format plus extra
+tickers under prices/, and questions.json with one question per planted
+transcript fact for the load generator:
+
+    python -m benchmarks.datasets --out-dir bench_data --transcripts 40 --years 10 --tickers 3
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+from config import STOCK_DATA_FILE, EARNINGS_FILES
+from benchmarks.chunking import make_transcripts
+
+
+PRICE_HEADER = 'Date,Open Price,High Price,Low Price,Close Price\n'
+
+
+def make_prices(rows, seed, end='2024-12-31', start_price=1000.0):
+    """Business-day dates and open/high/low/close columns of a geometric random walk"""
+    rng = np.random.default_rng(seed)
+    end = np.datetime64(end, 'D')
+    # Walk back over enough calendar days to find ``rows`` business days
+    days = np.arange(end - np.timedelta64(rows * 7 // 5 + 7, 'D'), end + np.timedelta64(1, 'D'))
+    dates = days[np.is_busday(days)][-rows:]
+
+    close = start_price * np.exp(np.cumsum(rng.normal(0.0003, 0.015, rows)))
+    open_ = close * np.exp(rng.normal(0, 0.005, rows))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.008, rows)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.008, rows)))
+    return dates, {'open': open_, 'high': high, 'low': low, 'close': close}
+
+
+def write_price_csv(path, rows, seed):
+    """Write a price CSV with DD/MM/YYYY dates, like BFS_Share_Price.csv"""
+    dates, prices = make_prices(rows, seed)
+    days = dates.astype(object)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(PRICE_HEADER)
+        for i, day in enumerate(days):
+            f.write(f"{day.strftime('%d/%m/%Y')},{prices['open'][i]:.2f},{prices['high'][i]:.2f},"
+                    f"{prices['low'][i]:.2f},{prices['close'][i]:.2f}\n")
+    return path
+
+
+def write_transcripts(directory, count, seed):
+    """Write ``count`` transcripts; returns their paths and the planted facts as questions"""
+    texts, facts = make_transcripts(count, seed)
+    paths = []
+    for number, text in enumerate(texts):
+        # The first transcripts take the configured file names so the app loads them at startup
+        name = EARNINGS_FILES[number] if number < len(EARNINGS_FILES) else os.path.join(
+            'transcripts', f"transcript_{number:04d}.txt"
+        )
+        path = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        paths.append(path)
+    questions = [{'question': question, 'answer_contains': figure} for question, figure, _ in facts]
+    return paths, questions
+
+
+def run(args):
+    os.makedirs(args.out_dir, exist_ok=True)
+    paths, questions = write_transcripts(args.out_dir, args.transcripts, args.seed)
+
+    rows = args.years * 252
+    price_files = [write_price_csv(os.path.join(args.out_dir, STOCK_DATA_FILE), rows, args.seed)]
+    if args.tickers > 1:
+        os.makedirs(os.path.join(args.out_dir, 'prices'), exist_ok=True)
+    for number in range(1, args.tickers):
+        price_files.append(write_price_csv(os.path.join(args.out_dir, 'prices', f"TICKER{number}.csv"),
+                                           rows, args.seed + number))
+
+    questions_path = os.path.join(args.out_dir, 'questions.json')
+    with open(questions_path, 'w', encoding='utf-8') as f:
+        json.dump(questions, f, indent=2)
+
+    report = {
+        'benchmark': 'datasets',
+        'out_dir': args.out_dir,
+        'transcripts': len(paths),
+        'transcript_bytes': sum(os.path.getsize(path) for path in paths),
+        'price_files': len(price_files),
+        'price_rows': rows,
+        'questions': len(questions)
+    }
+    print(f"Wrote {report['transcripts']} transcripts ({report['transcript_bytes'] / 2 ** 20:.1f} MB), "
+          f"{report['price_files']} price CSVs of {rows} rows and {len(questions)} questions to {args.out_dir}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out-dir', default='bench_data')
+    parser.add_argument('--transcripts', type=int, default=8)
+    parser.add_argument('--years', type=int, default=10, help='Years of daily prices per ticker')
+    parser.add_argument('--tickers', type=int, default=1, help='Price CSVs to write, including BFS_Share_Price.csv')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write a summary as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,263 @@
+"""
+Coverage and latency check for stock query date-range parsing
+
+Generates several hundred phrasings of fiscal, calendar, relative and
+explicit date ranges with their expected bounds, checks what
+date_parser.parse_date_range extracts, and compares slicing a long daily
+price series by binary search against a boolean mask:
+
+    python -m benchmarks.date_ranges --years 30 --output date_ranges.json
+
+Exits with status 1 if any phrasing resolves to the wrong range.
+"""
+
+import argparse
+import json
+import sys
+import time
+import numpy as np
+import pandas as pd
+from date_parser import parse_date_range
+from stock_aggregates import PriceAggregates
+
+
+ANCHOR = pd.Timestamp('2024-12-31')
+
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December']
+
+ORDINAL_WORDS = ['first', 'second', 'third', 'fourth']
+
+TEMPLATES = [
+    "What was the highest stock price in {}?",
+    "average share price {}",
+    "{} lowest price",
+    "Show me the stock price summary for {}",
+]
+
+
+def day(value):
+    return pd.Timestamp(value)
+
+
+def month_end(year, month):
+    return pd.Timestamp(year, month, 1) + pd.offsets.MonthEnd(0)
+
+
+def fiscal_quarter_bounds(fiscal_year, quarter):
+    start = pd.Timestamp(fiscal_year - 1, 4, 1) + pd.DateOffset(months=3 * (quarter - 1))
+    return start, month_end(start.year, start.month + 2)
+
+
+def make_cases():
+    """(phrase, expected start, expected end) triples; None bounds are open"""
+    cases = []
+
+    for fiscal_year in range(2016, 2026):
+        yy = fiscal_year % 100
+        for quarter in range(1, 5):
+            start, end = fiscal_quarter_bounds(fiscal_year, quarter)
+            for phrase in (
+                f"Q{quarter} FY{yy:02d}",
+                f"q{quarter}fy{yy:02d}",
+                f"Q{quarter} FY {fiscal_year}",
+                f"Q{quarter} FY {fiscal_year - 1}-{yy:02d}",
+                f"FY{yy:02d} Q{quarter}",
+                f"{ORDINAL_WORDS[quarter - 1]} quarter of FY{yy:02d}",
+            ):
+                cases.append((phrase, start, end))
+
+        fiscal_start, fiscal_end = pd.Timestamp(fiscal_year - 1, 4, 1), pd.Timestamp(fiscal_year, 3, 31)
+        for phrase in (
+            f"FY{yy:02d}",
+            f"FY {fiscal_year - 1}-{yy:02d}",
+            f"fiscal year {fiscal_year}",
+            f"financial year {fiscal_year - 1}-{yy:02d}",
+            f"{fiscal_year - 1}-{yy:02d}",
+        ):
+            cases.append((phrase, fiscal_start, fiscal_end))
+
+        cases.append((f"H1 FY{yy:02d}", fiscal_start, pd.Timestamp(fiscal_year - 1, 9, 30)))
+        cases.append((f"H2 FY{yy:02d}", pd.Timestamp(fiscal_year - 1, 10, 1), fiscal_end))
+
+    for year in range(2015, 2025):
+        cases.append((f"in {year}", pd.Timestamp(year, 1, 1), pd.Timestamp(year, 12, 31)))
+        cases.append((f"calendar year {year}", pd.Timestamp(year, 1, 1), pd.Timestamp(year, 12, 31)))
+        for quarter in range(1, 5):
+            start = pd.Timestamp(year, 3 * quarter - 2, 1)
+            cases.append((f"Q{quarter} {year}", start, month_end(year, 3 * quarter)))
+        for month in (1, 4, 7, 11):
+            name = MONTH_NAMES[month - 1]
+            start, end = pd.Timestamp(year, month, 1), month_end(year, month)
+            cases.append((f"{name} {year}", start, end))
+            cases.append((f"{name[:3]}'{year % 100:02d}", start, end))
+            cases.append((f"{month:02d}/{year}", start, end))
+
+    for count, unit, offset in (
+        (6, 'months', pd.DateOffset(months=6)),
+        (3, 'months', pd.DateOffset(months=3)),
+        (52, 'weeks', pd.Timedelta(weeks=52)),
+        (30, 'days', pd.Timedelta(days=30)),
+        (2, 'years', pd.DateOffset(years=2)),
+        (4, 'quarters', pd.DateOffset(months=12)),
+    ):
+        start = ANCHOR - offset + pd.Timedelta(days=1)
+        for prefix in ('last', 'past', 'previous', 'trailing'):
+            cases.append((f"{prefix} {count} {unit}", start, ANCHOR))
+
+    for phrase, start, end in (
+        ("last six months", day('2024-07-01'), ANCHOR),
+        ("past three months", day('2024-10-01'), ANCHOR),
+        ("52-week high", day('2024-01-03'), ANCHOR),
+        ("52 week low", day('2024-01-03'), ANCHOR),
+        ("past year", day('2024-01-01'), ANCHOR),
+        ("past month", day('2024-12-01'), ANCHOR),
+        ("last year", day('2023-01-01'), day('2023-12-31')),
+        ("previous month", day('2024-11-01'), day('2024-11-30')),
+        ("last quarter", day('2024-07-01'), day('2024-09-30')),
+        ("last week", day('2024-12-23'), day('2024-12-29')),
+        ("this year", day('2024-01-01'), ANCHOR),
+        ("this month", day('2024-12-01'), ANCHOR),
+        ("this quarter", day('2024-10-01'), ANCHOR),
+        ("YTD", day('2024-01-01'), ANCHOR),
+        ("year to date", day('2024-01-01'), ANCHOR),
+        ("FYTD", day('2024-04-01'), ANCHOR),
+        ("MTD", day('2024-12-01'), ANCHOR),
+        ("last fiscal year", day('2023-04-01'), day('2024-03-31')),
+        ("previous financial year", day('2023-04-01'), day('2024-03-31')),
+        ("this fiscal year", day('2024-04-01'), ANCHOR),
+        ("Q3", day('2024-10-01'), day('2024-12-31')),
+        ("Q1", day('2024-04-01'), day('2024-06-30')),
+        ("Q4", day('2024-01-01'), day('2024-03-31')),
+        ("in December", day('2024-12-01'), day('2024-12-31')),
+        ("in February", day('2024-02-01'), day('2024-02-29')),
+    ):
+        cases.append((phrase, start, end))
+
+    for first, last in ((2019, 2021), (2020, 2024), (2016, 2017)):
+        start, end = pd.Timestamp(first, 1, 1), pd.Timestamp(last, 12, 31)
+        cases.append((f"between {first} and {last}", start, end))
+        cases.append((f"from {first} to {last}", start, end))
+        cases.append((f"{first}-{last}", start, end))
+        cases.append((f"between Jan {first} and Mar {last}", start, month_end(last, 3)))
+        cases.append((f"from March {first} to June {last}", pd.Timestamp(first, 3, 1), month_end(last, 6)))
+        cases.append((f"from 1 Jan {first} to 15 Mar {last}", start, pd.Timestamp(last, 3, 15)))
+        cases.append((f"{first}-02-01 to {last}-02-28", pd.Timestamp(first, 2, 1), pd.Timestamp(last, 2, 28)))
+        cases.append((f"01/04/{first} - 30/06/{last}", pd.Timestamp(first, 4, 1), pd.Timestamp(last, 6, 30)))
+        cases.append((f"since {first}", start, None))
+        cases.append((f"after {last}", pd.Timestamp(last + 1, 1, 1), None))
+        cases.append((f"before {first}", None, pd.Timestamp(first - 1, 12, 31)))
+        cases.append((f"until {last}", None, end))
+    for phrase, start, end in (
+        ("Jan to Mar 2024", day('2024-01-01'), day('2024-03-31')),
+        ("Nov-Feb 2024", day('2023-11-01'), day('2024-02-29')),
+        ("Q1-Q3 FY24", day('2023-04-01'), day('2023-12-31')),
+        ("Q2 FY23 to Q1 FY24", day('2022-07-01'), day('2023-06-30')),
+        ("between FY22 and FY24", day('2021-04-01'), day('2024-03-31')),
+        ("on 15th March 2024", day('2024-03-15'), day('2024-03-15')),
+        ("on March 15, 2024", day('2024-03-15'), day('2024-03-15')),
+        ("on 2024-03-15", day('2024-03-15'), day('2024-03-15')),
+        ("on 15/03/2024", day('2024-03-15'), day('2024-03-15')),
+    ):
+        cases.append((phrase, start, end))
+
+    return cases
+
+
+NO_PERIOD = [
+    "What is the stock price?",
+    "How may I check the share price?",
+    "What is the highest price ever?",
+    "Tell me about Bajaj Finserv stock",
+    "average trading price",
+]
+
+
+def check_cases(cases):
+    """Run every phrasing through every template; returns (checked, failures)"""
+    failures = []
+    checked = 0
+    for phrase, start, end in cases:
+        for template in TEMPLATES:
+            query = template.format(phrase)
+            period = parse_date_range(query, anchor=ANCHOR)
+            checked += 1
+            if period is None or period['start'] != start or period['end'] != end:
+                failures.append({'query': query, 'expected': [str(start), str(end)],
+                                 'got': None if period is None else [str(period['start']), str(period['end'])]})
+    for query in NO_PERIOD:
+        checked += 1
+        period = parse_date_range(query, anchor=ANCHOR)
+        if period is not None:
+            failures.append({'query': query, 'expected': None, 'got': [str(period['start']), str(period['end'])]})
+    return checked, failures
+
+
+def time_slicing(years, repeats, seed):
+    """Mean microseconds per range lookup: binary search vs boolean mask"""
+    dates = pd.date_range(end=ANCHOR, periods=years * 365, freq='D')
+    prices = np.random.default_rng(seed).random(len(dates))
+    df = pd.DataFrame({'Date': dates, 'Close Price': prices})
+    aggregates = PriceAggregates(dates.to_numpy(), prices)
+
+    rng = np.random.default_rng(seed + 1)
+    bounds = np.sort(rng.integers(0, len(dates), (repeats, 2)), axis=1)
+    ranges = [(dates[lo], dates[hi]) for lo, hi in bounds]
+
+    start = time.perf_counter()
+    for lo, hi in ranges:
+        aggregates.range_stats(*aggregates.date_range(lo, hi))
+    search_us = (time.perf_counter() - start) / repeats * 1e6
+
+    start = time.perf_counter()
+    for lo, hi in ranges:
+        selected = df['Close Price'][(df['Date'] >= lo) & (df['Date'] <= hi)]
+        selected.max(), selected.min(), selected.mean()
+    mask_us = (time.perf_counter() - start) / repeats * 1e6
+
+    return {'rows': len(dates), 'binary_search_us': search_us, 'boolean_mask_us': mask_us}
+
+
+def run(args):
+    cases = make_cases()
+    queries = [template.format(phrase) for phrase, _, _ in cases for template in TEMPLATES]
+
+    checked, failures = check_cases(cases)
+    for failure in failures:
+        print(f"FAIL {failure['query']!r}: expected {failure['expected']}, got {failure['got']}")
+    print(f"{checked - len(failures)}/{checked} phrasings resolved correctly")
+
+    start = time.perf_counter()
+    for query in queries:
+        parse_date_range(query, anchor=ANCHOR)
+    parse_us = (time.perf_counter() - start) / len(queries) * 1e6
+    print(f"parse: {parse_us:.1f}us per query")
+
+    slicing = time_slicing(args.years, args.repeats, args.seed)
+    print(f"range stats over {slicing['rows']} rows: binary search {slicing['binary_search_us']:.1f}us, "
+          f"boolean mask {slicing['boolean_mask_us']:.1f}us")
+
+    report = {
+        'benchmark': 'date_ranges',
+        'phrasings': checked,
+        'failures': failures,
+        'parse_us': parse_us,
+        'slicing': slicing
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=30)
+    parser.add_argument('--repeats', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(1 if run(parse_args())['failures'] else 0)
@@ -0,0 +1,122 @@
+"""
+Scaling micro-benchmark for the technical indicator engine
+
+Times every indicator on synthetic hourly closes from 10 thousand to 2.5
+million rows on a fresh engine, so nothing is served from the cache, and
+fits the log-log slope of time against length. Sizes this large keep
+fixed per-call overhead from hiding the growth. Linear-time indicators
+must fit a slope within ``--tolerance`` (default 0.2) of 1. CAGR only
+reads two rows, so it must fit a slope below ``--constant-slope``
+(default 0.5); cache misses on the longer arrays tilt its few-microsecond
+timings too much for a tighter bound. The run exits non-zero when any
+fit is outside its bound:
+
+    python -m benchmarks.indicators --rows 10000 100000 1000000 --output indicators.json
+"""
+
+import argparse
+import json
+import sys
+import time
+import numpy as np
+import pandas as pd
+from indicators import IndicatorEngine
+
+
+# Indicators whose cost does not grow with the series
+CONSTANT_TIME = {'cagr'}
+
+INDICATORS = {
+    'sma_50': lambda engine, n: engine.sma(50),
+    'sma_200': lambda engine, n: engine.sma(200),
+    'ema_20': lambda engine, n: engine.ema(20),
+    'rsi_14': lambda engine, n: engine.rsi(14),
+    'rolling_volatility_21': lambda engine, n: engine.rolling_volatility(21),
+    'drawdown': lambda engine, n: engine.drawdown(),
+    'volatility': lambda engine, n: engine.volatility(0, n),
+    'max_drawdown': lambda engine, n: engine.max_drawdown(0, n),
+    'cagr': lambda engine, n: engine.cagr(0, n),
+}
+
+
+def make_series(rows, seed):
+    """Geometric random walk of hourly closes.
+
+    Hourly rather than daily timestamps, since millions of days do not fit
+    in nanosecond datetimes; the spacing only changes CAGR's year count.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end='2024-12-31', periods=rows, freq='h').to_numpy()
+    prices = 1000 * np.exp(np.cumsum(rng.normal(0.0, 0.002, rows)))
+    return dates, prices
+
+
+def time_indicator(compute, dates, prices, repeats):
+    """Best-of-``repeats`` seconds to compute an indicator without caching"""
+    best = float('inf')
+    for _ in range(repeats):
+        engine = IndicatorEngine(dates, prices)
+        start = time.perf_counter()
+        compute(engine, len(prices))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(args):
+    sizes = sorted(args.rows)
+    series = {rows: make_series(rows, args.seed) for rows in sizes}
+
+    results = []
+    failures = []
+    for name, compute in INDICATORS.items():
+        seconds = [time_indicator(compute, *series[rows], args.repeats) for rows in sizes]
+        slope = float(np.polyfit(np.log(sizes), np.log(seconds), 1)[0]) if len(sizes) > 1 else None
+        if name in CONSTANT_TIME:
+            bound = (float('-inf'), args.constant_slope)
+        else:
+            bound = (1 - args.tolerance, 1 + args.tolerance)
+        if slope is not None and not bound[0] <= slope <= bound[1]:
+            failures.append(f"{name} slope {slope:.2f} outside [{bound[0]:g}, {bound[1]:g}]")
+
+        engine = IndicatorEngine(*series[sizes[-1]])
+        compute(engine, sizes[-1])
+        start = time.perf_counter()
+        compute(engine, sizes[-1])
+        cached_us = (time.perf_counter() - start) * 1e6
+
+        result = {
+            'indicator': name,
+            'rows': sizes,
+            'ms': [s * 1000 for s in seconds],
+            'ns_per_row': [s * 1e9 / rows for s, rows in zip(seconds, sizes)],
+            'loglog_slope': slope,
+            'slope_bound': [bound[0] if np.isfinite(bound[0]) else None, bound[1]],
+            'cached_us': cached_us
+        }
+        results.append(result)
+        slope_text = f"{slope:.2f}" if slope is not None else 'n/a'
+        print(f"{name:<22} " + '  '.join(f"{rows:>7}: {ms:8.3f}ms" for rows, ms in zip(sizes, result['ms']))
+              + f"  slope={slope_text}  cached={cached_us:.1f}us")
+
+    report = {'benchmark': 'indicators', 'rows': sizes, 'results': results, 'failures': failures}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 40000, 160000, 640000, 2560000])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Largest accepted distance of a linear indicator\'s slope from 1')
+    parser.add_argument('--constant-slope', type=float, default=0.5, help='Largest accepted slope of a constant-time indicator')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    failures = run(parse_args())['failures']
+    if failures:
+        sys.exit("Indicator scaling check failed: " + '; '.join(failures))
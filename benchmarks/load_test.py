@@ -0,0 +1,209 @@
+"""
+Closed-loop load generator for the FinSage Pro query API
+
+Each simulated client sends a question, waits for the answer and
+immediately sends the next one over a keep-alive connection. Reports
+throughput and latency percentiles per target, so the synchronous Flask
+server and the asynchronous ASGI server can be compared side by side
+against the stub LLM (see benchmarks/stub_llm.py). Error statuses,
+connection failures and answers that report a failed generation are
+counted as errors rather than requests:
+
+    python -m benchmarks.stub_llm --latency-ms 800 &
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8081 gunicorn app:app -b :5000 --threads 8 &
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8081 hypercorn asgi_app:app -b :5001 &
+    python -m benchmarks.load_test --target sync=http://127.0.0.1:5000 \\
+        --target async=http://127.0.0.1:5001 --concurrency 200 --duration 30
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+import numpy as np
+from rag_system import GENERATION_ERROR_MESSAGE
+
+
+# A failed Gemini call still returns 200, with this message as the answer
+GENERATION_ERROR = GENERATION_ERROR_MESSAGE.encode('utf-8')
+
+
+QUESTIONS = [
+    "How did Bajaj Finserv perform in Q3?",
+    "What drove growth in the lending business?",
+    "How is Bajaj Allianz General Insurance doing?",
+    "What did management say about digital transformation?",
+    "What are the key business segments of Bajaj Finserv?",
+    "How did the life insurance business grow this year?",
+    "What are the investment highlights for Bajaj Finserv?",
+    "What partnerships did Bajaj Finserv announce?",
+]
+
+
+class HTTPConnection:
+    """Tiny keep-alive HTTP/1.1 client on asyncio streams"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, payload):
+        """Send a JSON request and return (status, body bytes)"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        body = json.dumps(payload).encode('utf-8')
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+        )
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'content-length' in headers:
+            data = await self.reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = await self._read_chunked()
+        else:
+            data = await self.reader.read()
+            self.close()
+
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, data
+
+    async def _read_chunked(self):
+        parts = []
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await self.reader.readline()
+                return b''.join(parts)
+            parts.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def client(url, path, deadline, questions, latencies, errors, cache_busting):
+    """One closed-loop client issuing requests until the deadline"""
+    parts = urlsplit(url)
+    connection = HTTPConnection(parts.hostname, parts.port or 80)
+
+    while time.perf_counter() < deadline:
+        question = next(questions)
+        if cache_busting:
+            question = f"{question} (request {time.perf_counter_ns()})"
+
+        start = time.perf_counter()
+        try:
+            status, body = await connection.request('POST', path, {'query': question})
+            if status != 200:
+                errors.append(status)
+            elif GENERATION_ERROR in body:
+                errors.append('generation_error')
+            else:
+                latencies.append(time.perf_counter() - start)
+        except (ConnectionError, OSError, asyncio.IncompleteReadError) as e:
+            errors.append(type(e).__name__)
+            connection.close()
+
+    connection.close()
+
+
+def load_questions(path):
+    """Questions from a JSON list of strings or of {"question": ...} objects, such as benchmarks/datasets.py writes"""
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    return [entry['question'] if isinstance(entry, dict) else entry for entry in entries]
+
+
+async def run_target(label, url, args):
+    """Load one server and summarise throughput and latency"""
+    questions = itertools.cycle(load_questions(args.questions_file) if args.questions_file else QUESTIONS)
+    latencies = []
+    errors = []
+
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*[
+        client(url, args.path, deadline, questions, latencies, errors, args.cache_busting)
+        for _ in range(args.concurrency)
+    ])
+    elapsed = time.perf_counter() - started
+
+    latency_ms = np.array(latencies) * 1000
+    return {
+        'target': label,
+        'url': url,
+        'concurrency': args.concurrency,
+        'duration_seconds': elapsed,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_kinds': dict(Counter(str(error) for error in errors)),
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latency_ms, 50)) if len(latency_ms) else None,
+        'p90_ms': float(np.percentile(latency_ms, 90)) if len(latency_ms) else None,
+        'p99_ms': float(np.percentile(latency_ms, 99)) if len(latency_ms) else None
+    }
+
+
+async def run(args):
+    results = []
+    for target in args.target:
+        label, _, url = target.partition('=')
+        if not url:
+            label = url = target
+        print(f"Loading {label} at {url} with {args.concurrency} clients for {args.duration}s...")
+        result = await run_target(label, url, args)
+        results.append(result)
+
+        p50 = f"{result['p50_ms']:.0f}ms" if result['p50_ms'] is not None else 'n/a'
+        p99 = f"{result['p99_ms']:.0f}ms" if result['p99_ms'] is not None else 'n/a'
+        kinds = ', '.join(f"{kind}: {count}" for kind, count in result['error_kinds'].items())
+        print(f"{label:<10} {result['throughput_rps']:8.1f} req/s  p50={p50}  p99={p99}  "
+              f"errors={result['errors']}" + (f" ({kinds})" if kinds else ''))
+
+    report = {'benchmark': 'load_test', 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', action='append', required=True,
+                        help='label=url of a server to load; repeat to compare servers')
+    parser.add_argument('--path', default='/api/query')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--questions-file', help='JSON list of questions to send instead of the built-in ones')
+    parser.add_argument('--cache-busting', action=argparse.BooleanOptionalAction, default=True,
+                        help='Make every question unique so answer caches do not hide LLM latency')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    asyncio.run(run(parse_args()))
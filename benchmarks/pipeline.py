@@ -0,0 +1,203 @@
+"""
+Micro-benchmarks of the RAG pipeline and the stock analysis paths
+
+For each corpus size, chunks synthetic transcripts with
+SimpleRAG._create_chunks, builds the FAISS and BM25 indexes with
+_build_faiss_index and times SimpleRAG.search with and without a cached
+query embedding. Embeddings come from the hashing stub embedder, so no
+model or network is needed. For each price-history length, times every
+StockAnalyzer answer path (range, calendar, fiscal and relative
+periods, each indicator, the summary and filtered data), both the first
+call, which builds the aggregates, and the median repeated call:
+
+    python -m benchmarks.pipeline --transcripts 8 64 256 --years 1 10 30 --output pipeline.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from config import INDEX_TYPE
+from rag_system import SimpleRAG
+from index_store import IndexStore
+from stock_analyzer import StockAnalyzer
+from stock_store import StockStore
+from vector_index import INDEX_TYPES, index_params
+from benchmarks.chunking import make_transcripts
+from benchmarks.datasets import write_price_csv
+from benchmarks.stub_embedder import HashEmbedder
+
+
+# Questions answered within the last year of generated prices (which end on 31 Dec 2024)
+STOCK_QUERIES = {
+    'full_range': "What was the highest stock price?",
+    'calendar_year': "What was the average stock price in 2024?",
+    'fiscal_quarter': "What was the lowest stock price in Q2 FY25?",
+    'relative_period': "What was the highest stock price in the last 6 months?",
+    'sma': "What is the 50-day SMA of the stock?",
+    'ema': "What is the 20-day EMA of the stock?",
+    'rsi': "What is the 14-day RSI of the stock?",
+    'drawdown': "What was the maximum drawdown of the stock in 2024?",
+    'volatility': "What was the stock volatility in 2024?",
+    'cagr': "What was the stock CAGR in 2024?",
+    'return': "What was the stock return in 2024?"
+}
+
+
+def percentile_ms(seconds, q):
+    return float(np.percentile(np.array(seconds) * 1000, q))
+
+
+def timed(func, *args):
+    """func(*args) and its wall time in seconds"""
+    start = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - start
+
+
+def make_rag(workdir, args):
+    """SimpleRAG on the stub embedder, with its index store in ``workdir``"""
+    rag = SimpleRAG()
+    rag.store = IndexStore(os.path.join(workdir, 'index'))
+    rag.index_params = index_params(args.index_type)
+    rag._embeddings_model = HashEmbedder(dimension=args.dim)
+    return rag
+
+
+def chunk_blocks(rag, docs):
+    """ChunkTable blocks for documents, embedded by the stub embedder"""
+    blocks = []
+    next_id = 0
+    for doc in docs:
+        chunks, metadata = rag._create_chunks([doc])
+        blocks.append({
+            'source': doc['source'],
+            'type': doc['type'],
+            'ids': np.arange(next_id, next_id + len(chunks), dtype='int64'),
+            'texts': chunks,
+            'spans': np.array([[meta['start'], meta['end']] for meta in metadata], dtype='int64').reshape(-1, 2),
+            'embeddings': rag.embeddings_model.encode(chunks, batch_size=256)
+        })
+        next_id += len(chunks)
+    return blocks
+
+
+def bench_rag(count, args, workdir):
+    """Chunking, index build and search timings for ``count`` transcripts"""
+    texts, facts = make_transcripts(count, args.seed)
+    docs = [{'content': text, 'source': f"transcript_{i}.txt", 'type': 'transcript'} for i, text in enumerate(texts)]
+    rag = make_rag(workdir, args)
+
+    (chunks, _), chunk_seconds = timed(rag._create_chunks, docs)
+    blocks = chunk_blocks(rag, docs)
+    built, build_seconds = timed(rag._build_faiss_index, blocks)
+    if not built:
+        raise RuntimeError("the index could not be built")
+
+    questions = [question for question, _, _ in facts][:args.queries]
+    cold, warm = [], []
+    for question in questions:
+        rag.query_cache.clear()
+        cold.append(timed(rag.search, question, args.k)[1])
+        warm.append(timed(rag.search, question, args.k)[1])
+
+    hits = sum(
+        any(figure in doc['content'] for doc in rag.search(question, args.k))
+        for question, figure, _ in facts[:args.queries]
+    )
+    result = {
+        'transcripts': count,
+        'chunks': len(chunks),
+        'corpus_bytes': sum(len(text.encode('utf-8')) for text in texts),
+        'create_chunks_ms': chunk_seconds * 1000,
+        'chunks_per_second': len(chunks) / chunk_seconds if chunk_seconds else None,
+        'build_index_ms': build_seconds * 1000,
+        'search_p50_ms': percentile_ms(cold, 50),
+        'search_p95_ms': percentile_ms(cold, 95),
+        'cached_search_p50_ms': percentile_ms(warm, 50),
+        'cached_search_p95_ms': percentile_ms(warm, 95),
+        'hit_at_k': hits / len(questions) if questions else None
+    }
+    print(f"  {count:5d} transcripts {result['chunks']:7d} chunks  chunk {result['create_chunks_ms']:8.1f}ms  "
+          f"build {result['build_index_ms']:8.1f}ms  search p50={result['search_p50_ms']:.2f}ms "
+          f"cached p50={result['cached_search_p50_ms']:.2f}ms  hit@{args.k}={result['hit_at_k']:.2f}")
+    return result
+
+
+def bench_stock(years, args, workdir):
+    """First-call and median timings of every StockAnalyzer path over ``years`` of prices"""
+    ticker = f"BENCH{years}"
+    path = write_price_csv(os.path.join(workdir, f"{ticker}.csv"), years * 252, args.seed)
+    store = StockStore(os.path.join(workdir, 'stocks'))
+    _, import_seconds = timed(store.sync, {ticker: path})
+    analyzer, load_seconds = timed(StockAnalyzer, ticker, store)
+
+    paths = {name: (analyzer.get_stock_stats_response, query) for name, query in STOCK_QUERIES.items()}
+    paths['summary'] = (lambda _: analyzer.get_stock_summary(), None)
+    paths['filtered_data'] = (analyzer.get_filtered_data, "stock prices in 2024")
+
+    result = {
+        'years': years,
+        'rows': years * 252,
+        'csv_import_ms': import_seconds * 1000,
+        'load_ms': load_seconds * 1000,
+        'paths': {}
+    }
+    for name, (func, query) in paths.items():
+        first = timed(func, query)[1]
+        repeats = [timed(func, query)[1] for _ in range(args.repeats)]
+        result['paths'][name] = {'first_ms': first * 1000, 'p50_ms': percentile_ms(repeats, 50)}
+
+    slowest = max(result['paths'].items(), key=lambda item: item[1]['p50_ms'])
+    print(f"  {years:3d} years {result['rows']:6d} rows  import {result['csv_import_ms']:7.1f}ms  "
+          f"load {result['load_ms']:6.1f}ms  slowest path {slowest[0]} p50={slowest[1]['p50_ms']:.3f}ms")
+    for name, timing in result['paths'].items():
+        print(f"      {name:<16} first {timing['first_ms']:8.3f}ms  p50 {timing['p50_ms']:8.3f}ms")
+    return result
+
+
+def run(args):
+    report = {
+        'benchmark': 'pipeline',
+        'index_type': args.index_type,
+        'dimension': args.dim,
+        'k': args.k,
+        'rag': [],
+        'stock': []
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.transcripts:
+            print(f"RAG pipeline ({args.index_type} index, {args.dim}-dimension stub embeddings):")
+            for count in args.transcripts:
+                report['rag'].append(bench_rag(count, args, os.path.join(workdir, f"rag-{count}")))
+        if args.years:
+            print("Stock analysis paths:")
+            for years in args.years:
+                report['stock'].append(bench_stock(years, args, workdir))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transcripts', type=int, nargs='*', default=[8, 64, 256],
+                        help='Corpus sizes in transcripts; none to skip the RAG benchmarks')
+    parser.add_argument('--years', type=int, nargs='*', default=[1, 10, 30],
+                        help='Price history lengths; none to skip the stock benchmarks')
+    parser.add_argument('--index-type', choices=INDEX_TYPES, default=INDEX_TYPE)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=200, help='Search questions per corpus size')
+    parser.add_argument('--repeats', type=int, default=50, help='Repeated calls per stock path')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
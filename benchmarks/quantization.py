@@ -0,0 +1,188 @@
+"""
+Memory and recall benchmark for quantised embedding and chunk storage
+
+For each corpus size, builds the float32 'flat' index, the int8 'sq8'
+index and the sign-bit 'binary' index (with and without float
+re-scoring from a memory-mapped embeddings file) over synthetic
+MiniLM-shaped vectors, and reports index bytes, recall@k against exact
+search and single-query latency. Then compares the Python heap taken by
+chunk texts and metadata held as per-chunk dicts with a ChunkTable over
+a memory-mapped text blob:
+
+    python -m benchmarks.quantization --sizes 100000 1000000 --output quantization.json
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import faiss
+from chunk_store import ChunkTable, ChunkTexts, write_chunk_texts
+from vector_index import BinaryIndex, index_params, build_index
+from benchmarks.ann_index import make_corpus, make_queries, measure
+
+
+WORDS = ('revenue growth quarter loan book disbursement insurance premium customer franchise asset quality '
+         'credit cost margin digital platform partnership motor health life general lending deposits').split()
+
+
+def index_bytes(index):
+    """Serialised size of a float or binary index"""
+    if isinstance(index, BinaryIndex):
+        return int(faiss.serialize_index_binary(index.index).nbytes)
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def compare_indexes(corpus, queries, ground_truth, args, workdir):
+    """Bytes, recall and latency of each storage mode"""
+    ids = np.arange(len(corpus), dtype='int64')
+    vectors_path = os.path.join(workdir, 'embeddings.npy')
+    np.save(vectors_path, corpus)
+    vectors = np.load(vectors_path, mmap_mode='r')
+
+    results = []
+    for name, index_type, rescore in (('flat', 'flat', False), ('sq8', 'sq8', False),
+                                      ('binary', 'binary', False), ('binary+rescore', 'binary', True)):
+        params = index_params(index_type, rescore_factor=args.rescore_factor)
+        start = time.perf_counter()
+        index, params = build_index(corpus.shape[1], [corpus], params)
+        for offset in range(0, len(corpus), args.add_batch):
+            index.add_with_ids(corpus[offset:offset + args.add_batch], ids[offset:offset + args.add_batch])
+        build_seconds = time.perf_counter() - start
+        if rescore:
+            index.vectors = lambda chunk_ids: np.asarray(vectors[chunk_ids])
+
+        result = {'storage': name, 'index_bytes': index_bytes(index), 'build_seconds': build_seconds}
+        result.update(measure(index, queries, ground_truth, args.k))
+        results.append(result)
+        del index
+
+    flat_bytes = results[0]['index_bytes']
+    for result in results:
+        result['compression'] = flat_bytes / result['index_bytes']
+        print(f"  {result['storage']:<15} {result['index_bytes'] / 2 ** 20:8.1f} MB ({result['compression']:4.1f}x) "
+              f"recall@{args.k}={result['recall_at_k']:.3f} "
+              f"p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms")
+    return results
+
+
+def make_texts(count, chars, seed):
+    """Synthetic chunk texts of roughly ``chars`` characters"""
+    rng = random.Random(seed)
+    words = max(1, chars // 8)
+    return [' '.join(rng.choices(WORDS, k=words)) for _ in range(count)]
+
+
+def traced(build):
+    """Return build()'s result and the Python heap bytes it allocated"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return value, used
+
+
+def compare_texts(count, args, workdir):
+    """Heap bytes of per-chunk dicts versus a ChunkTable over memory-mapped files"""
+    def build_dicts():
+        texts = make_texts(count, args.text_chars, args.seed)
+        documents = dict(enumerate(texts))
+        metadata = {i: {'source': 'transcript.txt', 'type': 'transcript', 'start': 0, 'end': len(text)}
+                    for i, text in enumerate(texts)}
+        return documents, metadata
+
+    (documents, metadata), dict_bytes = traced(build_dicts)
+    texts = list(documents.values())
+    written = write_chunk_texts(workdir, texts)
+    for tmp_path, path in written:
+        os.replace(tmp_path, path)
+    spans_path = os.path.join(workdir, 'spans.npy')
+    np.save(spans_path, np.array([[0, len(text)] for text in texts], dtype='int64'))
+    vectors_path = os.path.join(workdir, 'embeddings.npy')
+    del documents, metadata, texts
+
+    def build_table():
+        return ChunkTable([{
+            'source': 'transcript.txt',
+            'type': 'transcript',
+            'ids': np.arange(count, dtype='int64'),
+            'texts': ChunkTexts(workdir),
+            'spans': np.load(spans_path, mmap_mode='r'),
+            'embeddings': np.load(vectors_path, mmap_mode='r')
+        }])
+
+    table, table_bytes = traced(build_table)
+    lookups = np.random.default_rng(args.seed).integers(0, count, 1000)
+    start = time.perf_counter()
+    for chunk_id in lookups:
+        table.text(chunk_id)
+        table.metadata(chunk_id)
+    lookup_us = (time.perf_counter() - start) / len(lookups) * 1e6
+
+    result = {
+        'dict_heap_bytes': dict_bytes,
+        'table_heap_bytes': table_bytes,
+        'mapped_bytes': sum(os.path.getsize(path) for _, path in written) + os.path.getsize(spans_path),
+        'table_lookup_us': lookup_us
+    }
+    print(f"  chunk texts     dicts {dict_bytes / 2 ** 20:8.1f} MB heap -> table {table_bytes / 2 ** 20:.1f} MB heap "
+          f"+ {result['mapped_bytes'] / 2 ** 20:.1f} MB mapped, lookup {lookup_us:.1f}us")
+    return result
+
+
+def run(args):
+    reports = []
+    for size in args.sizes:
+        print(f"{size} chunks of {args.dim} dimensions:")
+        corpus, centers = make_corpus(size, args.dim, args.clusters, args.seed)
+        queries = make_queries(centers, args.queries, args.seed)
+
+        exact = faiss.IndexFlatL2(args.dim)
+        exact.add(corpus)
+        _, ground_truth = exact.search(queries, args.k)
+        del exact
+
+        with tempfile.TemporaryDirectory() as workdir:
+            report = {'num_chunks': size, 'indexes': compare_indexes(corpus, queries, ground_truth, args, workdir)}
+            del corpus
+            if not args.skip_texts:
+                report['texts'] = compare_texts(size, args, workdir)
+        reports.append(report)
+
+    report = {
+        'benchmark': 'quantization',
+        'dimension': args.dim,
+        'queries': args.queries,
+        'k': args.k,
+        'rescore_factor': args.rescore_factor,
+        'results': reports
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--clusters', type=int, default=2000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--rescore-factor', type=int, default=10)
+    parser.add_argument('--text-chars', type=int, default=1000)
+    parser.add_argument('--skip-texts', action='store_true', help='Only compare the vector indexes')
+    parser.add_argument('--add-batch', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
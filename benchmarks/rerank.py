@@ -0,0 +1,130 @@
+"""
+Prompt-token and latency benchmark for cross-encoder reranking
+
+Chunks synthetic earnings-call transcripts, asks about every planted
+fact and compares the context sent to Gemini by plain dense retrieval of
+the top DEFAULT_SEARCH_RESULTS chunks with retrieving RERANK_CANDIDATES
+chunks and reranking them into CONTEXT_TOKEN_BUDGET. Reports context
+tokens, whether the context still holds the fact's figure, and the
+latency reranking adds with a cold and a warm score cache. Loads the
+embedding model and the cross-encoder:
+
+    python -m benchmarks.rerank --transcripts 8 --output rerank.json
+"""
+
+import argparse
+import json
+import time
+import numpy as np
+from config import (
+    EMBEDDINGS_MODEL,
+    DEFAULT_SEARCH_RESULTS,
+    MIN_CHUNK_LENGTH,
+    CHUNK_TOKENS,
+    CHUNK_OVERLAP_SENTENCES,
+    CHUNK_DEDUP_DISTANCE,
+    RERANK_MODEL,
+    RERANK_CANDIDATES,
+    RERANK_BATCH_SIZE,
+    RERANK_MIN_SCORE,
+    CONTEXT_TOKEN_BUDGET
+)
+from chunker import Chunker
+from reranker import Reranker
+from benchmarks.chunking import make_transcripts, chunk_corpus
+
+
+def summarise(name, contexts, facts, count_tokens, latencies=None):
+    """Mean context tokens and fact coverage for one retrieval strategy"""
+    tokens = [sum(count_tokens([doc['content'] for doc in docs])) if docs else 0 for docs in contexts]
+    hits = [any(figure in doc['content'] for doc in docs) for docs, (_, figure, _) in zip(contexts, facts)]
+    result = {
+        'strategy': name,
+        'mean_chunks': float(np.mean([len(docs) for docs in contexts])),
+        'mean_context_tokens': float(np.mean(tokens)),
+        'fact_in_context': float(np.mean(hits))
+    }
+    if latencies is not None:
+        result['p50_ms'] = float(np.percentile(latencies, 50))
+        result['p95_ms'] = float(np.percentile(latencies, 95))
+    latency_text = f"  rerank p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms" if latencies is not None else ''
+    print(f"{name:<14} chunks={result['mean_chunks']:.1f} context tokens={result['mean_context_tokens']:.0f} "
+          f"fact in context={result['fact_in_context']:.1%}{latency_text}")
+    return result
+
+
+def run(args):
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(EMBEDDINGS_MODEL)
+    chunker = Chunker(
+        tokenizer=model.tokenizer,
+        chunk_tokens=CHUNK_TOKENS,
+        overlap_sentences=CHUNK_OVERLAP_SENTENCES,
+        min_length=MIN_CHUNK_LENGTH,
+        dedup_distance=CHUNK_DEDUP_DISTANCE
+    )
+    texts, facts = make_transcripts(args.transcripts, args.seed)
+    facts = facts[:args.queries]
+    chunks, _ = chunk_corpus('structured', texts, chunker)
+    print(f"{len(chunks)} chunks, {len(facts)} questions")
+
+    embeddings = np.asarray(model.encode(chunks, batch_size=64, normalize_embeddings=True), dtype='float32')
+    questions = [question for question, _, _ in facts]
+    query_embeddings = np.asarray(model.encode(questions, batch_size=64, normalize_embeddings=True), dtype='float32')
+    order = np.argsort(-(query_embeddings @ embeddings.T), axis=1)
+
+    def retrieve(row, k):
+        return [{'id': int(i), 'content': chunks[i], 'score': float(rank)} for rank, i in enumerate(order[row, :k])]
+
+    results = [summarise('dense top-k', [retrieve(row, DEFAULT_SEARCH_RESULTS) for row in range(len(facts))],
+                         facts, chunker.count_tokens)]
+
+    reranker = Reranker(
+        RERANK_MODEL,
+        batch_size=RERANK_BATCH_SIZE,
+        min_score=RERANK_MIN_SCORE,
+        token_budget=CONTEXT_TOKEN_BUDGET,
+        count_tokens=chunker.count_tokens
+    )
+    reranker.rerank(questions[0], retrieve(0, 2))
+    reranker.cache.clear()
+
+    for name in ('rerank cold', 'rerank warm'):
+        contexts, latencies = [], []
+        for row, question in enumerate(questions):
+            candidates = retrieve(row, RERANK_CANDIDATES)
+            start = time.perf_counter()
+            contexts.append(reranker.rerank(question, candidates))
+            latencies.append((time.perf_counter() - start) * 1000)
+        results.append(summarise(name, contexts, facts, chunker.count_tokens, latencies))
+
+    baseline, cold = results[0], results[1]
+    if baseline['mean_context_tokens']:
+        print(f"context tokens change: {cold['mean_context_tokens'] / baseline['mean_context_tokens'] - 1:+.1%}")
+
+    report = {
+        'benchmark': 'rerank',
+        'chunks': len(chunks),
+        'questions': len(facts),
+        'candidates': RERANK_CANDIDATES,
+        'token_budget': CONTEXT_TOKEN_BUDGET,
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transcripts', type=int, default=8)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,177 @@
+"""
+Accuracy and latency benchmark for query routing
+
+Routes a labelled set of stock and business questions with the original
+seven-keyword check and with QueryRouter, reporting accuracy, the
+misrouted questions and the routing cost per question. ``--classifier``
+also loads the embedding model so ambiguous questions go through the
+prototype classifier:
+
+    python -m benchmarks.router --classifier --output router.json
+"""
+
+import argparse
+import json
+import time
+from query_router import QueryRouter, ROUTE_STOCK, ROUTE_RAG
+
+
+LABELLED_QUERIES = [
+    # Stock price questions
+    ("What is the current stock price?", ROUTE_STOCK),
+    ("What was the highest stock price in 2023?", ROUTE_STOCK),
+    ("What was the lowest share price in Q2 FY24?", ROUTE_STOCK),
+    ("Average closing price over the last 6 months", ROUTE_STOCK),
+    ("How did BAJAJFINSV close yesterday?", ROUTE_STOCK),
+    ("What did the stock close at on 15 March 2024?", ROUTE_STOCK),
+    ("Show me the stock price summary for FY24", ROUTE_STOCK),
+    ("What is the 52-week high?", ROUTE_STOCK),
+    ("What is the 200 DMA?", ROUTE_STOCK),
+    ("50-day moving average of the shares", ROUTE_STOCK),
+    ("What is the RSI today?", ROUTE_STOCK),
+    ("How volatile was the stock in 2022?", ROUTE_STOCK),
+    ("What was the maximum drawdown since 2020?", ROUTE_STOCK),
+    ("What is the CAGR of the share price since 2015?", ROUTE_STOCK),
+    ("How much did the stock return in the last year?", ROUTE_STOCK),
+    ("What was the share price trend in 2021?", ROUTE_STOCK),
+    ("When did the share price hit its all-time high?", ROUTE_STOCK),
+    ("What was the price range between Jan 2023 and Mar 2024?", ROUTE_STOCK),
+    ("Give me the highest and lowest prices in 2020", ROUTE_STOCK),
+    ("What was the closing price last week?", ROUTE_STOCK),
+    ("How did the stock perform YTD?", ROUTE_STOCK),
+    ("Stock performance in the last 3 months", ROUTE_STOCK),
+    ("What is the average trading price this year?", ROUTE_STOCK),
+    ("Did the stock rally after the Q3 results?", ROUTE_STOCK),
+    ("Where is BAJAJFINSV trading now?", ROUTE_STOCK),
+    ("What was the share price on 01/04/2023?", ROUTE_STOCK),
+    ("Price history for the past 52 weeks", ROUTE_STOCK),
+    ("What was the peak price in FY 2022-23?", ROUTE_STOCK),
+    ("How much has the stock fallen from its high?", ROUTE_STOCK),
+    ("EMA 20 of Bajaj Finserv", ROUTE_STOCK),
+    ("What is the stock's volatility over the last 2 years?", ROUTE_STOCK),
+    ("Lowest closing price last month", ROUTE_STOCK),
+    ("Market price of Bajaj Finserv shares", ROUTE_STOCK),
+    ("What was the opening price yesterday?", ROUTE_STOCK),
+    ("Is the stock near its 52 week low?", ROUTE_STOCK),
+    ("What were the returns of the share in 2023?", ROUTE_STOCK),
+    ("Maximum price in the last quarter", ROUTE_STOCK),
+    ("What is the average price since 2019?", ROUTE_STOCK),
+    ("How has the share price moved this year?", ROUTE_STOCK),
+    ("14-day RSI of the stock", ROUTE_STOCK),
+    # Business questions for the earnings transcripts
+    ("What share of revenue comes from insurance?", ROUTE_RAG),
+    ("How did Bajaj Finserv perform in Q3?", ROUTE_RAG),
+    ("What drove growth in the lending business?", ROUTE_RAG),
+    ("How is Bajaj Allianz General Insurance doing?", ROUTE_RAG),
+    ("What did management say about digital transformation?", ROUTE_RAG),
+    ("What are the key business segments of Bajaj Finserv?", ROUTE_RAG),
+    ("How did the life insurance business grow this year?", ROUTE_RAG),
+    ("What are the investment highlights for Bajaj Finserv?", ROUTE_RAG),
+    ("What partnerships did Bajaj Finserv announce?", ROUTE_RAG),
+    ("What is the market share of Bajaj Finance in consumer loans?", ROUTE_RAG),
+    ("What was the net profit in Q2 FY25?", ROUTE_RAG),
+    ("What is the average loan size?", ROUTE_RAG),
+    ("How many customers does Bajaj Finance have?", ROUTE_RAG),
+    ("What is the dividend per share?", ROUTE_RAG),
+    ("What were the earnings per share this quarter?", ROUTE_RAG),
+    ("What is the shareholding pattern?", ROUTE_RAG),
+    ("What did the CFO say about credit costs?", ROUTE_RAG),
+    ("How did assets under management grow?", ROUTE_RAG),
+    ("What is the gross NPA ratio?", ROUTE_RAG),
+    ("What is the combined ratio of the general insurance business?", ROUTE_RAG),
+    ("What is the outlook for FY26?", ROUTE_RAG),
+    ("What is management's guidance on growth?", ROUTE_RAG),
+    ("How much premium did the life insurer collect?", ROUTE_RAG),
+    ("What share of new loans was digital?", ROUTE_RAG),
+    ("How are the subsidiaries performing?", ROUTE_RAG),
+    ("What was the highest growth segment in Q4?", ROUTE_RAG),
+    ("What is the average ticket size of personal loans?", ROUTE_RAG),
+    ("Which business had the lowest margins?", ROUTE_RAG),
+    ("What are the risks mentioned in the earnings call?", ROUTE_RAG),
+    ("What was the revenue growth in FY24?", ROUTE_RAG),
+    ("Tell me about Bajaj Finserv's strategy", ROUTE_RAG),
+    ("What did the CEO say about the health insurance market?", ROUTE_RAG),
+    ("How did disbursements trend this quarter?", ROUTE_RAG),
+    ("What is the capital adequacy ratio?", ROUTE_RAG),
+    ("What acquisitions were discussed?", ROUTE_RAG),
+    ("How did deposits grow?", ROUTE_RAG),
+    ("What is the claims ratio of Bajaj Allianz?", ROUTE_RAG),
+    ("How many branches were added?", ROUTE_RAG),
+    ("What were the key highlights of the Q1 call?", ROUTE_RAG),
+    ("What is the share of two-wheeler loans in the book?", ROUTE_RAG),
+]
+
+
+def legacy_route(query):
+    """The original substring check from StockAnalyzer.is_stock_query"""
+    stock_keywords = ['stock', 'price', 'highest', 'lowest', 'average', 'trading', 'share']
+    return ROUTE_STOCK if any(word in query.lower() for word in stock_keywords) else ROUTE_RAG
+
+
+def evaluate(name, route, repeats):
+    """Accuracy, misroutes and mean routing latency of one router"""
+    misrouted = []
+    for query, label in LABELLED_QUERIES:
+        predicted = route(query)
+        if predicted != label:
+            misrouted.append({'query': query, 'expected': label, 'predicted': predicted})
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for query, _ in LABELLED_QUERIES:
+            route(query)
+    latency_us = (time.perf_counter() - start) / (repeats * len(LABELLED_QUERIES)) * 1e6
+
+    accuracy = 1 - len(misrouted) / len(LABELLED_QUERIES)
+    print(f"{name:<12} accuracy={accuracy:.1%} ({len(misrouted)} misrouted)  {latency_us:.1f}us per query")
+    for miss in misrouted:
+        print(f"    {miss['expected']:>5} -> {miss['predicted']:<5} {miss['query']}")
+    return {'router': name, 'accuracy': accuracy, 'latency_us': latency_us, 'misrouted': misrouted}
+
+
+def run(args):
+    results = [
+        evaluate('keywords', legacy_route, args.repeats),
+        evaluate('rules', QueryRouter(tickers=['BAJAJFINSV']).route, args.repeats),
+    ]
+
+    if args.classifier:
+        from sentence_transformers import SentenceTransformer
+        from config import EMBEDDINGS_MODEL, ROUTER_CLASSIFIER_MARGIN
+
+        model = SentenceTransformer(EMBEDDINGS_MODEL)
+        embeddings = {}
+
+        def embed_query(query):
+            # Serving reuses the query embedding cache; mirror that here
+            if query not in embeddings:
+                embeddings[query] = model.encode([query])[0]
+            return embeddings[query]
+
+        router = QueryRouter(
+            tickers=['BAJAJFINSV'],
+            embed_query=embed_query,
+            embed_texts=model.encode,
+            margin=ROUTER_CLASSIFIER_MARGIN
+        )
+        results.append(evaluate('classifier', router.route, args.repeats))
+        print(f"decisions: {router.stats()['decisions']}")
+
+    report = {'benchmark': 'router', 'queries': len(LABELLED_QUERIES), 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--classifier', action='store_true',
+                        help='Also evaluate the embedding classifier (loads the embedding model)')
+    parser.add_argument('--repeats', type=int, default=100)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,106 @@
+"""
+Serve the app offline on generated data for load tests
+
+Runs the Flask app (threaded) or the ASGI app (under Hypercorn) from a
+data directory written by benchmarks/datasets.py, with the hashing stub
+embedder in place of the sentence-transformers model and Gemini pointed
+at the stub LLM, so a full load test needs no model download or network.
+Transcripts beyond the four configured files are ingested before the
+server starts. Index and stock stores are kept inside the data
+directory, away from the real stores:
+
+    python -m benchmarks.datasets --out-dir bench_data --transcripts 40
+    python -m benchmarks.stub_llm --latency-ms 800 --jitter-ms 200 &
+    python -m benchmarks.serve --data-dir bench_data --port 5000 &
+    python -m benchmarks.load_test --target sync=http://127.0.0.1:5000 \\
+        --questions-file bench_data/questions.json --concurrency 50 --output load.json
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configure(args):
+    """Point the configuration at the data directory and stub LLM; must run before the app is imported"""
+    data_dir = os.path.abspath(args.data_dir)
+    os.environ['INDEX_STORE_DIR'] = os.path.join(data_dir, '.index_store')
+    os.environ['STOCK_STORE_DIR'] = os.path.join(data_dir, '.stock_store')
+    if os.path.isdir(os.path.join(data_dir, 'prices')):
+        os.environ['STOCK_DATA_DIR'] = os.path.join(data_dir, 'prices')
+    os.environ['GEMINI_API_ENDPOINT'] = args.llm_url
+    os.environ.setdefault('GEMINI_API_KEY', 'stub')
+
+    # The configured transcript and price files are relative to the working directory
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.chdir(data_dir)
+    return data_dir
+
+
+def use_stub_embedder(module, args):
+    """Make the app build its RAG system on the hashing stub embedder"""
+    from benchmarks.stub_embedder import HashEmbedder
+    embedder = HashEmbedder(dimension=args.dim, cost_ms=args.embed_cost_ms)
+
+    class StubEmbeddingRAG(module.SimpleRAG):
+        def __init__(self):
+            super().__init__()
+            self._embeddings_model = embedder
+
+    # load_rag looks the class up in the app module when it runs
+    module.SimpleRAG = StubEmbeddingRAG
+
+
+def load(module, data_dir):
+    """Load the RAG system in the foreground and ingest the extra transcripts"""
+    module.initializer.start(force=True)
+    if not module.initializer.wait():
+        raise RuntimeError(f"the RAG system failed to load: {module.initializer.status()['error']}")
+
+    extra = sorted(glob.glob(os.path.join(data_dir, 'transcripts', '*.txt')))
+    for path in extra:
+        module.rag.ingest_document(os.path.relpath(path, data_dir))
+    print(f"Serving {len(module.rag.chunks)} chunks from {len(module.rag.doc_hashes)} documents")
+
+
+def run(args):
+    data_dir = configure(args)
+
+    if args.server == 'async':
+        import asgi_app as module
+    else:
+        import app as module
+    use_stub_embedder(module, args)
+    load(module, data_dir)
+
+    if args.server == 'async':
+        # Hypercorn is only needed to serve the ASGI app
+        import asyncio
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+        config = Config()
+        config.bind = [f"{args.host}:{args.port}"]
+        asyncio.run(serve(module.app, config))
+    else:
+        module.app.run(host=args.host, port=args.port, threaded=True, debug=False)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default='bench_data')
+    parser.add_argument('--server', choices=['sync', 'async'], default='sync')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--llm-url', default='http://127.0.0.1:8081', help='Base URL of the stub LLM')
+    parser.add_argument('--dim', type=int, default=384, help='Stub embedding dimension')
+    parser.add_argument('--embed-cost-ms', type=float, default=0.0, help='Simulated encoder time per text')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,106 @@
+"""
+Import-time regression benchmark
+
+Imports each module in a fresh interpreter under ``python -X importtime``
+and reports the total import time and the slowest top-level packages,
+the median over ``--repeat`` runs. With ``--check`` it fails when
+importing a module loads one of the heavy packages that are meant to be
+imported on first use (torch, sentence-transformers, Gemini, FAISS,
+pandas), or takes longer than ``--max-seconds``:
+
+    python -m benchmarks.startup --modules app rag_system stock_analyzer --check --output startup.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFERRED_PACKAGES = ('torch', 'sentence_transformers', 'transformers', 'google.generativeai', 'faiss', 'pandas')
+
+
+def import_times(module):
+    """{package: (self seconds, cumulative seconds)} for one fresh import of ``module``"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=PROJECT_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    return times
+
+
+def measure(module, repeat, top):
+    """Median import time of a module, its slowest packages and the deferred packages it loaded"""
+    runs = [import_times(module) for _ in range(repeat)]
+    totals = [run.get(module, (0, 0))[1] for run in runs]
+
+    # Sum self times per top-level package, then take the median across runs
+    packages = {}
+    for i, run in enumerate(runs):
+        for name, (self_seconds, _) in run.items():
+            packages.setdefault(name.partition('.')[0], [0.0] * len(runs))[i] += self_seconds
+    slowest = sorted(((name, float(np.median(values))) for name, values in packages.items()),
+                     key=lambda item: -item[1])[:top]
+
+    loaded = sorted(package for package in DEFERRED_PACKAGES if package in runs[0])
+    return {
+        'module': module,
+        'import_seconds': float(np.median(totals)),
+        'min_seconds': float(min(totals)),
+        'modules_imported': len(runs[0]),
+        'slowest_packages': [{'package': name, 'seconds': seconds} for name, seconds in slowest],
+        'deferred_packages_loaded': loaded
+    }
+
+
+def run(args):
+    results = []
+    failures = []
+    for module in args.modules:
+        result = measure(module, args.repeat, args.top)
+        results.append(result)
+        slowest = ', '.join(f"{entry['package']} {entry['seconds'] * 1000:.0f}ms" for entry in result['slowest_packages'])
+        print(f"{module:<16} {result['import_seconds'] * 1000:7.0f}ms (min {result['min_seconds'] * 1000:.0f}ms, "
+              f"{result['modules_imported']} modules) slowest: {slowest}")
+        if result['deferred_packages_loaded']:
+            print(f"  loads at import: {', '.join(result['deferred_packages_loaded'])}")
+            failures.append(f"{module} imports {', '.join(result['deferred_packages_loaded'])}")
+        if args.max_seconds and result['import_seconds'] > args.max_seconds:
+            failures.append(f"{module} takes {result['import_seconds']:.2f}s to import")
+
+    report = {'benchmark': 'startup', 'python': sys.version.split()[0], 'repeat': args.repeat, 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.check and failures:
+        sys.exit("Import-time check failed: " + '; '.join(failures))
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=['rag_system', 'stock_analyzer', 'app'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5, help='Slowest packages to report per module')
+    parser.add_argument('--check', action='store_true', help='Exit non-zero on a regression')
+    parser.add_argument('--max-seconds', type=float, help='With --check, the longest acceptable import time')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,66 @@
+"""
+Offline stand-in for the sentence-transformers embedding model
+
+HashEmbedder maps each text to the normalised sum of fixed random
+vectors of its tokens, so texts that share words land close together
+and retrieval still finds the chunk holding a question's terms. It
+needs no model download or torch, and can add a configurable per-text
+delay to model the real encoder's cost. Install it on a SimpleRAG in
+place of the lazily loaded model:
+
+    rag._embeddings_model = HashEmbedder()
+"""
+
+import time
+import zlib
+import numpy as np
+from lexical_index import tokenize
+
+
+class HashEmbedder:
+    """Deterministic bag-of-hashed-tokens embeddings with the SentenceTransformer interface"""
+
+    # No tokenizer, so the chunker falls back to its word-count estimate
+    tokenizer = None
+
+    def __init__(self, dimension=384, buckets=1 << 16, cost_ms=0.0, seed=0):
+        self.dimension = dimension
+        self.buckets = buckets
+        self.cost_ms = cost_ms
+        self.seed = seed
+        self._rows = {}
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def _token_vector(self, token):
+        bucket = zlib.crc32(token.encode('utf-8')) % self.buckets
+        row = self._rows.get(bucket)
+        if row is None:
+            row = np.random.default_rng((self.seed, bucket)).standard_normal(self.dimension).astype('float32')
+            self._rows[bucket] = row
+        return row
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if self.cost_ms:
+            time.sleep(self.cost_ms * len(texts) / 1000)
+
+        embeddings = np.zeros((len(texts), self.dimension), dtype='float32')
+        for i, text in enumerate(texts):
+            for token in tokenize(text):
+                embeddings[i] += self._token_vector(token)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings /= np.where(norms > 0, norms, 1)
+        return embeddings[0] if single else embeddings
+
+    # The embedding pipeline's process pool interface, run in-process
+    def start_multi_process_pool(self, target_devices=None):
+        return None
+
+    def stop_multi_process_pool(self, pool):
+        pass
+
+    def encode_multi_process(self, sentences, pool, batch_size=32, **kwargs):
+        return self.encode(sentences, batch_size=batch_size)
@@ -0,0 +1,163 @@
+"""
+Local stub of the Gemini REST API for offline load tests
+
+Answers ``generateContent`` and ``streamGenerateContent`` after a
+configurable delay with optional jitter, so the serving stack can be
+benchmarked without network access or API quota. Point the app at it with
+GEMINI_API_ENDPOINT:
+
+    python -m benchmarks.stub_llm --port 8081 --latency-ms 800 --jitter-ms 200
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8081 hypercorn asgi_app:app
+"""
+
+import argparse
+import asyncio
+import json
+import random
+
+
+STUB_ANSWER = (
+    "Bajaj Finserv reported steady growth across lending and insurance this quarter, "
+    "with assets under management rising and the general insurance combined ratio improving."
+)
+
+
+def candidate(text, finished=True):
+    """One Gemini response payload carrying ``text``"""
+    payload = {
+        'candidates': [{
+            'content': {'role': 'model', 'parts': [{'text': text}]},
+            'index': 0
+        }]
+    }
+    if finished:
+        payload['candidates'][0]['finishReason'] = 'STOP'
+    return payload
+
+
+class StubGeminiServer:
+    """Minimal HTTP/1.1 server speaking just enough of the Gemini REST API"""
+
+    def __init__(self, latency_ms, jitter_ms, stream_chunks, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.stream_chunks = max(1, stream_chunks)
+        self.random = random.Random(seed)
+        self.requests = 0
+
+    def _delay(self):
+        """Seconds to wait before answering, with uniform jitter"""
+        jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    async def handle(self, reader, writer):
+        """Serve requests on one keep-alive connection"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length:
+                    await reader.readexactly(length)
+
+                self.requests += 1
+                await self._respond(method, target, writer)
+                await writer.drain()
+
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, target, writer):
+        if method != 'POST' or ':' not in target.split('?')[0]:
+            self._write(writer, 404, 'application/json', b'{"error": "not found"}')
+            return
+
+        if ':streamGenerateContent' in target:
+            await self._stream(target, writer)
+            return
+
+        await asyncio.sleep(self._delay())
+        body = json.dumps(candidate(STUB_ANSWER)).encode('utf-8')
+        self._write(writer, 200, 'application/json', body)
+
+    async def _stream(self, target, writer):
+        """Stream the answer in pieces, as SSE or as a chunked JSON array"""
+        words = STUB_ANSWER.split(' ')
+        size = -(-len(words) // self.stream_chunks)
+        pieces = [' '.join(words[i:i + size]) + ' ' for i in range(0, len(words), size)]
+        sse = 'alt=sse' in target
+
+        writer.write(
+            b'HTTP/1.1 200 OK\r\n'
+            + (b'Content-Type: text/event-stream\r\n' if sse else b'Content-Type: application/json\r\n')
+            + b'Transfer-Encoding: chunked\r\n\r\n'
+        )
+
+        # Time to first token carries most of the latency, the rest is spread out
+        delay = self._delay()
+        await asyncio.sleep(delay * 0.5)
+        for position, piece in enumerate(pieces):
+            payload = json.dumps(candidate(piece, finished=position == len(pieces) - 1))
+            if sse:
+                data = f"data: {payload}\r\n\r\n"
+            else:
+                data = ('[' if position == 0 else ',') + payload + (']' if position == len(pieces) - 1 else '')
+            self._write_chunk(writer, data.encode('utf-8'))
+            await writer.drain()
+            if position < len(pieces) - 1:
+                await asyncio.sleep(delay * 0.5 / len(pieces))
+        writer.write(b'0\r\n\r\n')
+
+    @staticmethod
+    def _write(writer, status, content_type, body):
+        reason = 'OK' if status == 200 else 'Not Found'
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+        )
+
+    @staticmethod
+    def _write_chunk(writer, data):
+        writer.write(f"{len(data):x}\r\n".encode('latin-1') + data + b'\r\n')
+
+
+async def serve(args):
+    stub = StubGeminiServer(args.latency_ms, args.jitter_ms, args.stream_chunks, args.seed)
+    server = await asyncio.start_server(stub.handle, args.host, args.port, backlog=4096)
+    print(f"Stub Gemini server on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms}ms ± {args.jitter_ms}ms)")
+    async with server:
+        await server.serve_forever()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=800)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--stream-chunks', type=int, default=8)
+    parser.add_argument('--seed', type=int)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,175 @@
+"""
+Per-worker memory of a multi-worker Gunicorn deployment
+
+Starts ``gunicorn app:app`` with and without PRELOAD_APP, waits until
+every worker has passed the readiness gate, sends a few questions so
+the workers touch the model and index pages, and reports RSS, PSS
+(proportional set size: shared pages divided among the processes
+mapping them) and USS (unique set size: pages only that process holds)
+for the master and each worker from /proc/<pid>/smaps_rollup. USS is
+what each additional worker really costs. Linux only. Run it against
+the stub LLM to keep Gemini out of the picture:
+
+    python -m benchmarks.stub_llm --latency-ms 50 &
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8081 python -m benchmarks.worker_memory --workers 4
+
+or inspect a running master with ``--pid <master pid>``.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+
+QUESTIONS = [
+    "How did Bajaj Finserv perform in Q3?",
+    "What drove growth in the lending business?",
+    "How is Bajaj Allianz General Insurance doing?",
+    "What are the key business segments of Bajaj Finserv?",
+]
+
+
+def process_memory(pid):
+    """RSS, PSS, USS and shared bytes of a process"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup", 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)
+    }
+
+
+def child_pids(pid):
+    """Pids of a process's direct children"""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r', encoding='utf-8') as f:
+                # The command name may contain spaces; the parent pid follows its closing parenthesis
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def measure_master(pid):
+    """Memory of a Gunicorn master and each of its workers"""
+    workers = []
+    for worker_pid in child_pids(pid):
+        try:
+            workers.append(dict(process_memory(worker_pid), pid=worker_pid))
+        except OSError:
+            continue
+    return {'master': dict(process_memory(pid), pid=pid), 'workers': workers}
+
+
+def send_questions(url, count):
+    """Post questions to the query API, ignoring failed answers"""
+    for i in range(count):
+        body = json.dumps({'query': QUESTIONS[i % len(QUESTIONS)]}).encode('utf-8')
+        request = urllib.request.Request(f"{url}/api/query", data=body, headers={'Content-Type': 'application/json'})
+        try:
+            urllib.request.urlopen(request, timeout=60).read()
+        except (urllib.error.URLError, OSError) as e:
+            print(f"  query failed: {e}")
+
+
+def run_server(preload, args):
+    """Start Gunicorn, wait for every worker to be ready and measure it"""
+    env = dict(os.environ, PRELOAD_APP='true' if preload else 'false', WEB_CONCURRENCY=str(args.workers))
+    with tempfile.NamedTemporaryFile('w+', suffix='.log') as log:
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', f"127.0.0.1:{args.port}"],
+            env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+        try:
+            started = time.perf_counter()
+            ready = 0
+            while ready < args.workers:
+                if server.poll() is not None:
+                    log.seek(0)
+                    raise RuntimeError(f"gunicorn exited with {server.returncode}:\n{log.read()[-2000:]}")
+                if time.perf_counter() - started > args.timeout:
+                    raise RuntimeError("timed out waiting for the workers to become ready")
+                time.sleep(0.5)
+                log.seek(0)
+                # post_worker_init in gunicorn.conf.py logs each worker passing the readiness gate
+                ready = sum(1 for line in log if 'ready' in line and 'Worker' in line)
+            ready_seconds = time.perf_counter() - started
+
+            send_questions(f"http://127.0.0.1:{args.port}", args.requests)
+            time.sleep(1)
+            report = measure_master(server.pid)
+            report['ready_seconds'] = ready_seconds
+            return report
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+
+def summarize(name, report):
+    """Print one deployment's memory and return its per-worker totals"""
+    workers = report['workers']
+    mib = 2 ** 20
+    print(f"{name}: master rss={report['master']['rss'] / mib:.0f}MB uss={report['master']['uss'] / mib:.0f}MB")
+    for worker in workers:
+        print(f"  worker {worker['pid']}: rss={worker['rss'] / mib:.0f}MB pss={worker['pss'] / mib:.0f}MB "
+              f"uss={worker['uss'] / mib:.0f}MB shared={worker['shared'] / mib:.0f}MB")
+    totals = {
+        'mean_worker_uss': sum(worker['uss'] for worker in workers) / len(workers) if workers else 0,
+        'mean_worker_pss': sum(worker['pss'] for worker in workers) / len(workers) if workers else 0,
+        'total_pss': report['master']['pss'] + sum(worker['pss'] for worker in workers)
+    }
+    print(f"  mean worker uss={totals['mean_worker_uss'] / mib:.0f}MB pss={totals['mean_worker_pss'] / mib:.0f}MB, "
+          f"total pss={totals['total_pss'] / mib:.0f}MB"
+          + (f", ready after {report['ready_seconds']:.1f}s" if 'ready_seconds' in report else ''))
+    report.update(totals)
+    return report
+
+
+def run(args):
+    if args.pid:
+        results = {'running': summarize(f"pid {args.pid}", measure_master(args.pid))}
+    else:
+        results = {}
+        for mode in args.modes:
+            results[mode] = summarize(mode, run_server(mode == 'preload', args))
+
+    report = {'benchmark': 'worker_memory', 'workers': args.workers, 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--modes', nargs='+', choices=['preload', 'per-worker'], default=['preload', 'per-worker'])
+    parser.add_argument('--requests', type=int, default=20, help='Questions sent before measuring')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--timeout', type=float, default=600, help='Seconds to wait for the workers')
+    parser.add_argument('--pid', type=int, help='Measure this running Gunicorn master instead of starting one')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
@@ -0,0 +1,219 @@
+"""
+Caches for FinSage Pro
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_query(query):
+    """Canonical form of a user question used as a cache key"""
+    query = re.sub(r'\s+', ' ', query.strip().lower())
+    return query.rstrip('?!. ')
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a size limit and optional TTL in seconds.
+
+    Keeps hit, miss, eviction and expiration counters for monitoring.
+    """
+
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default on a miss"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries when full"""
+        if self.maxsize <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Counters and hit rate for monitoring endpoints"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class SQLiteCache:
+    """LRU cache stored in a SQLite file so several worker processes share it.
+
+    Values must be JSON-serialisable. Offers the same interface and
+    counters as ``LRUCache``; the counters are per process.
+    """
+
+    def __init__(self, path, maxsize, ttl=None):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'expires_at REAL, accessed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)')
+
+    def _connection(self):
+        """One connection per thread and process; SQLite connections cannot be shared"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default on a miss"""
+        try:
+            conn = self._connection()
+            row = conn.execute('SELECT value, expires_at FROM cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self._count('misses')
+                return default
+
+            value, expires_at = row
+            now = time.time()
+            with conn:
+                if expires_at is not None and expires_at <= now:
+                    conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+                    self._count('expirations')
+                    self._count('misses')
+                    return default
+                conn.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+
+            self._count('hits')
+            return json.loads(value)
+        except sqlite3.Error as e:
+            print(f"Error reading SQLite cache: {e}")
+            self._count('misses')
+            return default
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries when full"""
+        if self.maxsize <= 0:
+            return
+
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                    (key, json.dumps(value), expires_at, now)
+                )
+                excess = conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0] - self.maxsize
+                if excess > 0:
+                    conn.execute(
+                        'DELETE FROM cache WHERE key IN '
+                        '(SELECT key FROM cache ORDER BY accessed_at LIMIT ?)',
+                        (excess,)
+                    )
+                    with self._lock:
+                        self.evictions += excess
+        except sqlite3.Error as e:
+            print(f"Error writing SQLite cache: {e}")
+
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._connection() as conn:
+            conn.execute('DELETE FROM cache')
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def stats(self):
+        """Counters and hit rate for monitoring endpoints"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            counters = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+        try:
+            size = len(self)
+        except sqlite3.Error:
+            size = None
+        return dict(counters, size=size, maxsize=self.maxsize, ttl=self.ttl, path=self.path)
+
+
+def create_cache(backend, maxsize, ttl=None, path=None):
+    """Build a cache for the configured backend: 'memory', 'sqlite' or 'none'"""
+    if backend == 'memory':
+        return LRUCache(maxsize, ttl)
+    if backend == 'sqlite':
+        return SQLiteCache(path, maxsize, ttl)
+    if backend == 'none':
+        return None
+    raise ValueError(f"Unknown cache backend {backend!r}")
@@ -0,0 +1,148 @@
+"""
+Memory-mapped chunk storage for FinSage Pro
+"""
+
+import os
+import numpy as np
+
+
+TEXT_FILE = 'chunks.bin'
+OFFSETS_FILE = 'chunk_offsets.npy'
+
+
+def write_chunk_texts(directory, chunks, suffix=''):
+    """Write chunk texts as one UTF-8 blob and an int64 array of byte offsets.
+
+    Files are written under ``suffix`` and returned as (path, final path)
+    pairs so the caller can move them into place atomically.
+    """
+    encoded = [chunk.encode('utf-8') for chunk in chunks]
+    offsets = np.zeros(len(encoded) + 1, dtype='int64')
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+
+    text_path = os.path.join(directory, TEXT_FILE)
+    with open(text_path + suffix, 'wb') as f:
+        for data in encoded:
+            f.write(data)
+    offsets_path = os.path.join(directory, OFFSETS_FILE)
+    with open(offsets_path + suffix, 'wb') as f:
+        np.save(f, offsets)
+    return [(text_path + suffix, text_path), (offsets_path + suffix, offsets_path)]
+
+
+class ChunkTexts:
+    """Read-only sequence of chunk texts backed by a memory-mapped blob.
+
+    Only the offsets array and the pages of chunks actually read are
+    brought into memory, and they live in the OS page cache, shared by
+    every worker process, instead of in each worker's Python heap.
+    """
+
+    def __init__(self, directory):
+        self._offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode='r')
+        text_path = os.path.join(directory, TEXT_FILE)
+        # Zero-length files cannot be mapped
+        if os.path.getsize(text_path):
+            self._blob = np.memmap(text_path, dtype='uint8', mode='r')
+        else:
+            self._blob = np.empty(0, dtype='uint8')
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row):
+        if not -len(self) <= row < len(self):
+            raise IndexError(row)
+        row %= len(self)
+        return self._blob[self._offsets[row]:self._offsets[row + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+
+class ChunkTable:
+    """Chunk ids mapped to their text, metadata and embedding rows.
+
+    Chunks are held as one block per source document: its chunk ids,
+    texts, (start, end) character spans and embeddings, where texts and
+    embeddings are normally memory-mapped from the index store. Lookups
+    go through one sorted id array instead of a Python object per chunk,
+    so the per-process heap cost is 16 bytes per chunk. Tables are
+    immutable; ``replace`` returns a new table with one document swapped.
+    """
+
+    def __init__(self, blocks=()):
+        self.blocks = list(blocks)
+        if self.blocks:
+            ids = np.concatenate([np.asarray(block['ids'], dtype='int64') for block in self.blocks])
+            block_of = np.repeat(np.arange(len(self.blocks), dtype='int32'),
+                                 [len(block['ids']) for block in self.blocks])
+            row_of = np.concatenate([np.arange(len(block['ids']), dtype='int32') for block in self.blocks])
+        else:
+            ids = np.empty(0, dtype='int64')
+            block_of = row_of = np.empty(0, dtype='int32')
+
+        order = np.argsort(ids, kind='stable')
+        self._ids = ids[order]
+        self._block = block_of[order]
+        self._row = row_of[order]
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _locate(self, chunk_id):
+        """(block, row) of a chunk id, or None"""
+        position = int(np.searchsorted(self._ids, chunk_id))
+        if position < len(self._ids) and self._ids[position] == chunk_id:
+            return self.blocks[self._block[position]], int(self._row[position])
+        return None
+
+    def __contains__(self, chunk_id):
+        return self._locate(chunk_id) is not None
+
+    def text(self, chunk_id):
+        block, row = self._locate(chunk_id)
+        return block['texts'][row]
+
+    def metadata(self, chunk_id):
+        block, row = self._locate(chunk_id)
+        start, end = block['spans'][row]
+        return {'source': block['source'], 'type': block['type'], 'start': int(start), 'end': int(end)}
+
+    def vectors(self, chunk_ids):
+        """Float32 embeddings of the given chunk ids; rows of unknown ids are NaN"""
+        chunk_ids = np.asarray(chunk_ids, dtype='int64')
+        dimension = self.blocks[0]['embeddings'].shape[1] if self.blocks else 0
+        result = np.full((len(chunk_ids), dimension), np.nan, dtype='float32')
+
+        positions = np.minimum(np.searchsorted(self._ids, chunk_ids), max(len(self._ids) - 1, 0))
+        found = (self._ids[positions] == chunk_ids) if len(self._ids) else np.zeros(len(chunk_ids), dtype=bool)
+        for block_id in np.unique(self._block[positions[found]]):
+            mask = found & (self._block[positions] == block_id)
+            rows = self._row[positions[mask]]
+            order = np.argsort(rows)
+            # Read memory-mapped rows in file order, then put them back in query order
+            block_rows = np.asarray(self.blocks[block_id]['embeddings'][rows[order]], dtype='float32')
+            result[np.flatnonzero(mask)[order]] = block_rows
+        return result
+
+    def source_ids(self, source):
+        """Chunk ids of one source document, or None if it is not in the table"""
+        for block in self.blocks:
+            if block['source'] == source:
+                return np.asarray(block['ids'], dtype='int64')
+        return None
+
+    def items(self):
+        """(chunk id, text) pairs in document order"""
+        for block in self.blocks:
+            for chunk_id, text in zip(block['ids'], block['texts']):
+                yield int(chunk_id), text
+
+    def replace(self, source, block=None):
+        """New table without ``source``'s chunks, plus ``block`` when given"""
+        blocks = [existing for existing in self.blocks if existing['source'] != source]
+        if block is not None:
+            blocks.append(block)
+        return ChunkTable(blocks)
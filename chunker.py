@@ -0,0 +1,173 @@
+"""
+Document chunking for FinSage Pro
+"""
+
+import hashlib
+import re
+import numpy as np
+
+
+# A line opening with a short capitalised name and a colon starts a speaker turn
+# ("Moderator:", "Sanjiv Bajaj:", "S. Sreenivasan - CFO:")
+SPEAKER_PATTERN = re.compile(
+    r"^[ \t]*(?P<speaker>[A-Z][\w.'&-]*(?:[ \t]+[A-Z][\w.'&-]*){0,4}(?:[ \t]*[-–—,][ \t]*[^:\n]{1,60})?)[ \t]*:",
+    re.MULTILINE
+)
+PARAGRAPH_PATTERN = re.compile(r'\n[ \t]*\n\s*')
+SENTENCE_END_PATTERN = re.compile(r'[.!?]["\')\]]*\s+(?=["\'(\[]?[A-Z0-9₹])')
+
+# Words whose trailing full stop does not end a sentence
+ABBREVIATIONS = frozenset([
+    'rs', 'mr', 'mrs', 'ms', 'dr', 'no', 'nos', 'vs', 'approx', 'inc', 'ltd', 'co', 'corp', 'st',
+    'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec', 'e.g', 'i.e', 'etc'
+])
+
+SHINGLE_SIZE = 3
+
+
+def fixed_chunks(text, size, overlap, min_length):
+    """Fixed-width character windows as (start, end) offsets of their stripped text"""
+    spans = []
+    for i in range(0, len(text), size - overlap):
+        window = text[i:i + size]
+        stripped = window.strip()
+        if len(stripped) > min_length:
+            start = i + len(window) - len(window.lstrip())
+            spans.append((start, start + len(stripped)))
+    return spans
+
+
+def _strip_span(text, start, end):
+    """Shrink [start, end) so it excludes surrounding whitespace"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def split_blocks(text):
+    """Speaker turns and paragraphs as (start, end, is_turn) spans"""
+    boundaries = {0: False}
+    for m in PARAGRAPH_PATTERN.finditer(text):
+        boundaries.setdefault(m.end(), False)
+    for m in SPEAKER_PATTERN.finditer(text):
+        boundaries[m.start('speaker')] = True
+
+    positions = sorted(boundaries) + [len(text)]
+    blocks = []
+    for block_start, block_end in zip(positions, positions[1:]):
+        start, end = _strip_span(text, block_start, block_end)
+        if start < end:
+            blocks.append((start, end, boundaries[block_start]))
+    return blocks
+
+
+def split_sentences(text, start, end):
+    """Sentence spans inside text[start:end]"""
+    spans = []
+    sentence_start = start
+    for m in SENTENCE_END_PATTERN.finditer(text, start, end):
+        word = text[sentence_start:m.start()].rsplit(None, 1)[-1].lower().rstrip('.') if m.start() > sentence_start else ''
+        if word in ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+            continue
+        spans.append(_strip_span(text, sentence_start, m.end()))
+        sentence_start = m.end()
+    spans.append(_strip_span(text, sentence_start, end))
+    return [span for span in spans if span[0] < span[1]]
+
+
+def simhash(text):
+    """64-bit SimHash of a text's word shingles"""
+    words = text.lower().split()
+    shingles = [' '.join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))]
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big') for s in shingles],
+        dtype='uint64'
+    )
+    bits = np.unpackbits(hashes.view('>u8').view('uint8').reshape(-1, 8), axis=1)
+    votes = bits.sum(axis=0, dtype='int64') * 2 - len(hashes)
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), 'big')
+
+
+class Chunker:
+    """Split documents on their own structure, sized by tokenizer tokens.
+
+    Text is cut into speaker turns and paragraphs, then sentences, and
+    sentences are packed into chunks of at most ``chunk_tokens`` tokens of
+    the embedding model's tokenizer, so nothing is silently truncated at
+    embedding time and no sentence or figure is cut in half. A speaker
+    turn starts a new chunk once the current one is half full. Only
+    blocks too long for one chunk carry ``overlap_sentences`` sentences
+    into the next. Chunks within ``dedup_distance`` bits of an earlier
+    chunk's SimHash are dropped as near-duplicates.
+    """
+
+    def __init__(self, tokenizer=None, chunk_tokens=200, overlap_sentences=1, min_length=50, dedup_distance=3):
+        self.tokenizer = tokenizer
+        self.chunk_tokens = chunk_tokens
+        self.overlap_sentences = overlap_sentences
+        self.min_length = min_length
+        self.dedup_distance = dedup_distance
+
+    def count_tokens(self, texts):
+        """Token counts without special tokens; about 1.3 tokens per word without a tokenizer"""
+        if not texts:
+            return []
+        if self.tokenizer is None:
+            return [int(len(text.split()) * 1.3) + 1 for text in texts]
+        encoded = self.tokenizer(texts, add_special_tokens=False)['input_ids']
+        return [len(ids) for ids in encoded]
+
+    def split(self, text):
+        """(start, end) character offsets of the chunks of a text"""
+        blocks = split_blocks(text)
+        sentences = [(sentence, is_turn and i == 0, block)
+                     for block, (start, end, is_turn) in enumerate(blocks)
+                     for i, sentence in enumerate(split_sentences(text, start, end))]
+        counts = self.count_tokens([text[start:end] for (start, end), _, _ in sentences])
+
+        spans = []
+        current = []
+        current_tokens = 0
+        for ((start, end), turn_start, block), tokens in zip(sentences, counts):
+            if current and (
+                    current_tokens + tokens > self.chunk_tokens
+                    or (turn_start and current_tokens >= self.chunk_tokens // 2)):
+                spans.append((current[0][0], current[-1][1]))
+                # Carry context only when the break falls inside a block
+                carried = [s for s in current[-self.overlap_sentences:] if s[3] == block] if self.overlap_sentences else []
+                if sum(s[2] for s in carried) + tokens > self.chunk_tokens:
+                    carried = []
+                current = carried
+                current_tokens = sum(s[2] for s in carried)
+            if tokens > self.chunk_tokens:
+                # A single over-long sentence is split at word boundaries
+                spans.extend(self._split_long(text, start, end, tokens))
+                current, current_tokens = [], 0
+                continue
+            current.append((start, end, tokens, block))
+            current_tokens += tokens
+        if current:
+            spans.append((current[0][0], current[-1][1]))
+
+        return [span for span in spans if span[1] - span[0] > self.min_length]
+
+    def _split_long(self, text, start, end, tokens):
+        """Word-boundary pieces of a sentence longer than one chunk"""
+        words = [(m.start(), m.end()) for m in re.finditer(r'\S+', text[start:end])]
+        per_piece = max(1, int(len(words) * self.chunk_tokens / tokens))
+        return [(start + piece[0][0], start + piece[-1][1])
+                for piece in (words[i:i + per_piece] for i in range(0, len(words), per_piece))]
+
+    def deduplicate(self, texts):
+        """Positions of the texts to keep, dropping near-duplicates of earlier texts"""
+        keep = []
+        fingerprints = []
+        for position, text in enumerate(texts):
+            fingerprint = simhash(text)
+            if any(bin(fingerprint ^ kept).count('1') <= self.dedup_distance for kept in fingerprints):
+                continue
+            fingerprints.append(fingerprint)
+            keep.append(position)
+        return keep
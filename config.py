@@ -6,6 +6,9 @@ import os
 
 # API Configuration
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "your_gemini_api_key")
+# Alternative Gemini REST endpoint, e.g. the local benchmark stub
+GEMINI_API_ENDPOINT = os.environ.get("GEMINI_API_ENDPOINT", "")
+GEMINI_TIMEOUT = 60
 
 # Model Configuration
 EMBEDDINGS_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
@@ -26,6 +29,165 @@ CHUNK_OVERLAP = 200
 MIN_CHUNK_LENGTH = 50
 DEFAULT_SEARCH_RESULTS = 3
 
+# Chunking Configuration
+# CHUNKER is 'structured' (split on speaker turns, paragraphs and sentences,
+# sized in embedding tokenizer tokens, near-duplicates dropped) or 'fixed'
+# (CHUNK_SIZE character windows overlapping by CHUNK_OVERLAP)
+CHUNKER = 'structured'
+CHUNK_TOKENS = 240
+CHUNK_OVERLAP_SENTENCES = 1
+# Maximum SimHash Hamming distance (of 64 bits) for a chunk to count as a near-duplicate
+CHUNK_DEDUP_DISTANCE = 3
+
+# Query Embedding Cache Configuration (TTL in seconds, None to never expire)
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_TTL = None
+
+# Answer Cache Configuration
+# ANSWER_CACHE_BACKEND is 'memory' (per process), 'sqlite' (shared between
+# workers through ANSWER_CACHE_PATH) or 'none'
+ANSWER_CACHE_BACKEND = os.environ.get("ANSWER_CACHE_BACKEND", "memory")
+ANSWER_CACHE_SIZE = 512
+ANSWER_CACHE_TTL = 24 * 60 * 60
+ANSWER_CACHE_PATH = os.environ.get("ANSWER_CACHE_PATH", ".answer_cache.sqlite")
+
+# Semantic Answer Cache Configuration (cosine similarity threshold in [0, 1])
+SEMANTIC_CACHE_ENABLED = True
+SEMANTIC_CACHE_SIZE = 1024
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_TTL = 24 * 60 * 60
+
+# Embedding Pipeline Configuration
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_WORKERS = int(os.environ.get("EMBEDDING_WORKERS", "1"))
+INDEX_ADD_BATCH = 10000
+
+# Vector Index Configuration
+# INDEX_TYPE is one of 'flat', 'sq8', 'ivf_flat', 'ivf_pq', 'hnsw' or 'binary';
+# small corpora that cannot train the configured type fall back to 'flat'.
+# 'sq8' stores one byte per dimension (4x smaller than 'flat'); 'binary' stores
+# one bit (32x smaller) and re-scores BINARY_RESCORE_FACTOR * k Hamming
+# candidates with the memory-mapped float embeddings
+INDEX_TYPE = os.environ.get("INDEX_TYPE", "flat")
+IVF_NLIST = 1024
+IVF_NPROBE = 16
+PQ_M = 48
+PQ_NBITS = 8
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+INDEX_TRAINING_SAMPLE = 100000
+BINARY_RESCORE_FACTOR = 10
+# HNSW cannot delete vectors, so replaced and deleted documents leave stale
+# vectors that searches over-fetch past; once they exceed this fraction of the
+# live chunks the index is rebuilt in the background
+INDEX_COMPACT_STALE_FRACTION = 0.2
+
+# Hybrid Search Configuration
+# Dense and BM25 keyword results are merged by reciprocal rank fusion: each
+# retriever adds weight / (RRF_K + rank) for the top HYBRID_CANDIDATES chunks
+# it returns. A weight of 0 turns that retriever off.
+HYBRID_SEARCH_ENABLED = True
+HYBRID_CANDIDATES = 20
+DENSE_WEIGHT = 1.0
+BM25_WEIGHT = 1.0
+RRF_K = 60
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Reranking Configuration
+# When enabled, RERANK_CANDIDATES chunks are retrieved and rescored by a CPU
+# cross-encoder; the best ones scoring at least RERANK_MIN_SCORE are kept
+# until CONTEXT_TOKEN_BUDGET tokens are used
+RERANK_ENABLED = os.environ.get("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+RERANK_CANDIDATES = 50
+RERANK_BATCH_SIZE = 32
+RERANK_MIN_SCORE = 0.0
+RERANK_CACHE_SIZE = 4096
+
+# Prompt Context Configuration
+# Retrieved chunks are merged where they overlap, whitespace is collapsed and,
+# when CONTEXT_EXTRACT_SENTENCES is set, only sentences sharing a word with the
+# question are kept with CONTEXT_SENTENCE_WINDOW neighbours on each side. The
+# context never exceeds CONTEXT_TOKEN_BUDGET embedding-tokenizer tokens.
+CONTEXT_TOKEN_BUDGET = 600
+CONTEXT_EXTRACT_SENTENCES = True
+CONTEXT_SENTENCE_WINDOW = 1
+
+# Admin API Configuration (admin endpoints are disabled when no token is set)
+ADMIN_API_TOKEN = os.environ.get("ADMIN_API_TOKEN", "")
+# Documents ingested or deleted through one worker reach the other workers,
+# which check the index store for changes at most every INGEST_SYNC_INTERVAL seconds
+INGEST_SYNC_INTERVAL = 5
+# Ingestion requests without content may only read files inside this directory
+INGEST_DATA_DIR = os.environ.get("INGEST_DATA_DIR", ".")
+
+# Index Store Configuration
+INDEX_STORE_DIR = os.environ.get("INDEX_STORE_DIR", ".index_store")
+
+# Stock Store Configuration
+# Price CSVs are converted into memory-mapped columns under STOCK_STORE_DIR.
+# Every <TICKER>.csv in STOCK_DATA_DIR is imported alongside STOCK_DATA_FILE,
+# which is served as DEFAULT_TICKER, when the RAG system loads; stock
+# questions naming a stored ticker are answered from that ticker's prices.
+STOCK_STORE_DIR = os.environ.get("STOCK_STORE_DIR", ".stock_store")
+STOCK_DATA_DIR = os.environ.get("STOCK_DATA_DIR", "")
+DEFAULT_TICKER = 'BAJAJFINSV'
+
+# Query Router Configuration
+# Questions the keyword rules cannot settle are classified by embedding
+# similarity to labelled examples; the winning route must lead by the margin
+ROUTER_CLASSIFIER_ENABLED = True
+ROUTER_CLASSIFIER_MARGIN = 0.05
+
+# Startup Configuration
+# The RAG system loads in the background; until it is ready query requests get
+# a 503 with Retry-After: INIT_RETRY_AFTER seconds. A failed load is retried
+# by the next request after INIT_RETRY_INTERVAL seconds. Warm-up runs
+# WARM_UP_QUERIES through encoding, search and reranking, and WARM_UP_STOCK_QUERY
+# through date parsing and the price aggregates, before the first request.
+INIT_RETRY_AFTER = 5
+INIT_RETRY_INTERVAL = 30
+WARM_UP_ENABLED = os.environ.get("WARM_UP_ENABLED", "true").lower() == "true"
+WARM_UP_QUERIES = [
+    "How did Bajaj Finserv perform this quarter?",
+    "What drove growth in the lending business?",
+    "How is Bajaj Allianz General Insurance doing?",
+    "What did management say about digital transformation?"
+]
+WARM_UP_STOCK_QUERY = "What was the average stock price in the last 6 months?"
+# Print how long each startup phase and top-level import took once the system
+# is ready (also enabled by running the app with --profile-startup)
+STARTUP_PROFILE = os.environ.get("STARTUP_PROFILE", "false").lower() == "true"
+
+# Observability Configuration
+# Pipeline stage latencies, prompt tokens, LLM errors and cache counters are
+# exported per process on /metrics in Prometheus text format. TRACE_TIMINGS
+# adds a per-stage ``timings`` object (milliseconds) to query responses.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+TRACE_TIMINGS = os.environ.get("TRACE_TIMINGS", "false").lower() == "true"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROMPT_TOKEN_BUCKETS = (64, 128, 256, 512, 768, 1024, 1536, 2048, 4096)
+
+# Multi-worker Serving Configuration (gunicorn.conf.py)
+# With PRELOAD_APP the model, indexes and stock store are loaded once in the
+# Gunicorn master and shared with the forked workers; otherwise every worker
+# loads its own copy in the background and answers 503 until it is ready
+PRELOAD_APP = os.environ.get("PRELOAD_APP", "true").lower() == "true"
+SERVER_BIND = os.environ.get("SERVER_BIND", "0.0.0.0:5000")
+SERVER_WORKERS = int(os.environ.get("WEB_CONCURRENCY", "2"))
+SERVER_THREADS = 8
+SERVER_TIMEOUT = 120
+
+# Async Serving Configuration
+ASYNC_EXECUTOR_WORKERS = 8
+ASYNC_MAX_CONNECTIONS = 200
+
+# Batch Query Configuration
+BATCH_MAX_QUERIES = 500
+BATCH_LLM_CONCURRENCY = 8
+
 # Flask Configuration
 DEBUG_MODE = True
 TEMPLATES_DIR = 'templates'
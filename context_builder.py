@@ -0,0 +1,146 @@
+"""
+Prompt context assembly for FinSage Pro
+"""
+
+import re
+import threading
+from chunker import split_sentences
+from lexical_index import tokenize
+
+
+# Chunks at most this many characters apart, such as neighbouring paragraphs, are merged
+MERGE_GAP = 4
+
+# Question words that say nothing about which sentences are relevant
+QUESTION_WORDS = frozenset(
+    'what which who whom how when where why did does do can could would should tell me about say said give show '
+    'please bajaj finserv'.split()
+)
+
+
+def compact_whitespace(text):
+    """Collapse runs of spaces and blank lines, which cost tokens but carry no meaning"""
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r' ?\n[ \n]*', '\n', text)
+    return text.strip()
+
+
+def _join_spans(first, second):
+    """Text covering two spans of one source, with any gap between them filled by spaces"""
+    start, end = min(first['start'], second['start']), max(first['end'], second['end'])
+    text = [' '] * (end - start)
+    for span in (first, second):
+        text[span['start'] - start:span['end'] - start] = span['content']
+    return ''.join(text), start, end
+
+
+def merge_passages(docs):
+    """Merge retrieved chunks that overlap or touch in the same source.
+
+    Chunks whose ``start``/``end`` offsets lie within ``MERGE_GAP``
+    characters of each other are joined along their shared text; chunks
+    without offsets pass through unchanged. Passages keep the rank of
+    their best chunk.
+    """
+    passages = []
+    by_source = {}
+    for doc in docs:
+        meta = doc.get('metadata', {})
+        start, end = meta.get('start'), meta.get('end')
+        if start is None or end is None or end - start != len(doc['content']):
+            passages.append({'content': doc['content'], 'source': meta.get('source')})
+            continue
+
+        span = {'content': doc['content'], 'source': meta['source'], 'start': start, 'end': end}
+        for passage in by_source.get(meta['source'], []):
+            if start <= passage['end'] + MERGE_GAP and end >= passage['start'] - MERGE_GAP:
+                passage['content'], passage['start'], passage['end'] = _join_spans(passage, span)
+                break
+        else:
+            by_source.setdefault(meta['source'], []).append(span)
+            passages.append(span)
+    return passages
+
+
+class ContextBuilder:
+    """Turn retrieved chunks into a compact, budgeted prompt context.
+
+    Overlapping chunks of the same source are merged, whitespace is
+    collapsed and, within each passage, only sentences sharing a word with
+    the question are kept together with ``sentence_window`` neighbours on
+    either side; passages without such sentences are dropped. If nothing
+    in the context matches the question the passages are kept whole.
+    Sentences are added in retrieval order until ``token_budget`` tokens
+    are used. Token counts before and after are kept
+    for monitoring.
+    """
+
+    def __init__(self, count_tokens, token_budget=600, sentence_window=1, extract_sentences=True):
+        self.count_tokens = count_tokens
+        self.token_budget = token_budget
+        self.sentence_window = sentence_window
+        self.extract_sentences = extract_sentences
+        self._lock = threading.Lock()
+        self._counters = {'prompts': 0, 'retrieved_tokens': 0, 'context_tokens': 0, 'prompt_tokens': 0}
+
+    def _passage_sentences(self, text, query_terms):
+        """Sentences of a passage worth sending, and whether any matched the question"""
+        sentences = [text[start:end] for start, end in split_sentences(text, 0, len(text))]
+        if not self.extract_sentences or not query_terms:
+            return sentences, False
+
+        matches = [i for i, sentence in enumerate(sentences) if query_terms & set(tokenize(sentence))]
+        if not matches:
+            return sentences, False
+        keep = sorted({j for i in matches
+                       for j in range(max(0, i - self.sentence_window), min(len(sentences), i + self.sentence_window + 1))})
+        return [sentences[j] for j in keep], True
+
+    def build(self, query, docs):
+        """Return (context, retrieved tokens, context tokens) for the retrieved docs"""
+        query_terms = set(tokenize(query)) - QUESTION_WORDS
+        passages = []
+        for passage in merge_passages(docs):
+            sentences, matched = self._passage_sentences(compact_whitespace(passage['content']), query_terms)
+            if sentences:
+                passages.append((matched, sentences))
+        if any(matched for matched, _ in passages):
+            passages = [(matched, sentences) for matched, sentences in passages if matched]
+
+        # Sentence token counts in one tokenizer call, in the order they may be added
+        counts = iter(self.count_tokens([sentence for _, sentences in passages for sentence in sentences]))
+        parts = []
+        used = 0
+        for _, sentences in passages:
+            kept = []
+            for sentence in sentences:
+                tokens = next(counts)
+                if used + tokens > self.token_budget:
+                    break
+                kept.append(sentence)
+                used += tokens
+            if kept:
+                parts.append(' '.join(kept))
+            if used >= self.token_budget or len(kept) < len(sentences):
+                break
+
+        context = '\n\n'.join(parts)
+        retrieved = sum(self.count_tokens([doc['content'] for doc in docs])) if docs else 0
+        return context, retrieved, used
+
+    def record(self, retrieved_tokens, context_tokens, prompt_tokens):
+        """Count one assembled prompt"""
+        with self._lock:
+            self._counters['prompts'] += 1
+            self._counters['retrieved_tokens'] += retrieved_tokens
+            self._counters['context_tokens'] += context_tokens
+            self._counters['prompt_tokens'] += prompt_tokens
+
+    def stats(self):
+        """Prompt count and mean retrieved, context and prompt tokens per prompt"""
+        with self._lock:
+            prompts = self._counters['prompts']
+            stats = {'prompts': prompts}
+            for name in ('retrieved_tokens', 'context_tokens', 'prompt_tokens'):
+                stats[f"mean_{name}"] = self._counters[name] / prompts if prompts else 0.0
+            return stats
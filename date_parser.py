@@ -0,0 +1,401 @@
+"""
+Date-range extraction for stock price queries
+"""
+
+import re
+import pandas as pd
+from stock_aggregates import period_code
+
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+ORDINALS = {
+    'first': 1, 'second': 2, 'third': 3, 'fourth': 4,
+    '1st': 1, '2nd': 2, '3rd': 3, '4th': 4
+}
+
+NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12
+}
+
+MONTH = (r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+         r'|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)')
+# "may" is too common a word to be read as a month without a year
+BARE_MONTH = (r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|june?|july?|aug(?:ust)?'
+              r'|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)')
+ORDINAL = r'(first|second|third|fourth|1st|2nd|3rd|4th)'
+FISCAL_YEAR = r"(?:fy|fiscal(?:\s+year)?|financial\s+year)\s*'?(\d{4}|\d{2})(?:\s*[-/]\s*(\d{4}|\d{2}))?"
+NUMBER = r'(\d+|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve)'
+UNIT = r'(day|week|month|quarter|year)s?'
+DAY_SUFFIX = r'(?:st|nd|rd|th)?'
+
+
+def _day(year, month, day):
+    return pd.Timestamp(year, month, day)
+
+
+def _month_range(year, month):
+    start = pd.Timestamp(year, month, 1)
+    return start, start + pd.offsets.MonthEnd(0)
+
+
+def _quarter_range(year, quarter):
+    """Calendar quarter; Indian fiscal quarters share the same boundaries"""
+    start = pd.Timestamp(year, 3 * quarter - 2, 1)
+    return start, start + pd.offsets.QuarterEnd(0)
+
+
+def _fiscal_year_end(first, second=None):
+    """Calendar year in which a fiscal year ends: FY24, FY2024 and FY 2023-24 all give 2024"""
+    value = second or first
+    if len(value) == 2:
+        if second and len(first) == 4:
+            return int(first[:2]) * 100 + int(value) + (100 if int(value) < int(first[2:]) else 0)
+        return 2000 + int(value) if int(value) < 70 else 1900 + int(value)
+    return int(value)
+
+
+def _fiscal_quarter(fiscal_year, quarter):
+    """Q1 FY24 is April to June 2023, Q4 FY24 is January to March 2024"""
+    start = pd.Timestamp(fiscal_year - 1, 4, 1) + pd.DateOffset(months=3 * (quarter - 1))
+    return _quarter_range(start.year, start.quarter)
+
+
+def _period(start, end, bucket=None):
+    period = {'start': start, 'end': end}
+    if bucket is not None:
+        period['bucket'] = bucket
+    return period
+
+
+def _calendar_quarter_period(year, quarter):
+    start, end = _quarter_range(year, quarter)
+    return _period(start, end, ('quarter', period_code('quarter', year, quarter)))
+
+
+def _fiscal_quarter_period(fiscal_year, quarter):
+    start, end = _fiscal_quarter(fiscal_year, quarter)
+    return _period(start, end, ('quarter', period_code('quarter', start.year, start.quarter)))
+
+
+def _latest_fiscal_quarter(quarter, anchor):
+    """Most recent fiscal quarter ``quarter`` starting on or before the anchor"""
+    fiscal_year = anchor.year + 1 if anchor.month >= 4 else anchor.year
+    start, _ = _fiscal_quarter(fiscal_year, quarter)
+    if start > anchor:
+        fiscal_year -= 1
+    return _fiscal_quarter_period(fiscal_year, quarter)
+
+
+def _spec_iso(m, anchor):
+    day = _day(int(m[1]), int(m[2]), int(m[3]))
+    return _period(day, day)
+
+
+def _spec_numeric_date(m, anchor):
+    day = _day(int(m[3]), int(m[2]), int(m[1]))
+    return _period(day, day)
+
+
+def _spec_day_month_year(m, anchor):
+    day = _day(int(m[3]), MONTHS[m[2][:3]], int(m[1]))
+    return _period(day, day)
+
+
+def _spec_month_day_year(m, anchor):
+    day = _day(int(m[3]), MONTHS[m[1][:3]], int(m[2]))
+    return _period(day, day)
+
+
+def _spec_fiscal_quarter(m, anchor):
+    return _fiscal_quarter_period(_fiscal_year_end(m[2], m[3]), int(m[1]))
+
+
+def _spec_fiscal_year_quarter(m, anchor):
+    return _fiscal_quarter_period(_fiscal_year_end(m[1], m[2]), int(m[3]))
+
+
+def _spec_ordinal_fiscal_quarter(m, anchor):
+    return _fiscal_quarter_period(_fiscal_year_end(m[2], m[3]), ORDINALS[m[1]])
+
+
+def _spec_fiscal_half(m, anchor):
+    fiscal_year = _fiscal_year_end(m[2], m[3])
+    start = pd.Timestamp(fiscal_year - 1, 4, 1) + pd.DateOffset(months=6 * (int(m[1]) - 1))
+    return _period(start, start + pd.DateOffset(months=6) - pd.Timedelta(days=1))
+
+
+def _spec_fiscal_year(m, anchor):
+    fiscal_year = _fiscal_year_end(m[1], m[2])
+    return _period(pd.Timestamp(fiscal_year - 1, 4, 1), pd.Timestamp(fiscal_year, 3, 31))
+
+
+def _spec_fiscal_year_span(m, anchor):
+    # "2023-24" only names a fiscal year when the years are consecutive
+    if (int(m[1]) + 1) % 100 != int(m[2]):
+        return None
+    return _spec_fiscal_year(m, anchor)
+
+
+def _spec_quarter_year(m, anchor):
+    return _calendar_quarter_period(int(m[2]), int(m[1]))
+
+
+def _spec_year_quarter(m, anchor):
+    return _calendar_quarter_period(int(m[1]), int(m[2]))
+
+
+def _spec_ordinal_quarter_year(m, anchor):
+    return _calendar_quarter_period(int(m[2]), ORDINALS[m[1]])
+
+
+def _spec_month_year(m, anchor):
+    year = int(m[3]) if m[3] else 2000 + int(m[2])
+    month = MONTHS[m[1][:3]]
+    start, end = _month_range(year, month)
+    return _period(start, end, ('month', period_code('month', year, month)))
+
+
+def _spec_numeric_month_year(m, anchor):
+    year, month = int(m[2]), int(m[1])
+    start, end = _month_range(year, month)
+    return _period(start, end, ('month', period_code('month', year, month)))
+
+
+def _spec_year(m, anchor):
+    year = int(m[1])
+    return _period(pd.Timestamp(year, 1, 1), pd.Timestamp(year, 12, 31), ('year', period_code('year', year)))
+
+
+def _spec_bare_quarter(m, anchor):
+    return _latest_fiscal_quarter(int(m[1]), anchor)
+
+
+def _spec_bare_ordinal_quarter(m, anchor):
+    return _latest_fiscal_quarter(ORDINALS[m[1]], anchor)
+
+
+def _spec_bare_month(m, anchor):
+    """Most recent occurrence of the month on or before the anchor"""
+    month = MONTHS[m[1][:3]]
+    year = anchor.year if month <= anchor.month else anchor.year - 1
+    start, end = _month_range(year, month)
+    return _period(start, end, ('month', period_code('month', year, month)))
+
+
+# Single dates and periods, most specific first
+SPECS = [
+    (r'(\d{4})-(\d{1,2})-(\d{1,2})', _spec_iso),
+    (r'(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})', _spec_numeric_date),
+    (rf'(\d{{1,2}}){DAY_SUFFIX}\s+(?:of\s+)?({MONTH}),?\s+(\d{{4}})', _spec_day_month_year),
+    (rf'({MONTH})\s+(\d{{1,2}}){DAY_SUFFIX},?\s+(\d{{4}})', _spec_month_day_year),
+    (rf'q([1-4])\s*(?:of\s+)?{FISCAL_YEAR}', _spec_fiscal_quarter),
+    (rf'{FISCAL_YEAR}\s*q([1-4])', _spec_fiscal_year_quarter),
+    (rf'{ORDINAL}\s+quarter\s+(?:of\s+)?{FISCAL_YEAR}', _spec_ordinal_fiscal_quarter),
+    (rf'h([12])\s*(?:of\s+)?{FISCAL_YEAR}', _spec_fiscal_half),
+    (FISCAL_YEAR, _spec_fiscal_year),
+    (r'(\d{4})\s*-\s*(\d{2})', _spec_fiscal_year_span),
+    (r'q([1-4])\s*(?:of\s+)?(?:cy\s*)?(\d{4})', _spec_quarter_year),
+    (r'(\d{4})\s*q([1-4])', _spec_year_quarter),
+    (rf'{ORDINAL}\s+quarter\s+(?:of\s+)?(?:cy\s*)?(\d{{4}})', _spec_ordinal_quarter_year),
+    (rf"({MONTH})\s*,?\s*(?:'(\d{{2}})|(\d{{4}}))", _spec_month_year),
+    (r'(\d{1,2})/(\d{4})', _spec_numeric_month_year),
+    (r'(?:cy\s*|calendar\s+year\s+)?((?:19|20)\d{2})', _spec_year),
+    (r'q([1-4])', _spec_bare_quarter),
+    (rf'{ORDINAL}\s+quarter', _spec_bare_ordinal_quarter),
+    (rf'({BARE_MONTH})', _spec_bare_month),
+]
+
+_SPEC_PATTERNS = [(re.compile(rf'(?<!\w){pattern}(?!\w)'), handler) for pattern, handler in SPECS]
+SPEC = '(?:' + '|'.join(rf'(?<!\w){pattern}(?!\w)' for pattern, _ in SPECS) + ')'
+
+_RANGE_PATTERNS = [
+    re.compile(rf'(?:between|from)\s+(?P<a>{SPEC})\s+(?:and|to|till|until|through|-)\s+(?P<b>{SPEC})'),
+    re.compile(rf'(?P<a>{SPEC})\s*(?:-|to|till|until|through)\s*(?P<b>{SPEC})')
+]
+_SINCE_PATTERN = re.compile(rf'\b(since|after|from|starting)\s+(?P<a>{SPEC})')
+_UNTIL_PATTERN = re.compile(rf'\b(before|until|till|up\s+to|through|prior\s+to)\s+(?P<a>{SPEC})')
+
+_TRAILING_PATTERN = re.compile(
+    rf'\b(?:last|past|previous|prior|trailing|recent)\s+{NUMBER}\s+(calendar\s+|trading\s+)?{UNIT}\b'
+)
+_TRAILING_ADJECTIVE_PATTERN = re.compile(
+    rf'\b(\d{{1,3}})(?:-|\s+){UNIT}(?=-|\s+(?:high|low|range|return|average|avg|performance|trend|moving|window|period)\b)'
+)
+_PAST_UNIT_PATTERN = re.compile(r'\b(?:past|trailing)\s+(day|week|month|quarter|year)\b')
+_PREVIOUS_FISCAL_YEAR_PATTERN = re.compile(r'\b(?:last|previous|prior)\s+(?:fiscal(?:\s+year)?|financial\s+year|fy)\b')
+_CURRENT_FISCAL_YEAR_PATTERN = re.compile(r'\b(?:this|current)\s+(?:fiscal(?:\s+year)?|financial\s+year|fy)\b')
+_PREVIOUS_UNIT_PATTERN = re.compile(r'\b(?:last|previous|prior)\s+(week|month|quarter|year)\b')
+_CURRENT_UNIT_PATTERN = re.compile(r'\b(?:this|current)\s+(week|month|quarter|year)\b')
+_LATEST_SESSION_PATTERN = re.compile(
+    r'\b(?:today|yesterday|latest|most\s+recent|last\s+(?:trading\s+)?(?:session|close|trading\s+day))\b'
+)
+_TO_DATE_PATTERN = re.compile(
+    r'\b(?:(fytd|fiscal[- ]year[- ]to[- ]date)|(ytd|year[- ]to[- ]date)|(qtd|quarter[- ]to[- ]date)'
+    r'|(mtd|month[- ]to[- ]date)|(wtd|week[- ]to[- ]date))\b'
+)
+
+
+def _parse_spec(text, anchor):
+    """Resolve one date or period expression to a period dict, or None"""
+    for pattern, handler in _SPEC_PATTERNS:
+        m = pattern.fullmatch(text)
+        if m:
+            try:
+                period = handler(m, anchor)
+            except ValueError:
+                return None
+            if period is not None:
+                return period
+    return None
+
+
+def _unit_offset(count, unit):
+    if unit == 'day':
+        return pd.Timedelta(days=count)
+    if unit == 'week':
+        return pd.Timedelta(weeks=count)
+    if unit == 'month':
+        return pd.DateOffset(months=count)
+    if unit == 'quarter':
+        return pd.DateOffset(months=3 * count)
+    return pd.DateOffset(years=count)
+
+
+def _trailing(count, unit, anchor):
+    """The ``count`` units of time ending on the anchor date"""
+    return _period(anchor - _unit_offset(count, unit) + pd.Timedelta(days=1), anchor)
+
+
+def _unit_start(unit, day):
+    """Start of the calendar week, month, quarter or year containing ``day``"""
+    if unit == 'week':
+        return day - pd.Timedelta(days=day.weekday())
+    if unit == 'month':
+        return day.replace(day=1)
+    if unit == 'quarter':
+        return pd.Timestamp(day.year, 3 * day.quarter - 2, 1)
+    return pd.Timestamp(day.year, 1, 1)
+
+
+def _fiscal_year_start(day):
+    return pd.Timestamp(day.year if day.month >= 4 else day.year - 1, 4, 1)
+
+
+def _parse_relative(text, anchor):
+    """Resolve relative periods such as "last 6 months" or "YTD"; returns (period, match)"""
+    m = _TRAILING_PATTERN.search(text)
+    if m:
+        count = int(m[1]) if m[1].isdigit() else NUMBER_WORDS[m[1]]
+        if m[2] and m[2].strip() == 'trading' and m[3] == 'day':
+            return {'start': None, 'end': anchor, 'rows': count}, m
+        return _trailing(count, m[3], anchor), m
+
+    m = _LATEST_SESSION_PATTERN.search(text)
+    if m:
+        # Prices are end of day, so "today" and "yesterday" mean the latest close
+        return {'start': None, 'end': anchor, 'rows': 1}, m
+
+    m = _TRAILING_ADJECTIVE_PATTERN.search(text)
+    if m:
+        return _trailing(int(m[1]), m[2], anchor), m
+
+    m = _PAST_UNIT_PATTERN.search(text)
+    if m:
+        return _trailing(1, m[1], anchor), m
+
+    m = _PREVIOUS_FISCAL_YEAR_PATTERN.search(text)
+    if m:
+        start = _fiscal_year_start(anchor) - pd.DateOffset(years=1)
+        return _period(start, start + pd.DateOffset(years=1) - pd.Timedelta(days=1)), m
+
+    m = _CURRENT_FISCAL_YEAR_PATTERN.search(text)
+    if m:
+        return _period(_fiscal_year_start(anchor), anchor), m
+
+    m = _PREVIOUS_UNIT_PATTERN.search(text)
+    if m:
+        current = _unit_start(m[1], anchor)
+        start = _unit_start(m[1], current - pd.Timedelta(days=1))
+        return _period(start, current - pd.Timedelta(days=1)), m
+
+    m = _CURRENT_UNIT_PATTERN.search(text)
+    if m:
+        return _period(_unit_start(m[1], anchor), anchor), m
+
+    m = _TO_DATE_PATTERN.search(text)
+    if m:
+        if m[1]:
+            return _period(_fiscal_year_start(anchor), anchor), m
+        unit = ('year', 'quarter', 'month', 'week')[m.lastindex - 2]
+        return _period(_unit_start(unit, anchor), anchor), m
+
+    return None, None
+
+
+def _with_label(period, query, match, group=0):
+    period['label'] = query[match.start(group):match.end(group)].strip()
+    return period
+
+
+def parse_date_range(query, anchor=None):
+    """Extract the date range a stock query asks about.
+
+    Understands explicit dates and ranges ("between Jan 2023 and Mar 2024",
+    "01/04/2023 to 30/06/2023"), open ranges ("since 2020"), Indian fiscal
+    periods ("Q2 FY24", "H1 FY 2023-24", "FY24"), calendar periods ("Q1
+    2023", "March 2024", "2023") and relative periods ("last 6 months",
+    "past 52 weeks", "YTD", "last quarter", "yesterday"), which are
+    resolved against ``anchor``, normally the latest date in the data.
+
+    Returns a dict with inclusive ``start`` and ``end`` timestamps (None
+    when open-ended), the matched ``label`` and, when the range is exactly
+    one calendar year, quarter or month, its precomputed ``bucket``; a
+    ``rows`` count asks for the last N trading days. Returns None when the
+    query names no period.
+    """
+    anchor = pd.Timestamp.today() if anchor is None else pd.Timestamp(anchor)
+    anchor = anchor.normalize()
+    # Lowercase and normalise dashes without changing offsets, so labels
+    # can be cut from the original query
+    text = query.lower().replace('–', '-').replace('—', '-')
+
+    for pattern in _RANGE_PATTERNS:
+        for m in pattern.finditer(text):
+            end = _parse_spec(m['b'], anchor)
+            if end is None:
+                continue
+            # A start without a year takes it from the end: "Jan to Mar 2024"
+            start = _parse_spec(m['a'], end['end'])
+            if start is None or start['start'] > end['end']:
+                continue
+            return _with_label(_period(start['start'], end['end']), query, m)
+
+    m = _SINCE_PATTERN.search(text)
+    if m:
+        period = _parse_spec(m['a'], anchor)
+        if period is not None:
+            start = period['end'] + pd.Timedelta(days=1) if m[1] == 'after' else period['start']
+            return _with_label(_period(start, None), query, m)
+
+    m = _UNTIL_PATTERN.search(text)
+    if m:
+        period = _parse_spec(m['a'], anchor)
+        if period is not None:
+            end = period['start'] - pd.Timedelta(days=1) if m[1].split()[0] in ('before', 'prior') else period['end']
+            return _with_label(_period(None, end), query, m)
+
+    period, m = _parse_relative(text, anchor)
+    if period is not None:
+        return _with_label(period, query, m)
+
+    for m in re.finditer(SPEC, text):
+        period = _parse_spec(m.group(), anchor)
+        if period is not None:
+            return _with_label(period, query, m)
+
+    return None
@@ -0,0 +1,92 @@
+"""
+Streaming embedding pipeline for FinSage Pro
+"""
+
+import time
+from itertools import islice
+import numpy as np
+from config import EMBEDDING_BATCH_SIZE, EMBEDDING_WORKERS
+
+
+# Seconds between progress messages while encoding
+PROGRESS_INTERVAL = 10
+
+
+def batched(iterable, size):
+    """Yield lists of up to ``size`` items from any iterable"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class EmbeddingPipeline:
+    """Encode a stream of chunks in fixed-size batches into a float32 array.
+
+    Chunks are pulled lazily from any iterable, so only one window of text
+    is held at a time, and vectors are written straight into a
+    preallocated or memory-mapped output array. With ``workers > 1`` the
+    batches are spread over a pool of CPU processes; use the pipeline as a
+    context manager so the pool is started once and shut down afterwards.
+    """
+
+    def __init__(self, model, batch_size=EMBEDDING_BATCH_SIZE, workers=EMBEDDING_WORKERS):
+        self.model = model
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self._pool = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self._pool = self.model.start_multi_process_pool(target_devices=['cpu'] * self.workers)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def encode(self, chunks, total, out=None):
+        """Encode ``total`` chunks into ``out``.
+
+        ``out`` may be an array of shape (total, dimension), a path for a new
+        memory-mapped ``.npy`` file, or None to allocate one in memory.
+        """
+        dimension = self.model.get_sentence_embedding_dimension()
+        if out is None:
+            out = np.empty((total, dimension), dtype='float32')
+        elif isinstance(out, str):
+            out = np.lib.format.open_memmap(out, mode='w+', dtype='float32', shape=(total, dimension))
+
+        written = 0
+        started = last_report = time.perf_counter()
+
+        # One window keeps every worker busy with a single batch
+        for batch in batched(chunks, self.batch_size * self.workers):
+            if written + len(batch) > total:
+                raise ValueError(f"Received more than the expected {total} chunks")
+
+            out[written:written + len(batch)] = self._encode_batch(batch)
+            written += len(batch)
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                rate = written / (now - started)
+                print(f"Embedded {written}/{total} chunks ({rate:.0f} chunks/s)")
+                last_report = now
+
+        if written != total:
+            raise ValueError(f"Expected {total} chunks, received {written}")
+
+        if isinstance(out, np.memmap):
+            out.flush()
+        return out
+
+    def _encode_batch(self, batch):
+        """Encode one window, across the process pool when one is running"""
+        if self._pool is not None:
+            return self.model.encode_multi_process(batch, self._pool, batch_size=self.batch_size,
+                                                   chunk_size=self.batch_size)
+        return self.model.encode(batch, batch_size=self.batch_size, show_progress_bar=False)
@@ -0,0 +1,96 @@
+"""
+Asynchronous Gemini REST client for FinSage Pro
+"""
+
+import json
+import httpx
+from config import (
+    GEMINI_API_KEY,
+    GENERATIVE_MODEL,
+    GEMINI_API_ENDPOINT,
+    GEMINI_TIMEOUT,
+    ASYNC_MAX_CONNECTIONS
+)
+
+
+DEFAULT_ENDPOINT = 'https://generativelanguage.googleapis.com'
+
+# Finish reasons of a candidate that generated normally; any other one was blocked
+COMPLETE_FINISH_REASONS = ('STOP', 'MAX_TOKENS')
+
+
+class AsyncGeminiClient:
+    """Minimal asyncio client for the Gemini ``generateContent`` REST API.
+
+    Requests share one pooled HTTP client, so hundreds of concurrent
+    generations cost sockets rather than threads. ``GEMINI_API_ENDPOINT``
+    points it at another server, such as the benchmark stub.
+    """
+
+    def __init__(self, api_key=GEMINI_API_KEY, model=GENERATIVE_MODEL,
+                 endpoint=GEMINI_API_ENDPOINT, timeout=GEMINI_TIMEOUT):
+        self.model_path = f"/v1beta/models/{model}"
+        self._client = httpx.AsyncClient(
+            base_url=endpoint or DEFAULT_ENDPOINT,
+            headers={'x-goog-api-key': api_key},
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=ASYNC_MAX_CONNECTIONS
+            )
+        )
+
+    @staticmethod
+    def _request_body(prompt):
+        return {'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]}
+
+    @staticmethod
+    def _extract_text(payload):
+        """Join the text parts of the first candidate, or return None without one.
+
+        Raises ``ValueError`` when the prompt or the candidate was blocked,
+        as ``response.text`` does in the synchronous SDK.
+        """
+        block_reason = (payload.get('promptFeedback') or {}).get('blockReason')
+        if block_reason:
+            raise ValueError(f"Gemini blocked the prompt: {block_reason}")
+        candidates = payload.get('candidates') or []
+        if not candidates:
+            return None
+        finish_reason = candidates[0].get('finishReason')
+        if finish_reason and finish_reason not in COMPLETE_FINISH_REASONS:
+            raise ValueError(f"Gemini stopped the response: {finish_reason}")
+        parts = candidates[0].get('content', {}).get('parts', [])
+        return ''.join(part.get('text', '') for part in parts)
+
+    async def generate_content(self, prompt):
+        """Return the complete generated text for a prompt"""
+        response = await self._client.post(f"{self.model_path}:generateContent", json=self._request_body(prompt))
+        response.raise_for_status()
+        text = self._extract_text(response.json())
+        if not text:
+            raise ValueError("Gemini returned no text")
+        return text
+
+    async def stream_generate_content(self, prompt):
+        """Yield generated text pieces as the server streams them"""
+        async with self._client.stream(
+            'POST',
+            f"{self.model_path}:streamGenerateContent",
+            params={'alt': 'sse'},
+            json=self._request_body(prompt)
+        ) as response:
+            response.raise_for_status()
+            streamed = False
+            async for line in response.aiter_lines():
+                if not line.startswith('data:'):
+                    continue
+                text = self._extract_text(json.loads(line[5:]))
+                if text:
+                    streamed = True
+                    yield text
+            if not streamed:
+                raise ValueError("Gemini returned no text")
+
+    async def aclose(self):
+        await self._client.aclose()
@@ -0,0 +1,66 @@
+"""
+Gunicorn settings for FinSage Pro
+
+    gunicorn app:app
+
+With PRELOAD_APP (the default) the embedding model, cross-encoder, FAISS
+and BM25 indexes and stock store are loaded once in the master, before
+any worker is forked. Workers share those pages copy-on-write, and the
+index, chunk texts, embeddings and price columns are memory-mapped from
+the index and stock stores, so they are shared through the OS page cache
+even by workers that are recycled later. Without it every worker loads
+its own copy in a background thread, so the load never holds up the
+worker's heartbeat. Until the RAG system is ready, query requests get a
+503 with Retry-After and GET /api/ready returns 503.
+"""
+
+import gc
+import os
+import sys
+
+# Gunicorn reads this file before putting the project directory on sys.path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import PRELOAD_APP, SERVER_BIND, SERVER_WORKERS, SERVER_THREADS, SERVER_TIMEOUT
+
+
+bind = SERVER_BIND
+workers = SERVER_WORKERS
+worker_class = 'gthread'
+threads = SERVER_THREADS
+timeout = SERVER_TIMEOUT
+preload_app = PRELOAD_APP
+
+
+def when_ready(server):
+    """Load the shared state in the master, which has imported the app but not yet forked"""
+    if not preload_app:
+        return
+
+    import app
+    if not app.preload_rag():
+        server.log.warning("Preloading failed; each worker will initialize the RAG system itself")
+        return
+
+    # Objects created so far are never collected, so the collector does not
+    # write to their pages and copy them into every worker
+    gc.freeze()
+    server.log.info("RAG system preloaded in the master (pid %s)", os.getpid())
+
+
+def post_worker_init(worker):
+    """Start loading the RAG system in a worker that did not inherit it.
+
+    Workers forked from a preloaded master find it in place. Otherwise the
+    load runs in the background initializer: a cold index store can take
+    longer than ``timeout`` to embed, and loading here would stop the
+    worker from sending heartbeats, so the arbiter would kill it and every
+    replacement would start the load from scratch.
+    """
+    import app
+    if app.rag_ready():
+        worker.log.info("Worker %s ready", worker.pid)
+        return
+    # A new process: retry at once even if the master's preload failed moments ago
+    app.initializer.start(force=True)
+    worker.log.info("Worker %s loading the RAG system in the background", worker.pid)
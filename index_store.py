@@ -0,0 +1,329 @@
+"""
+Persistent on-disk store for the FinSage Pro vector index
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+import numpy as np
+from config import (
+    INDEX_STORE_DIR,
+    EMBEDDINGS_MODEL,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    MIN_CHUNK_LENGTH,
+    CHUNKER,
+    CHUNK_TOKENS,
+    CHUNK_OVERLAP_SENTENCES,
+    CHUNK_DEDUP_DISTANCE
+)
+from chunk_store import ChunkTexts, write_chunk_texts
+from vector_index import read_index, write_index
+
+try:
+    import fcntl
+except ImportError:
+    # No fcntl on Windows, where the store is only written by a single process
+    fcntl = None
+
+
+# Bump whenever the on-disk layout changes so stale stores are ignored
+STORE_FORMAT_VERSION = 3
+
+
+def _tmp_suffix():
+    """Suffix for temporary files, unique to the writing process and thread"""
+    return f".{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+class IndexStore:
+    """Versioned cache of chunks, spans, embeddings and the FAISS index.
+
+    Every document is stored under the hash of its content, so a warm start
+    only re-chunks and re-embeds documents whose source text changed. The
+    store directory itself is keyed by the embedding model and the chunking
+    parameters; changing any of them starts a fresh store.
+
+    Worker processes share the store: every manifest update takes a file
+    lock, re-reads the manifest and merges its change into the latest
+    copy, so one worker never drops another's entries.
+    """
+
+    MANIFEST_FILE = 'manifest.json'
+    LOCK_FILE = 'manifest.lock'
+    INDEX_FILE = 'index.faiss'
+
+    def __init__(self, root=INDEX_STORE_DIR):
+        self.config = self._get_config()
+        self.path = os.path.join(root, f"v{STORE_FORMAT_VERSION}-{self._hash_json(self.config)[:16]}")
+        self._manifest_mtime = None
+        self.manifest = self._load_manifest()
+
+    def _get_config(self):
+        """Parameters that invalidate every stored embedding when changed"""
+        return {
+            'format_version': STORE_FORMAT_VERSION,
+            'embeddings_model': EMBEDDINGS_MODEL,
+            'chunk_size': CHUNK_SIZE,
+            'chunk_overlap': CHUNK_OVERLAP,
+            'min_chunk_length': MIN_CHUNK_LENGTH,
+            'chunker': CHUNKER,
+            'chunk_tokens': CHUNK_TOKENS,
+            'chunk_overlap_sentences': CHUNK_OVERLAP_SENTENCES,
+            'chunk_dedup_distance': CHUNK_DEDUP_DISTANCE
+        }
+
+    @staticmethod
+    def _hash_json(value):
+        """Stable hash of a JSON-serialisable value"""
+        payload = json.dumps(value, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+
+    @staticmethod
+    def content_hash(doc):
+        """Hash identifying a document's source, type and content"""
+        digest = hashlib.sha256()
+        for field in ('source', 'type', 'content'):
+            digest.update(str(doc[field]).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _load_manifest(self):
+        """Load the store manifest, or start an empty one"""
+        manifest_path = os.path.join(self.path, self.MANIFEST_FILE)
+        try:
+            if os.path.exists(manifest_path):
+                self._manifest_mtime = os.stat(manifest_path).st_mtime_ns
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                if manifest.get('config') == self.config:
+                    manifest.setdefault('ingested', {})
+                    manifest.setdefault('deleted', [])
+                    return manifest
+        except Exception as e:
+            print(f"Error reading index store manifest: {e}")
+        return {'config': self.config, 'documents': {}, 'index': None, 'ingested': {}, 'deleted': []}
+
+    def _save_manifest(self):
+        """Atomically write the manifest to disk"""
+        os.makedirs(self.path, exist_ok=True)
+        manifest_path = os.path.join(self.path, self.MANIFEST_FILE)
+        tmp_path = manifest_path + _tmp_suffix()
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+        self._manifest_mtime = os.stat(manifest_path).st_mtime_ns
+
+    @contextmanager
+    def _manifest_lock(self):
+        """Hold an exclusive lock on the manifest across worker processes"""
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, self.LOCK_FILE), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _update_manifest(self):
+        """Re-read the manifest under the lock, let the caller change it and write it back"""
+        with self._manifest_lock():
+            self.manifest = self._load_manifest()
+            yield self.manifest
+            self._save_manifest()
+
+    def refresh(self):
+        """Re-read the manifest if another process changed it; True when it did"""
+        try:
+            mtime = os.stat(os.path.join(self.path, self.MANIFEST_FILE)).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._manifest_mtime:
+            return False
+        self.manifest = self._load_manifest()
+        return True
+
+    def _document_dir(self, content_hash):
+        return os.path.join(self.path, 'documents', content_hash)
+
+    def load_document(self, content_hash):
+        """Return cached (chunks, spans, embeddings) for a document, or None.
+
+        Chunk texts, their (start, end) character spans and the embeddings
+        are all memory-mapped rather than read into memory.
+        """
+        if content_hash not in self.manifest['documents']:
+            return None
+
+        doc_dir = self._document_dir(content_hash)
+        try:
+            chunks = ChunkTexts(doc_dir)
+            spans = np.load(os.path.join(doc_dir, 'spans.npy'), mmap_mode='r')
+            embeddings = np.load(os.path.join(doc_dir, 'embeddings.npy'), mmap_mode='r')
+            if not len(chunks) == len(spans) == embeddings.shape[0]:
+                raise ValueError("chunk, span and embedding counts differ")
+            return chunks, spans, embeddings
+        except Exception as e:
+            print(f"Discarding cached document {content_hash[:12]}: {e}")
+            self.manifest['documents'].pop(content_hash, None)
+            return None
+
+    def save_document(self, content_hash, doc, chunks, spans, embeddings):
+        """Persist the chunk texts, spans and embeddings of one document"""
+        doc_dir = self._document_dir(content_hash)
+        try:
+            os.makedirs(doc_dir, exist_ok=True)
+            # Write to temporary files first so concurrent workers never see partial files
+            suffix = _tmp_suffix()
+            written = write_chunk_texts(doc_dir, chunks, suffix)
+            for name, array, dtype in (('spans.npy', spans, 'int64'), ('embeddings.npy', embeddings, 'float32')):
+                path = os.path.join(doc_dir, name)
+                with open(path + suffix, 'wb') as f:
+                    np.save(f, np.asarray(array, dtype=dtype))
+                written.append((path + suffix, path))
+            for tmp_path, path in written:
+                os.replace(tmp_path, path)
+            with self._update_manifest() as manifest:
+                manifest['documents'][content_hash] = {
+                    'source': doc['source'],
+                    'type': doc['type'],
+                    'chunks': len(chunks)
+                }
+        except Exception as e:
+            print(f"Error saving document {doc['source']} to index store: {e}")
+
+    def scratch_path(self, name):
+        """Path for a temporary file inside the store"""
+        scratch_dir = os.path.join(self.path, 'scratch')
+        os.makedirs(scratch_dir, exist_ok=True)
+        return os.path.join(scratch_dir, name)
+
+    def save_content(self, content_hash, content):
+        """Keep the raw text of an ingested document, which has no file to reload"""
+        doc_dir = self._document_dir(content_hash)
+        os.makedirs(doc_dir, exist_ok=True)
+        with open(os.path.join(doc_dir, 'content.txt'), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def ingested_document(self, source):
+        """An ingested document with its content, or None if it cannot be read"""
+        content_hash = self.manifest['ingested'].get(source)
+        if content_hash is None:
+            return None
+        entry = self.manifest['documents'].get(content_hash)
+        content_path = os.path.join(self._document_dir(content_hash), 'content.txt')
+        try:
+            with open(content_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except Exception as e:
+            print(f"Error reading ingested document {source}: {e}")
+            return None
+        return {
+            'content': content,
+            'source': source,
+            'type': entry['type'] if entry else 'transcript'
+        }
+
+    def ingested_documents(self):
+        """Documents added or replaced through ingestion, with their content"""
+        documents = [self.ingested_document(source) for source in self.manifest['ingested']]
+        return [doc for doc in documents if doc is not None]
+
+    def generation(self):
+        """Counter bumped by every ingestion change, so workers can tell which changes they applied"""
+        return self.manifest.get('generation', 0)
+
+    def ingested_hashes(self):
+        """Content hash of every document added or replaced through ingestion, by source"""
+        return dict(self.manifest['ingested'])
+
+    def deleted_sources(self):
+        """Sources removed through ingestion"""
+        return set(self.manifest['deleted'])
+
+    def record_ingested(self, source, content_hash):
+        """Remember that a document was added or replaced through ingestion"""
+        with self._update_manifest() as manifest:
+            manifest['generation'] = manifest.get('generation', 0) + 1
+            manifest['ingested'][source] = content_hash
+            if source in manifest['deleted']:
+                manifest['deleted'].remove(source)
+
+    def record_deleted(self, source):
+        """Remember that a document was deleted through ingestion"""
+        with self._update_manifest() as manifest:
+            manifest['generation'] = manifest.get('generation', 0) + 1
+            manifest['ingested'].pop(source, None)
+            if source not in manifest['deleted']:
+                manifest['deleted'].append(source)
+
+    def load_index(self, content_hashes, requested_params):
+        """Load the saved FAISS index if it was built from exactly these documents.
+
+        Returns ``(index, params)`` where ``params`` are the parameters the
+        index was actually built with, or ``(None, None)`` when the saved
+        index is missing, stale or was requested with different parameters.
+        """
+        saved = self.manifest.get('index')
+        index_path = os.path.join(self.path, self.INDEX_FILE)
+        if (not saved
+                or saved.get('documents') != sorted(content_hashes)
+                or saved.get('requested') != requested_params
+                or not os.path.exists(index_path)):
+            return None, None
+
+        try:
+            return read_index(index_path, saved['params'], mmap=True), saved['params']
+        except Exception:
+            pass
+        try:
+            return read_index(index_path, saved['params']), saved['params']
+        except Exception as e:
+            print(f"Error loading saved FAISS index: {e}")
+            return None, None
+
+    def save_index(self, index, content_hashes, requested_params, params):
+        """Persist the FAISS index together with the documents and parameters it was built from"""
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            index_path = os.path.join(self.path, self.INDEX_FILE)
+            tmp_path = index_path + _tmp_suffix()
+            write_index(index, tmp_path)
+            # Swap the file and its manifest entry together so they always describe the same index
+            with self._update_manifest() as manifest:
+                os.replace(tmp_path, index_path)
+                manifest['index'] = {
+                    'documents': sorted(content_hashes),
+                    'requested': requested_params,
+                    'params': params
+                }
+        except Exception as e:
+            print(f"Error saving FAISS index: {e}")
+
+    def prune(self, keep_hashes):
+        """Remove cached documents that are no longer part of the corpus"""
+        with self._update_manifest() as manifest:
+            keep = set(keep_hashes) | set(manifest['ingested'].values())
+            for content_hash in list(manifest['documents']):
+                if content_hash not in keep:
+                    del manifest['documents'][content_hash]
+                    shutil.rmtree(self._document_dir(content_hash), ignore_errors=True)
+
+    @staticmethod
+    def chunk_ids(content_hash, count):
+        """Stable, non-negative int64 FAISS ids for the chunks of a document"""
+        ids = np.empty(count, dtype='int64')
+        for position in range(count):
+            digest = hashlib.blake2b(f"{content_hash}:{position}".encode('utf-8'), digest_size=8).digest()
+            ids[position] = int.from_bytes(digest, 'big') >> 1
+        return ids
+
+    def index_version(self, content_hashes):
+        """Version string identifying the corpus an index was built from"""
+        return self._hash_json({'config': self.config, 'documents': sorted(content_hashes)})[:16]
@@ -0,0 +1,173 @@
+"""
+Vectorised technical indicators for stock analysis
+"""
+
+import re
+import threading
+import numpy as np
+
+
+TRADING_DAYS_PER_YEAR = 252
+
+DEFAULT_WINDOWS = {
+    'sma': 50,
+    'ema': 20,
+    'rsi': 14
+}
+
+WINDOW = r'(?:(\d{1,3})\s*-?\s*(?:days?|d)?\s*)?'
+WINDOW_AFTER = r'(?:\s*\(?\s*(\d{1,3})(?!\d)\s*\)?)?'
+
+# Checked in order: moving averages before the plain "average" statistic
+INDICATOR_PATTERNS = [
+    ('ema', re.compile(rf'\b{WINDOW}(?:ema|exponential\s+moving\s+average){WINDOW_AFTER}')),
+    ('sma', re.compile(rf'\b{WINDOW}(?:sma|dma|(?:simple\s+)?moving\s+(?:average|avg)){WINDOW_AFTER}')),
+    ('rsi', re.compile(rf'\b{WINDOW}(?:rsi|relative\s+strength(?:\s+index)?){WINDOW_AFTER}')),
+    ('drawdown', re.compile(r'\b(?:max(?:imum)?\s+)?draw\s*-?downs?\b')),
+    ('volatility', re.compile(r'\b(?:volatility|volatile)\b')),
+    ('cagr', re.compile(r'\b(?:cagr|compound(?:ed)?\s+annual(?:\s+growth)?(?:\s+rate)?|annuali[sz]ed\s+returns?)\b')),
+    ('return', re.compile(r'\b(?:returns?|performance|gained|gains?|change)\b')),
+]
+
+# Indicator names specific enough to mark a question as a stock query
+INDICATOR_TERMS = r'volatility|draw\s*-?downs?|rsi|cagr|[sed]ma|moving\s+averages?|relative\s+strength'
+
+
+def detect_indicator(query):
+    """Return (indicator, window) for the indicator a query asks about, or None"""
+    text = query.lower()
+    for name, pattern in INDICATOR_PATTERNS:
+        m = pattern.search(text)
+        if m:
+            window = None
+            if name in DEFAULT_WINDOWS:
+                window = max(2, int(m[1] or m[2] or DEFAULT_WINDOWS[name]))
+            return name, window
+    return None
+
+
+class IndicatorEngine:
+    """Technical indicators over one date-sorted close price series.
+
+    Full-length series (moving averages, RSI, drawdown, log returns and
+    their prefix sums) are computed once with vectorised NumPy/pandas
+    operations and cached for the lifetime of the engine, which is tied
+    to one version of the dataset. Period statistics are then read from
+    the cached series: returns, CAGR and volatility in O(1), maximum
+    drawdown in time linear in the period length.
+    """
+
+    def __init__(self, dates, prices, version=None):
+        self.dates = np.asarray(dates, dtype='datetime64[ns]')
+        self.prices = np.asarray(prices, dtype='float64')
+        self.version = version
+        self._cache = {}
+        self._lock = threading.RLock()
+
+    def _cached(self, key, compute):
+        """Compute a series once per dataset version"""
+        series = self._cache.get(key)
+        if series is None:
+            with self._lock:
+                series = self._cache.get(key)
+                if series is None:
+                    series = compute()
+                    series.setflags(write=False)
+                    self._cache[key] = series
+        return series
+
+    def sma(self, window):
+        """Simple moving average; NaN until ``window`` prices are available"""
+        def compute():
+            result = np.full(len(self.prices), np.nan)
+            if len(self.prices) >= window:
+                sums = np.cumsum(np.concatenate([[0.0], self.prices]))
+                result[window - 1:] = (sums[window:] - sums[:-window]) / window
+            return result
+        return self._cached(('sma', window), compute)
+
+    def ema(self, span):
+        """Exponential moving average seeded with the first price"""
+        import pandas as pd
+        return self._cached(
+            ('ema', span),
+            lambda: pd.Series(self.prices).ewm(span=span, adjust=False).mean().to_numpy()
+        )
+
+    def rsi(self, period=14):
+        """Relative strength index with Wilder's smoothing"""
+        def compute():
+            import pandas as pd
+            change = np.diff(self.prices, prepend=np.nan)
+            gains = pd.Series(np.clip(change, 0, None))
+            losses = pd.Series(np.clip(-change, 0, None))
+            average_gain = gains.ewm(alpha=1 / period, adjust=False, min_periods=period).mean().to_numpy()
+            average_loss = losses.ewm(alpha=1 / period, adjust=False, min_periods=period).mean().to_numpy()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = 100 - 100 / (1 + average_gain / average_loss)
+            return np.where(average_loss == 0, np.where(average_gain > 0, 100.0, 50.0), rsi)
+        return self._cached(('rsi', period), compute)
+
+    def log_returns(self):
+        """Daily log returns; the first element is NaN"""
+        def compute():
+            returns = np.full(len(self.prices), np.nan)
+            returns[1:] = np.diff(np.log(self.prices))
+            return returns
+        return self._cached(('log_returns',), compute)
+
+    def _return_sums(self):
+        """Prefix sums of daily log returns and their squares"""
+        def compute():
+            returns = np.nan_to_num(self.log_returns())
+            return np.stack([
+                np.concatenate([[0.0], np.cumsum(returns)]),
+                np.concatenate([[0.0], np.cumsum(returns * returns)])
+            ])
+        return self._cached(('return_sums',), compute)
+
+    def rolling_volatility(self, window):
+        """Annualised rolling standard deviation of daily log returns"""
+        import pandas as pd
+        return self._cached(
+            ('rolling_volatility', window),
+            lambda: (pd.Series(self.log_returns()).rolling(window).std() * np.sqrt(TRADING_DAYS_PER_YEAR)).to_numpy()
+        )
+
+    def drawdown(self):
+        """Fractional distance of every close below its running peak"""
+        return self._cached(
+            ('drawdown',),
+            lambda: self.prices / np.maximum.accumulate(self.prices) - 1
+        )
+
+    def period_return(self, start, end):
+        """Simple return from the first to the last close of rows [start, end)"""
+        return self.prices[end - 1] / self.prices[start] - 1
+
+    def cagr(self, start, end):
+        """Compound annual growth rate between the first and last close of rows [start, end)"""
+        years = (self.dates[end - 1] - self.dates[start]) / np.timedelta64(1, 'D') / 365.25
+        if years <= 0:
+            return None
+        return (self.prices[end - 1] / self.prices[start]) ** (1 / years) - 1
+
+    def volatility(self, start, end):
+        """Annualised volatility of the daily log returns inside rows [start, end)"""
+        count = end - start - 1
+        if count < 2:
+            return None
+        sums = self._return_sums()
+        total = sums[0, end] - sums[0, start + 1]
+        squares = sums[1, end] - sums[1, start + 1]
+        variance = max(squares - total * total / count, 0.0) / (count - 1)
+        return float(np.sqrt(variance * TRADING_DAYS_PER_YEAR))
+
+    def max_drawdown(self, start, end):
+        """Largest peak-to-trough fall inside rows [start, end) as (drawdown, peak row, trough row)"""
+        prices = self.prices[start:end]
+        peaks = np.maximum.accumulate(prices)
+        drawdowns = prices / peaks - 1
+        trough = int(np.argmin(drawdowns))
+        peak = int(np.argmax(prices[:trough + 1]))
+        return float(drawdowns[trough]), start + peak, start + trough
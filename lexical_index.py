@@ -0,0 +1,114 @@
+"""
+BM25 keyword index and rank fusion for FinSage Pro
+"""
+
+import re
+from collections import Counter
+import numpy as np
+
+
+# Numbers keep their decimals and lose thousands separators, so "1,234.5" and "1234.5" match
+TOKEN_PATTERN = re.compile(r'\d[\d,]*(?:\.\d+)?|[a-z][a-z0-9]*')
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+""".split())
+
+
+def tokenize(text):
+    """Lower-cased word and number tokens without stopwords"""
+    return [
+        token.replace(',', '') if token[0].isdigit() else token
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of chunks.
+
+    Postings are stored in compressed sparse row form: ``indptr[t]`` to
+    ``indptr[t + 1]`` slices the chunk rows and term frequencies of term
+    ``t`` out of two flat arrays, so the whole index is a handful of NumPy
+    arrays plus the vocabulary. A query only touches the postings of its
+    own terms. The index is immutable; rebuild it when the chunks change.
+    """
+
+    def __init__(self, ids, texts, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids = np.asarray(ids, dtype='int64')
+        self.vocabulary = {}
+
+        term_ids = []
+        rows = []
+        frequencies = []
+        lengths = np.zeros(len(self.ids), dtype='float32')
+
+        for row, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[row] = sum(counts.values())
+            for term, count in counts.items():
+                term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                rows.append(row)
+                frequencies.append(count)
+
+        term_ids = np.asarray(term_ids, dtype='int32')
+        order = np.argsort(term_ids, kind='stable')
+        self.indptr = np.zeros(len(self.vocabulary) + 1, dtype='int64')
+        np.cumsum(np.bincount(term_ids, minlength=len(self.vocabulary)), out=self.indptr[1:])
+        self.rows = np.asarray(rows, dtype='int32')[order]
+        self.frequencies = np.asarray(frequencies, dtype='float32')[order]
+
+        # Per-chunk length normalisation, folded into one array at build time
+        average_length = lengths.mean() if len(lengths) else 0.0
+        self.norms = k1 * (1 - b + b * lengths / average_length) if average_length else np.full(len(lengths), k1)
+
+        document_frequency = np.diff(self.indptr)
+        self.idf = np.log1p((len(self.ids) - document_frequency + 0.5) / (document_frequency + 0.5)).astype('float32')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nbytes(self):
+        """Memory used by the postings arrays"""
+        return sum(array.nbytes for array in (self.ids, self.indptr, self.rows, self.frequencies, self.norms, self.idf))
+
+    def scores(self, query):
+        """BM25 score of every chunk row for a query"""
+        scores = np.zeros(len(self.ids), dtype='float32')
+        for term, count in Counter(tokenize(query)).items():
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            rows = self.rows[start:end]
+            frequencies = self.frequencies[start:end]
+            # Rows are unique within one term's postings, so plain fancy-index addition is safe
+            scores[rows] += count * self.idf[term_id] * frequencies * (self.k1 + 1) / (frequencies + self.norms[rows])
+        return scores
+
+    def search(self, query, k):
+        """Top ``k`` chunks as (chunk ids, scores), best first; chunks without a query term are left out"""
+        scores = self.scores(query)
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind='stable')]
+        return self.ids[matched], scores[matched]
+
+
+def reciprocal_rank_fusion(rankings, weights, k=60):
+    """Fuse ranked id lists by weighted reciprocal rank.
+
+    Each id scores ``sum(weight / (k + rank))`` over the rankings it
+    appears in, with ranks starting at 1. Returns (id, score) pairs, best
+    first; ties keep the order in which ids were first seen.
+    """
+    fused = {}
+    for ranking, weight in zip(rankings, weights):
+        if not weight:
+            continue
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda pair: pair[1], reverse=True)
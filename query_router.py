@@ -0,0 +1,222 @@
+"""
+Query routing between stock analysis and document RAG
+"""
+
+import re
+import threading
+import time
+import numpy as np
+from indicators import INDICATOR_TERMS
+
+
+ROUTE_STOCK = 'stock'
+ROUTE_RAG = 'rag'
+
+# Phrases that only make sense as questions about the share price
+STRONG_STOCK_TERMS = [
+    r'(?:stock|share|equity|market|closing|opening|close|open|trading|traded|last)\s+prices?',
+    r'prices?\s+of\s+(?:the\s+)?(?:stock|shares?)',
+    r'(?:highest|lowest|average|avg|max(?:imum)?|min(?:imum)?|peak|mean)\s+(?:closing\s+|close\s+)?(?:stock\s+|share\s+)?prices?',
+    r'prices?\s+(?:range|history|trend|movement|moved?|change|data|chart|action|target)',
+    r'(?:stock|share)\s+(?:performance|performed|returns?|trend|chart|movement|moved?|rall(?:y|ied)|fell|rose|jumped|dropped|traded)',
+    r'(?:52|fifty[- ]two)[- ]weeks?(?:\s+(?:high|low|range))?',
+    r'all[- ]time\s+(?:high|low)',
+    r'traded\s+at', r'trading\s+(?:at|range|days?|sessions?|volume)',
+    r'(?:close|closed|closing)\s+(?:at|on|yesterday|today|above|below)',
+    INDICATOR_TERMS,
+]
+
+# Words that hint at the share price but also appear in business questions
+WEAK_STOCK_TERMS = [
+    r'stocks?', r'prices?', r'shares?', r'clos(?:e|ed|ing)', r'highest', r'lowest', r'average',
+    r'trad(?:ed|ing)', r'nse', r'bse', r'sensex', r'nifty', r'rall(?:y|ied)', r'surged?', r'crash(?:ed)?',
+    r'bullish', r'bearish', r'investors?\s+returns?',
+]
+
+# Business topics answered from the earnings transcripts
+RAG_TERMS = [
+    r'share\s+of', r'market\s+share', r'shareholders?', r'shareholding', r'revenues?', r'profits?',
+    r'profitability', r'income', r'earnings', r'eps', r'ebitda', r'margins?', r'insurance', r'insurers?',
+    r'premiums?', r'lending', r'loans?', r'aum', r'assets\s+under\s+management', r'npas?', r'gnpa', r'nnpa',
+    r'credit', r'deposits?', r'customers?', r'branch(?:es)?', r'segments?', r'subsidiar(?:y|ies)',
+    r'management', r'guidance', r'strategy', r'outlook', r'partnerships?', r'acquisitions?', r'digital',
+    r'transcripts?', r'conference\s+call', r'ceo', r'cfo', r'dividends?', r'business(?:es)?', r'growth\s+drivers?',
+    r'claims?', r'combined\s+ratio', r'disbursements?', r'capital\s+adequacy', r'life\s+insurance', r'general\s+insurance',
+]
+
+# Labelled examples for the embedding classifier used on ambiguous questions
+PROTOTYPES = {
+    ROUTE_STOCK: [
+        "What was the highest share price last year?",
+        "How did the stock close yesterday?",
+        "What is the current stock price?",
+        "Show the stock price trend for 2023",
+        "What is the 200-day moving average?",
+        "How volatile has the stock been this year?",
+        "What was the lowest closing price in Q2 FY24?",
+        "How much did the shares return since 2020?",
+        "What was the maximum drawdown of the stock?",
+        "Average trading price over the last 6 months",
+        "Is the stock near its 52-week high?",
+        "When did the share price peak?",
+    ],
+    ROUTE_RAG: [
+        "How did the company perform in Q3?",
+        "What drove growth in the lending business?",
+        "What did management say about digital transformation?",
+        "What share of revenue comes from insurance?",
+        "How is Bajaj Allianz General Insurance doing?",
+        "What are the key business segments?",
+        "What is the outlook for the next fiscal year?",
+        "How did assets under management grow?",
+        "What partnerships were announced?",
+        "What was the net profit this quarter?",
+        "What did the CFO say about credit costs?",
+        "How many new customers were acquired?",
+    ],
+}
+
+
+def _alternation(terms):
+    return '|'.join(f'(?:{term})' for term in terms)
+
+
+class QueryRouter:
+    """Send each question to stock analysis or to RAG.
+
+    One compiled regex scans the question for strong stock phrases, weak
+    stock words and business topics. Clear-cut questions are routed by
+    the weighted hit counts alone; ambiguous ones fall back to a nearest-
+    prototype classifier over ``PROTOTYPES`` when an embedding function is
+    given, and to RAG otherwise, since RAG also sees the stock summary.
+    Counters record how each question was decided and the latency of
+    routing and of each route. ``find_ticker`` picks out which of the
+    known tickers a question is about.
+    """
+
+    def __init__(self, tickers=(), embed_query=None, embed_texts=None, margin=0.05, prototypes=PROTOTYPES):
+        ticker_terms = [re.escape(ticker.lower()) for ticker in tickers]
+        self._pattern = re.compile(
+            rf'\b(?:(?P<strong>{_alternation(STRONG_STOCK_TERMS)})'
+            rf'|(?P<rag>{_alternation(RAG_TERMS)})'
+            rf'|(?P<weak>{_alternation(WEAK_STOCK_TERMS + ticker_terms)}))\b'
+        )
+        self._ticker_pattern = re.compile(rf'\b(?:{_alternation(ticker_terms)})\b') if ticker_terms else None
+        self.embed_query = embed_query
+        self.embed_texts = embed_texts
+        self.margin = margin
+        self.prototypes = prototypes
+        self._prototype_matrix = None
+        self._prototype_labels = None
+
+        self._lock = threading.Lock()
+        self._decisions = {}
+        self._routing = {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0}
+        self._latency = {}
+
+    def score(self, query):
+        """Weighted rule score: positive leans stock, negative leans RAG"""
+        counts = {'strong': 0, 'weak': 0, 'rag': 0}
+        for m in self._pattern.finditer(query.lower()):
+            counts[m.lastgroup] += 1
+        return 2 * counts['strong'] + counts['weak'] - 2 * counts['rag'], counts
+
+    def find_ticker(self, query):
+        """First known ticker named in a question, upper-cased, or None"""
+        if self._ticker_pattern is None:
+            return None
+        m = self._ticker_pattern.search(query.lower())
+        return m.group(0).upper() if m else None
+
+    def _rule_route(self, query):
+        """Route by rules alone; None when the rules are inconclusive"""
+        score, counts = self.score(query)
+        if score >= 2:
+            return ROUTE_STOCK
+        if counts['rag'] and score <= 0:
+            return ROUTE_RAG
+        return None
+
+    def _load_prototypes(self):
+        if self._prototype_matrix is None:
+            labels = [label for label, texts in self.prototypes.items() for _ in texts]
+            texts = [text for texts in self.prototypes.values() for text in texts]
+            matrix = np.asarray(self.embed_texts(texts), dtype='float32')
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._prototype_labels = np.array(labels)
+            self._prototype_matrix = matrix
+        return self._prototype_matrix, self._prototype_labels
+
+    def warm_up(self):
+        """Embed the prototypes now rather than for the first ambiguous question"""
+        if self.embed_query is not None and self.embed_texts is not None:
+            self._load_prototypes()
+
+    def _classify(self, query):
+        """Nearest-prototype route, or None when neither label wins by ``margin``"""
+        matrix, labels = self._load_prototypes()
+        vector = np.asarray(self.embed_query(query), dtype='float32').reshape(-1)
+        similarities = matrix @ (vector / np.linalg.norm(vector))
+        stock = similarities[labels == ROUTE_STOCK].max()
+        rag = similarities[labels == ROUTE_RAG].max()
+        if abs(stock - rag) < self.margin:
+            return None
+        return ROUTE_STOCK if stock > rag else ROUTE_RAG
+
+    def route(self, query, classify=True):
+        """Return ROUTE_STOCK or ROUTE_RAG for a question.
+
+        With ``classify=False`` questions the rules cannot settle return
+        None instead of calling the embedding model, so callers on an event
+        loop can run the classifier elsewhere.
+        """
+        started = time.perf_counter()
+        route = self._rule_route(query)
+        method = 'rules'
+
+        if route is None:
+            if not classify and self.embed_query is not None:
+                return None
+            if self.embed_query is not None and self.embed_texts is not None:
+                try:
+                    route = self._classify(query)
+                    method = 'classifier'
+                except Exception as e:
+                    print(f"Error classifying query route: {e}")
+            if route is None:
+                # Weak stock hints alone still mean a price question
+                route = ROUTE_STOCK if self.score(query)[0] > 0 else ROUTE_RAG
+                method = 'default'
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._decisions[method] = self._decisions.get(method, 0) + 1
+            self._routing['count'] += 1
+            self._routing['total_seconds'] += elapsed
+            self._routing['max_seconds'] = max(self._routing['max_seconds'], elapsed)
+        return route
+
+    def record(self, route, seconds):
+        """Count one handled question and its end-to-end latency on a route"""
+        with self._lock:
+            latency = self._latency.setdefault(route, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            latency['count'] += 1
+            latency['total_seconds'] += seconds
+            latency['max_seconds'] = max(latency['max_seconds'], seconds)
+
+    def stats(self):
+        """Decision counts and routing and per-route latency"""
+        def summarise(latency):
+            count = latency['count']
+            return {
+                'count': count,
+                'mean_ms': latency['total_seconds'] / count * 1000 if count else 0.0,
+                'max_ms': latency['max_seconds'] * 1000
+            }
+
+        with self._lock:
+            return {
+                'decisions': dict(self._decisions),
+                'routing': summarise(self._routing),
+                'routes': {route: summarise(latency) for route, latency in self._latency.items()}
+            }
@@ -2,37 +2,213 @@
 RAG (Retrieval-Augmented Generation) system for FinSage Pro
 """
 
+import asyncio
+import hashlib
 import os
-import google.generativeai as genai
-from sentence_transformers import SentenceTransformer
-import faiss
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from config import (
     GEMINI_API_KEY, 
+    GEMINI_API_ENDPOINT,
     EMBEDDINGS_MODEL, 
     GENERATIVE_MODEL,
     EARNINGS_FILES,
+    STOCK_DATA_FILE,
     CHUNK_SIZE,
     CHUNK_OVERLAP,
     MIN_CHUNK_LENGTH,
-    DEFAULT_SEARCH_RESULTS
+    CHUNKER,
+    CHUNK_TOKENS,
+    CHUNK_OVERLAP_SENTENCES,
+    CHUNK_DEDUP_DISTANCE,
+    DEFAULT_SEARCH_RESULTS,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_WORKERS,
+    INDEX_ADD_BATCH,
+    INDEX_COMPACT_STALE_FRACTION,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTL,
+    ANSWER_CACHE_BACKEND,
+    ANSWER_CACHE_SIZE,
+    ANSWER_CACHE_TTL,
+    ANSWER_CACHE_PATH,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_SIZE,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL,
+    ASYNC_EXECUTOR_WORKERS,
+    BATCH_LLM_CONCURRENCY,
+    ROUTER_CLASSIFIER_ENABLED,
+    ROUTER_CLASSIFIER_MARGIN,
+    HYBRID_SEARCH_ENABLED,
+    HYBRID_CANDIDATES,
+    DENSE_WEIGHT,
+    BM25_WEIGHT,
+    RRF_K,
+    BM25_K1,
+    BM25_B,
+    RERANK_ENABLED,
+    RERANK_MODEL,
+    RERANK_CANDIDATES,
+    RERANK_BATCH_SIZE,
+    RERANK_MIN_SCORE,
+    RERANK_CACHE_SIZE,
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_EXTRACT_SENTENCES,
+    CONTEXT_SENTENCE_WINDOW,
+    WARM_UP_QUERIES,
+    WARM_UP_STOCK_QUERY,
+    INGEST_SYNC_INTERVAL,
+    INGEST_DATA_DIR
 )
 from stock_analyzer import StockAnalyzer
+from stock_store import StockStore
+from query_router import QueryRouter, ROUTE_STOCK, ROUTE_RAG
+from index_store import IndexStore
+from vector_index import index_params, build_index, configure_search, remove_ids, StaleFilter
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from reranker import Reranker
+from context_builder import ContextBuilder
+from embedding_pipeline import EmbeddingPipeline
+from chunker import Chunker, fixed_chunks
+from chunk_store import ChunkTable
+from cache import LRUCache, create_cache, normalize_query
+from semantic_cache import SemanticCache
+from metrics import REQUEST_SECONDS, PROMPT_TOKENS, LLM_ERRORS
+from tracing import span, bind
+from utils import ReadWriteLock
+
+
+GENERATION_ERROR_MESSAGE = "I apologize, but I encountered an error generating the response. Please try again."
+NO_CONTEXT_MESSAGE = "I don't have enough information to answer your question. Please try asking about stock prices or business performance."
 
 
 class SimpleRAG:
     def __init__(self):
-        # Configure Gemini
-        genai.configure(api_key=GEMINI_API_KEY)
+        # Models are loaded on first use (or by load_models) so constructing
+        # the system, and loading a cached index, does not import torch or Gemini
+        self._embeddings_model = None
+        self._generative_model = None
+        self._chunker = None
+        self._model_lock = threading.RLock()
         
-        # Initialize models
-        self.embeddings_model = SentenceTransformer(EMBEDDINGS_MODEL)
-        self.generative_model = genai.GenerativeModel(GENERATIVE_MODEL)
+        self.reranker = Reranker(
+            RERANK_MODEL,
+            batch_size=RERANK_BATCH_SIZE,
+            cache_size=RERANK_CACHE_SIZE,
+            min_score=RERANK_MIN_SCORE,
+            token_budget=CONTEXT_TOKEN_BUDGET,
+            count_tokens=self.count_tokens
+        ) if RERANK_ENABLED else None
+        self.context_builder = ContextBuilder(
+            self.count_tokens,
+            token_budget=CONTEXT_TOKEN_BUDGET,
+            sentence_window=CONTEXT_SENTENCE_WINDOW,
+            extract_sentences=CONTEXT_EXTRACT_SENTENCES
+        )
         
-        # Initialize components
-        self.stock_analyzer = StockAnalyzer()
+        # Initialize components, importing every configured price CSV that changed
+        self.stock_store = StockStore()
+        self.stock_store.sync()
+        self.stock_analyzer = StockAnalyzer(store=self.stock_store)
+        self._stock_analyzers = {self.stock_analyzer.ticker: self.stock_analyzer}
+        self._stock_lock = threading.Lock()
+        self.router = QueryRouter(
+            tickers=self.stock_store.tickers(),
+            embed_query=self._encode_query if ROUTER_CLASSIFIER_ENABLED else None,
+            embed_texts=self._encode_texts if ROUTER_CLASSIFIER_ENABLED else None,
+            margin=ROUTER_CLASSIFIER_MARGIN
+        )
+        self.store = IndexStore()
         self.index = None
-        self.documents = []
-        self.doc_metadata = []
+        self.bm25 = None
+        self.index_params = index_params()
+        self.built_index_params = None
+        self.index_version = None
+        # Ids of removed chunks the index could not delete, skipped while searching
+        self.stale_filter = None
+        self.query_cache = LRUCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+        self.answer_cache = create_cache(ANSWER_CACHE_BACKEND, ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, ANSWER_CACHE_PATH)
+        self.semantic_cache = (
+            SemanticCache(SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL)
+            if SEMANTIC_CACHE_ENABLED else None
+        )
+        self.chunks = ChunkTable()
+        self.doc_hashes = {}
+        
+        # Searches share the index; ingestion swaps documents in under the write lock
+        self._index_lock = ReadWriteLock()
+        self._ingest_lock = threading.Lock()
+        self._synced_at = 0.0
+        self._applied_generation = 0
+        
+        # The keyword index is rebuilt after ingestion by one background thread
+        self._rebuild_lock = threading.Lock()
+        self._rebuild_pending = False
+        self._rebuild_thread = None
+        
+        # Created on first use by the asynchronous serving path
+        self._executor = None
+        self._async_llm = None
+    
+    @property
+    def embeddings_model(self):
+        """Sentence-transformers embedding model, loaded on first use"""
+        with self._model_lock:
+            if self._embeddings_model is None:
+                from sentence_transformers import SentenceTransformer
+                self._embeddings_model = SentenceTransformer(EMBEDDINGS_MODEL)
+            return self._embeddings_model
+    
+    @property
+    def generative_model(self):
+        """Gemini model, configured on first use"""
+        with self._model_lock:
+            if self._generative_model is None:
+                import google.generativeai as genai
+                # Configure Gemini, optionally against another REST endpoint
+                if GEMINI_API_ENDPOINT:
+                    genai.configure(
+                        api_key=GEMINI_API_KEY,
+                        transport='rest',
+                        client_options={'api_endpoint': GEMINI_API_ENDPOINT}
+                    )
+                else:
+                    genai.configure(api_key=GEMINI_API_KEY)
+                self._generative_model = genai.GenerativeModel(GENERATIVE_MODEL)
+            return self._generative_model
+    
+    @property
+    def chunker(self):
+        """Sentence-aware chunker using the embedding model's tokenizer"""
+        with self._model_lock:
+            if self._chunker is None:
+                self._chunker = Chunker(
+                    tokenizer=getattr(self.embeddings_model, 'tokenizer', None),
+                    chunk_tokens=CHUNK_TOKENS,
+                    overlap_sentences=CHUNK_OVERLAP_SENTENCES,
+                    min_length=MIN_CHUNK_LENGTH,
+                    dedup_distance=CHUNK_DEDUP_DISTANCE
+                )
+            return self._chunker
+    
+    def count_tokens(self, texts):
+        """Token counts of texts with the chunker's tokenizer"""
+        return self.chunker.count_tokens(texts)
+    
+    def _encode_texts(self, texts):
+        """Embed texts for the query router's prototypes"""
+        return self.embeddings_model.encode(texts)
+    
+    def load_models(self):
+        """Load every model now instead of on the first request"""
+        self.embeddings_model
+        self.generative_model
+        self.chunker
+        if self.reranker is not None:
+            self.reranker.load()
         
     def load_documents(self):
         """Load all available documents for RAG"""
@@ -49,6 +225,12 @@ class SimpleRAG:
             if doc:
                 documents.append(doc)
         
+        # Apply additions, replacements and deletions made through ingestion
+        self._applied_generation = self.store.generation()
+        ingested = self.store.ingested_documents()
+        overridden = {doc['source'] for doc in ingested} | self.store.deleted_sources()
+        documents = [doc for doc in documents if doc['source'] not in overridden] + ingested
+        
         # Add fallback business information if limited data
         if len(documents) <= 1:
             documents.append(self._get_sample_business_info())
@@ -103,58 +285,152 @@ class SimpleRAG:
         }
     
     def create_vector_index(self):
-        """Create FAISS vector index from documents"""
+        """Create FAISS vector index from documents, reusing the on-disk store"""
         documents = self.load_documents()
         
         if not documents:
             print("No documents loaded")
             return False
         
-        # Split documents into chunks
-        all_chunks, all_metadata = self._create_chunks(documents)
+        prepared = [self._prepare_document(doc) for doc in documents]
+        prepared = [entry for entry in prepared if entry['chunks']]
         
-        if not all_chunks:
+        if not prepared:
             print("No valid chunks created")
             return False
         
-        # Create embeddings and index
-        return self._build_faiss_index(all_chunks, all_metadata)
+        # Embed every new or changed document in one streaming pass
+        pending = [entry for entry in prepared if entry['embeddings'] is None]
+        if pending:
+            self._embed_documents(pending)
+        
+        doc_hashes = {entry['doc']['source']: entry['hash'] for entry in prepared}
+        self.store.prune(doc_hashes.values())
+        
+        # Create the index
+        return self._build_faiss_index([self._chunk_block(entry) for entry in prepared], doc_hashes=doc_hashes)
+    
+    def _prepare_document(self, doc):
+        """Chunk a document, reusing cached chunks and embeddings from the store.
+        
+        Returns a dict with ``doc``, ``hash``, ``chunks``, ``spans`` and
+        ``embeddings``; ``embeddings`` is None until the document is embedded.
+        """
+        content_hash = self.store.content_hash(doc)
+        cached = self.store.load_document(content_hash)
+        if cached is not None:
+            chunks, spans, embeddings = cached
+        else:
+            chunks, metadata = self._create_chunks([doc])
+            spans = np.array([[meta['start'], meta['end']] for meta in metadata], dtype='int64').reshape(-1, 2)
+            embeddings = None
+        
+        return {
+            'doc': doc,
+            'hash': content_hash,
+            'chunks': chunks,
+            'spans': spans,
+            'embeddings': embeddings
+        }
+    
+    def _chunk_block(self, entry):
+        """ChunkTable block for an embedded document"""
+        return {
+            'source': entry['doc']['source'],
+            'type': entry['doc']['type'],
+            'ids': self.store.chunk_ids(entry['hash'], len(entry['chunks'])),
+            'texts': entry['chunks'],
+            'spans': entry['spans'],
+            'embeddings': entry['embeddings']
+        }
+    
+    def _embed_documents(self, entries):
+        """Embed prepared documents through the streaming pipeline and save them"""
+        total = sum(len(entry['chunks']) for entry in entries)
+        print(f"Creating embeddings for {total} chunks...")
+        
+        # Only start a process pool when there is enough work to spread across it
+        workers = EMBEDDING_WORKERS if total > EMBEDDING_BATCH_SIZE * EMBEDDING_WORKERS else 1
+        chunk_stream = (chunk for entry in entries for chunk in entry['chunks'])
+        scratch_path = self.store.scratch_path(f"embeddings-{os.getpid()}-{threading.get_ident()}.npy")
+        
+        try:
+            with EmbeddingPipeline(self.embeddings_model, workers=workers) as pipeline:
+                embeddings = pipeline.encode(chunk_stream, total, out=scratch_path)
+            
+            offset = 0
+            for entry in entries:
+                block = embeddings[offset:offset + len(entry['chunks'])]
+                offset += len(entry['chunks'])
+                self.store.save_document(entry['hash'], entry['doc'], entry['chunks'], entry['spans'], block)
+                
+                # Serve from the saved, memory-mapped copy when the store accepted it
+                cached = self.store.load_document(entry['hash'])
+                if cached is not None:
+                    entry['chunks'], entry['spans'], entry['embeddings'] = cached
+                else:
+                    entry['embeddings'] = np.array(block)
+            
+            del embeddings
+        finally:
+            if os.path.exists(scratch_path):
+                os.remove(scratch_path)
     
     def _create_chunks(self, documents):
-        """Split documents into chunks for processing"""
+        """Split documents into chunks, recording each chunk's character offsets"""
         all_chunks = []
         all_metadata = []
         
         for doc in documents:
             text = doc['content']
-            chunks = [
-                text[i:i+CHUNK_SIZE] 
-                for i in range(0, len(text), CHUNK_SIZE - CHUNK_OVERLAP)
-            ]
-            
-            for chunk in chunks:
-                if len(chunk.strip()) > MIN_CHUNK_LENGTH:
-                    all_chunks.append(chunk.strip())
-                    all_metadata.append({
-                        'source': doc['source'],
-                        'type': doc['type']
-                    })
+            if CHUNKER == 'fixed':
+                spans = fixed_chunks(text, CHUNK_SIZE, CHUNK_OVERLAP, MIN_CHUNK_LENGTH)
+            else:
+                spans = self.chunker.split(text)
+                spans = [spans[i] for i in self.chunker.deduplicate([text[start:end] for start, end in spans])]
+            
+            for start, end in spans:
+                all_chunks.append(text[start:end])
+                all_metadata.append({
+                    'source': doc['source'],
+                    'type': doc['type'],
+                    'start': start,
+                    'end': end
+                })
         
         return all_chunks, all_metadata
     
-    def _build_faiss_index(self, chunks, metadata):
-        """Build FAISS index from chunks"""
+    def _build_faiss_index(self, blocks, doc_hashes=None):
+        """Build FAISS index from ChunkTable blocks, loading the saved index when it is current"""
         try:
-            print(f"Creating embeddings for {len(chunks)} chunks...")
-            embeddings = self.embeddings_model.encode(chunks)
+            chunks = ChunkTable(blocks)
             
-            # Create FAISS index
-            dimension = embeddings.shape[1]
-            self.index = faiss.IndexFlatL2(dimension)
-            self.index.add(embeddings.astype('float32'))
+            index, params = None, None
+            if doc_hashes is not None:
+                index, params = self.store.load_index(doc_hashes.values(), self.index_params)
+                if index is not None and index.ntotal != len(chunks):
+                    index = None
             
-            self.documents = chunks
-            self.doc_metadata = metadata
+            if index is None:
+                index, params = self._index_blocks(blocks)
+                if doc_hashes is not None:
+                    self.store.save_index(index, doc_hashes.values(), self.index_params, params)
+            else:
+                configure_search(index, params)
+                print("Loaded vector index from store")
+            
+            self._attach_vectors(index)
+            bm25 = self._build_bm25(chunks)
+            
+            with self._index_lock.write_lock():
+                self.index = index
+                self.bm25 = bm25
+                self.built_index_params = params
+                self.stale_filter = None
+                self.chunks = chunks
+                self.doc_hashes = dict(doc_hashes or {})
+                if doc_hashes is not None:
+                    self.index_version = self.store.index_version(doc_hashes.values())
             
             print(f"Vector index created with {len(chunks)} documents")
             return True
@@ -163,83 +439,862 @@ class SimpleRAG:
             print(f"Error building FAISS index: {e}")
             return False
     
+    def _index_blocks(self, blocks):
+        """Create (and train) a FAISS index over ChunkTable blocks, adding one document block at a time"""
+        embeddings = [block['embeddings'] for block in blocks]
+        index, params = build_index(embeddings[0].shape[1], embeddings, self.index_params)
+        for block in blocks:
+            for start in range(0, len(block['ids']), INDEX_ADD_BATCH):
+                rows = np.ascontiguousarray(block['embeddings'][start:start + INDEX_ADD_BATCH], dtype='float32')
+                index.add_with_ids(rows, block['ids'][start:start + len(rows)])
+        return index, params
+    
+    def ingest_document(self, source, content=None, doc_type='transcript'):
+        """Add or replace a single document in the live index.
+        
+        Only this document is chunked and embedded; searches keep running
+        until the new chunks are swapped in. When ``content`` is omitted the
+        document is read from the file ``source`` names, which must be a
+        relative path inside ``INGEST_DATA_DIR``. Other worker processes
+        pick the change up from the index store.
+        """
+        if content is None:
+            doc = self._load_text_file(self._ingest_path(source))
+            if doc is None:
+                raise ValueError(f"Could not read document {source}")
+            doc['source'] = source
+        else:
+            doc = {'content': content, 'source': source, 'type': doc_type}
+        
+        with self._ingest_lock:
+            self._apply_store_changes()
+            entry = self._prepare_document(doc)
+            if not entry['chunks']:
+                raise ValueError(f"Document {source} produced no chunks")
+            if entry['embeddings'] is None:
+                self._embed_documents([entry])
+            
+            content_hash = entry['hash']
+            chunk_count = len(entry['chunks'])
+            
+            previous_hash = self.doc_hashes.get(source)
+            if previous_hash == content_hash:
+                return {'source': source, 'action': 'unchanged', 'chunks': chunk_count}
+            
+            self._swap_in(entry)
+            self.store.save_content(content_hash, doc['content'])
+            self.store.record_ingested(source, content_hash)
+            self._save_index()
+        
+        print(f"Ingested {source} with {chunk_count} chunks")
+        return {
+            'source': source,
+            'action': 'replaced' if previous_hash else 'added',
+            'chunks': chunk_count
+        }
+    
+    @staticmethod
+    def _ingest_path(source):
+        """File path of a document to ingest, refusing paths outside ``INGEST_DATA_DIR``"""
+        if os.path.isabs(source) or '..' in source.replace('\\', '/').split('/'):
+            raise ValueError(f"Document {source} must be a relative path inside the data directory")
+        root = os.path.realpath(INGEST_DATA_DIR)
+        path = os.path.realpath(os.path.join(root, source))
+        # Symbolic links may still lead outside the data directory
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Document {source} must be a relative path inside the data directory")
+        return path
+    
+    def delete_document(self, source):
+        """Remove a single document from the live index"""
+        with self._ingest_lock:
+            self._apply_store_changes()
+            if not self._swap_out(source):
+                return False
+            self.store.record_deleted(source)
+            self._save_index()
+        
+        print(f"Deleted {source} from the vector index")
+        return True
+    
+    def _swap_in(self, entry):
+        """Add or replace an embedded document in the live index and chunk table"""
+        source = entry['doc']['source']
+        embeddings = entry['embeddings']
+        block = self._chunk_block(entry)
+        old_ids = self.chunks.source_ids(source)
+        
+        # Build the chunk table off the lock so searches only wait for the swap
+        chunks = self.chunks.replace(source, block)
+        
+        with self._index_lock.write_lock():
+            if self.index is None:
+                self.index, self.built_index_params = build_index(
+                    embeddings.shape[1], [embeddings], self.index_params
+                )
+                self._attach_vectors(self.index)
+            self.index.add_with_ids(np.ascontiguousarray(embeddings, dtype='float32'), block['ids'])
+            if old_ids is not None and not remove_ids(self.index, old_ids):
+                self._mark_stale(old_ids, block['ids'])
+            elif self.stale_filter is not None:
+                # Re-ingested content gets its old chunk ids back
+                self._mark_stale([], block['ids'])
+            
+            self.chunks = chunks
+            self.doc_hashes[source] = entry['hash']
+            self.index_version = self.store.index_version(self.doc_hashes.values())
+        self._schedule_rebuild()
+    
+    def _swap_out(self, source):
+        """Remove a document from the live index and chunk table; False if it is not indexed"""
+        old_ids = self.chunks.source_ids(source)
+        if old_ids is None:
+            return False
+        
+        chunks = self.chunks.replace(source)
+        
+        with self._index_lock.write_lock():
+            if not remove_ids(self.index, old_ids):
+                self._mark_stale(old_ids)
+            self.chunks = chunks
+            del self.doc_hashes[source]
+            self.index_version = self.store.index_version(self.doc_hashes.values())
+        self._schedule_rebuild()
+        return True
+    
+    def _mark_stale(self, removed_ids, live_ids=()):
+        """Filter removed ids out of searches, and stop filtering ids that are live again; needs the write lock"""
+        stale = np.empty(0, dtype='int64') if self.stale_filter is None else self.stale_filter.ids
+        stale = np.setdiff1d(np.union1d(stale, np.asarray(removed_ids, dtype='int64')), live_ids)
+        self.stale_filter = StaleFilter(self.built_index_params, stale) if len(stale) else None
+    
+    def _schedule_rebuild(self):
+        """Rebuild the keyword index for the current chunks in the background.
+        
+        Rebuilding BM25 is O(corpus), so ingestion only swaps the chunk
+        table and the FAISS index and leaves this to one background thread;
+        changes made while it runs are picked up by one more pass. Until
+        the new index is in place, keyword hits on removed chunks are
+        skipped and new chunks are found by dense search only. The same
+        pass compacts an index that cannot delete (HNSW) once more than
+        ``INDEX_COMPACT_STALE_FRACTION`` of its vectors are stale.
+        """
+        with self._rebuild_lock:
+            self._rebuild_pending = True
+            if self._rebuild_thread is None or not self._rebuild_thread.is_alive():
+                self._rebuild_thread = threading.Thread(target=self._rebuild, name='bm25-rebuild', daemon=True)
+                self._rebuild_thread.start()
+    
+    def _rebuild(self):
+        """Background loop behind ``_schedule_rebuild``"""
+        while True:
+            with self._rebuild_lock:
+                if not self._rebuild_pending:
+                    self._rebuild_thread = None
+                    return
+                self._rebuild_pending = False
+            
+            chunks = self.chunks
+            stale = len(self.stale_filter) if self.stale_filter is not None else 0
+            index = None
+            try:
+                bm25 = self._build_bm25(chunks)
+                if stale and len(chunks) and stale > INDEX_COMPACT_STALE_FRACTION * len(chunks):
+                    print(f"Compacting the vector index: {stale} stale vectors for {len(chunks)} chunks")
+                    index, params = self._index_blocks(chunks.blocks)
+                    self._attach_vectors(index)
+            except Exception as e:
+                print(f"Error rebuilding the search indexes: {e}")
+                continue
+            
+            with self._index_lock.write_lock():
+                # A newer table has its own pass pending, or came with its own index
+                if self.chunks is not chunks:
+                    continue
+                self.bm25 = bm25
+                if index is not None:
+                    self.index = index
+                    self.built_index_params = params
+                    self.stale_filter = None
+            
+            if index is not None:
+                self._save_index()
+    
+    def sync_ingested(self):
+        """Apply documents ingested or deleted by other worker processes.
+        
+        Checks the index store manifest at most every
+        ``INGEST_SYNC_INTERVAL`` seconds. Changed documents were already
+        embedded and saved by the worker that ingested them, so they are
+        loaded from the store rather than embedded again.
+        """
+        now = time.monotonic()
+        if self.index is None or now - self._synced_at < INGEST_SYNC_INTERVAL:
+            return
+        self._synced_at = now
+        
+        # A worker already ingesting applies the changes itself
+        if not self._ingest_lock.acquire(blocking=False):
+            return
+        try:
+            self._apply_store_changes()
+        except Exception as e:
+            print(f"Error applying ingested documents: {e}")
+        finally:
+            self._ingest_lock.release()
+    
+    def _apply_store_changes(self):
+        """Bring the live index up to date with the store's ingested and deleted documents; needs the ingest lock.
+        
+        This worker's own manifest writes also re-read other workers'
+        changes, so the manifest generation, not its modification time,
+        tells whether there is anything left to apply.
+        """
+        self.store.refresh()
+        generation = self.store.generation()
+        if generation == self._applied_generation:
+            return
+        
+        changed = 0
+        for source, content_hash in self.store.ingested_hashes().items():
+            if self.doc_hashes.get(source) == content_hash:
+                continue
+            doc = self.store.ingested_document(source)
+            if doc is None:
+                continue
+            entry = self._prepare_document(doc)
+            if not entry['chunks']:
+                continue
+            if entry['embeddings'] is None:
+                self._embed_documents([entry])
+            self._swap_in(entry)
+            changed += 1
+        
+        for source in self.store.deleted_sources():
+            if source in self.doc_hashes and self._swap_out(source):
+                changed += 1
+        
+        self._applied_generation = generation
+        if changed:
+            print(f"Applied {changed} document changes made by other workers")
+    
+    def _build_bm25(self, chunks):
+        """BM25 keyword index over a ChunkTable, or None when hybrid search is off"""
+        if not HYBRID_SEARCH_ENABLED or not BM25_WEIGHT or not len(chunks):
+            return None
+        ids, texts = zip(*chunks.items())
+        return BM25Index(list(ids), list(texts), k1=BM25_K1, b=BM25_B)
+    
+    def _attach_vectors(self, index):
+        """Let a binary index re-score its candidates with the live table's float embeddings"""
+        if hasattr(index, 'vectors'):
+            index.vectors = lambda ids: self.chunks.vectors(ids)
+    
+    def _save_index(self):
+        """Persist the live index so the next start picks up ingested changes"""
+        with self._index_lock.read_lock():
+            if self.index is not None:
+                self.store.save_index(
+                    self.index, self.doc_hashes.values(), self.index_params, self.built_index_params
+                )
+    
     def search(self, query, k=DEFAULT_SEARCH_RESULTS):
         """Search for relevant documents"""
         if self.index is None:
             return []
         
         try:
-            query_embedding = self.embeddings_model.encode([query])
-            distances, indices = self.index.search(query_embedding.astype('float32'), k)
-            
-            results = []
-            for i, idx in enumerate(indices[0]):
-                if idx < len(self.documents):
-                    results.append({
-                        'content': self.documents[idx],
-                        'metadata': self.doc_metadata[idx],
-                        'score': float(distances[0][i])
-                    })
-            
-            return results
+            query_embedding = self._encode_query(query)
+            with span('search'):
+                return self._search_embeddings(query_embedding, k, queries=[query])[0]
             
         except Exception as e:
             print(f"Error during search: {e}")
             return []
     
+    def _search_embeddings(self, query_embeddings, k, queries=None):
+        """Search with a (n, dimension) matrix, returning one result list per row.
+        
+        When the query texts are given and hybrid search is on, the top
+        ``HYBRID_CANDIDATES`` dense and BM25 hits are merged by reciprocal
+        rank fusion and ``score`` is the fused score; otherwise it is the
+        FAISS distance.
+        """
+        self.sync_ingested()
+        all_results = []
+        with self._index_lock.read_lock():
+            hybrid = queries is not None and self.bm25 is not None
+            depth = max(k, HYBRID_CANDIDATES) if hybrid else k
+            
+            # Skip vectors left behind by indexes that cannot delete
+            if self.stale_filter is not None:
+                distances, indices = self.stale_filter.search(self.index, query_embeddings, depth)
+            else:
+                distances, indices = self.index.search(query_embeddings, depth)
+            
+            for row in range(len(indices)):
+                ranked = []
+                seen = set()
+                for i, idx in enumerate(indices[row]):
+                    if idx in self.chunks and idx not in seen and len(ranked) < depth:
+                        seen.add(idx)
+                        ranked.append((int(idx), float(distances[row][i])))
+                
+                if hybrid:
+                    # The keyword index may still hold chunks removed since it was built
+                    keyword_ids = [idx for idx in self.bm25.search(queries[row], depth)[0].tolist() if idx in self.chunks]
+                    ranked = reciprocal_rank_fusion(
+                        [[idx for idx, _ in ranked], keyword_ids],
+                        [DENSE_WEIGHT, BM25_WEIGHT],
+                        RRF_K
+                    )
+                
+                all_results.append([
+                    {
+                        'id': idx,
+                        'content': self.chunks.text(idx),
+                        'metadata': self.chunks.metadata(idx),
+                        'score': score
+                    }
+                    for idx, score in ranked[:k]
+                ])
+        
+        return all_results
+    
+    def warm_up(self, queries=WARM_UP_QUERIES):
+        """Run sample questions through encoding, search, reranking and context assembly.
+        
+        The first forward pass of each model, the first searches and the
+        router's prototype embeddings carry one-off allocation and setup
+        costs; paying them here keeps them away from the first real request.
+        A stock question loads date parsing the same way.
+        The query, answer and rerank caches and the usage counters are left
+        untouched.
+        """
+        started = time.perf_counter()
+        queries = list(queries)
+        self.router.warm_up()
+        
+        # Both the single-question and the batched encode paths
+        self.embeddings_model.encode(queries[:1])
+        embeddings = np.asarray(self.embeddings_model.encode(queries, batch_size=EMBEDDING_BATCH_SIZE), dtype='float32')
+        
+        if self.index is not None:
+            docs_per_query = self._search_embeddings(embeddings, self._retrieval_depth(), queries=queries)
+            if self.reranker is not None:
+                self.reranker.warm_up(queries, docs_per_query)
+            for query, docs in zip(queries, docs_per_query):
+                self.context_builder.build(query, docs)
+        
+        self.stock_analyzer.get_stock_stats_response(WARM_UP_STOCK_QUERY)
+        
+        print(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+    
+    def _encode_query(self, query):
+        """Embed a query as a (1, dimension) float32 matrix, using the query cache"""
+        key = normalize_query(query)
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            with span('encode'):
+                embedding = np.asarray(self.embeddings_model.encode([key]), dtype='float32')
+            embedding.setflags(write=False)
+            self.query_cache.put(key, embedding)
+        return embedding
+    
+    def _encode_queries(self, queries):
+        """Embed many queries as one matrix, encoding all cache misses in a single batch"""
+        keys = [normalize_query(query) for query in queries]
+        embeddings = {}
+        for key in keys:
+            if key not in embeddings:
+                embeddings[key] = self.query_cache.get(key)
+        
+        missing = [key for key, embedding in embeddings.items() if embedding is None]
+        if missing:
+            with span('encode'):
+                encoded = np.asarray(
+                    self.embeddings_model.encode(missing, batch_size=EMBEDDING_BATCH_SIZE),
+                    dtype='float32'
+                )
+            for key, row in zip(missing, encoded):
+                embedding = row.reshape(1, -1)
+                embedding.setflags(write=False)
+                self.query_cache.put(key, embedding)
+                embeddings[key] = embedding
+        
+        return np.vstack([embeddings[key] for key in keys])
+    
+    def cache_stats(self):
+        """Statistics for every cache in the query pipeline"""
+        stats = {
+            'query_embeddings': self.query_cache.stats()
+        }
+        if self.answer_cache is not None:
+            stats['answers'] = self.answer_cache.stats()
+        if self.semantic_cache is not None:
+            stats['semantic_answers'] = self.semantic_cache.stats()
+        if self.reranker is not None:
+            stats['rerank'] = self.reranker.stats()
+        return stats
+    
+    def route_stats(self):
+        """Routing decisions and per-route latency"""
+        return self.router.stats()
+    
+    def prompt_stats(self):
+        """Mean retrieved, context and prompt tokens per generation"""
+        return self.context_builder.stats()
+    
+    def metric_families(self):
+        """Cache and routing counters as Prometheus metric families, read at scrape time"""
+        caches = self.cache_stats()
+        if 'rerank' in caches:
+            caches['rerank_scores'] = caches.pop('rerank')['score_cache']
+        families = []
+        for counter in ('hits', 'misses', 'evictions'):
+            families.append((
+                f"finsage_cache_{counter}_total", 'counter', f"Cache {counter} by cache",
+                [({'cache': name}, stats[counter]) for name, stats in caches.items()]
+            ))
+        families.append((
+            'finsage_cache_entries', 'gauge', 'Entries held by each cache',
+            [({'cache': name}, stats['size']) for name, stats in caches.items() if stats.get('size') is not None]
+        ))
+        
+        routing = self.route_stats()
+        families.append((
+            'finsage_route_decisions_total', 'counter', 'Routing decisions by how they were made',
+            [({'method': method}, count) for method, count in sorted(routing['decisions'].items())]
+        ))
+        return families
+    
+    def _build_prompt(self, query, context_docs):
+        """Assemble the generation prompt from the retrieved chunks, within the context token budget"""
+        with span('context'):
+            context, retrieved_tokens, context_tokens = self.context_builder.build(query, context_docs)
+            prompt = self._create_prompt(query, context)
+            prompt_tokens = self.chunker.count_tokens([prompt])[0]
+        self.context_builder.record(retrieved_tokens, context_tokens, prompt_tokens)
+        PROMPT_TOKENS.observe(prompt_tokens)
+        print(f"Prompt tokens: {prompt_tokens} (context {context_tokens} of {retrieved_tokens} retrieved)")
+        return prompt
+    
     def generate_answer(self, query, context_docs):
         """Generate answer using Gemini"""
-        context = "\n\n".join([doc['content'] for doc in context_docs])
-        
-        prompt = self._create_prompt(query, context)
+        prompt = self._build_prompt(query, context_docs)
         
         try:
-            response = self.generative_model.generate_content(prompt)
-            return response.text
+            with span('llm'):
+                response = self.generative_model.generate_content(prompt)
+                return response.text
         except Exception as e:
             print(f"Error generating answer: {e}")
-            return "I apologize, but I encountered an error generating the response. Please try again."
+            LLM_ERRORS.inc(mode='sync')
+            return GENERATION_ERROR_MESSAGE
     
-    def _create_prompt(self, query, context):
-        """Create prompt for the generative model"""
-        return f"""
-        Based on the following context about Bajaj Finserv, please answer the user's question.
+    def generate_answer_stream(self, query, context_docs):
+        """Generate an answer using Gemini's streaming mode, yielding text pieces.
         
-        Context:
-        {context}
+        On failure the last piece is ``GENERATION_ERROR_MESSAGE``.
+        """
+        prompt = self._build_prompt(query, context_docs)
         
-        Question: {query}
+        try:
+            with span('llm'):
+                for chunk in self.generative_model.generate_content(prompt, stream=True):
+                    if chunk.text:
+                        yield chunk.text
+        except Exception as e:
+            print(f"Error streaming answer: {e}")
+            LLM_ERRORS.inc(mode='stream')
+            yield GENERATION_ERROR_MESSAGE
+    
+    async def generate_answer_async(self, query, context_docs):
+        """Generate an answer using the asynchronous Gemini client"""
+        # Context packing tokenizes every retrieved chunk, so it runs in the thread pool
+        prompt = await self._run_blocking(self._build_prompt, query, context_docs)
         
-        Instructions:
-        - Provide a clear, accurate answer based on the context
-        - If the context doesn't contain enough information, say so
-        - Focus on being helpful and informative
-        - Use specific numbers and facts when available
-        """
+        try:
+            with span('llm'):
+                return await self._get_async_llm().generate_content(prompt)
+        except Exception as e:
+            print(f"Error generating answer: {e}")
+            LLM_ERRORS.inc(mode='async')
+            return GENERATION_ERROR_MESSAGE
+    
+    async def generate_answer_stream_async(self, query, context_docs):
+        """Asynchronous ``generate_answer_stream``"""
+        prompt = await self._run_blocking(self._build_prompt, query, context_docs)
+        
+        try:
+            with span('llm'):
+                async for piece in self._get_async_llm().stream_generate_content(prompt):
+                    yield piece
+        except Exception as e:
+            print(f"Error streaming answer: {e}")
+            LLM_ERRORS.inc(mode='async_stream')
+            yield GENERATION_ERROR_MESSAGE
+    
+    def _create_prompt(self, query, context):
+        """Create prompt for the generative model"""
+        return (
+            "Answer the question about Bajaj Finserv using the context. "
+            "Be clear and accurate, use specific numbers and facts when available, "
+            "and say so if the context does not contain enough information.\n\n"
+            f"Context:\n{context}\n\n"
+            f"Question: {query}"
+        )
     
     def process_query(self, query):
         """Process a user query and return answer with sources"""
-        # Check if it's a stock-related query
-        if self.stock_analyzer.is_stock_query(query):
-            answer = self.stock_analyzer.get_stock_stats_response(query)
+        started = time.perf_counter()
+        with span('route'):
+            route = self.router.route(query)
+        try:
+            if route == ROUTE_STOCK:
+                return self._stock_result(query)
+            return self._rag_result(query)
+        finally:
+            self._record_route(route, started)
+    
+    def _record_route(self, route, started):
+        """Count one handled question and its end-to-end latency on a route"""
+        elapsed = time.perf_counter() - started
+        self.router.record(route, elapsed)
+        REQUEST_SECONDS.observe(elapsed, route=route)
+    
+    def _rag_result(self, query):
+        """Answer a question from the retrieved documents"""
+        relevant_docs, cached = self._retrieve(query)
+        
+        if not relevant_docs:
             return {
-                'answer': answer,
-                'sources': [self.stock_analyzer.STOCK_DATA_FILE]
+                'answer': NO_CONTEXT_MESSAGE,
+                'sources': []
             }
         
-        # Use RAG for other queries
-        relevant_docs = self.search(query)
+        if cached is not None:
+            return cached
+        
+        answer = self.generate_answer(query, relevant_docs)
+        return self._finish_answer(query, relevant_docs, answer)
+    
+    def process_queries(self, queries):
+        """Process many queries at once, returning results in input order.
+        
+        Stock questions go to the StockAnalyzer. All other questions are
+        embedded in one batched encode call and searched with one
+        multi-row FAISS query; uncached answers are generated with at most
+        ``BATCH_LLM_CONCURRENCY`` Gemini calls in flight, and duplicate
+        questions over the same context share one call. Every question is
+        counted on its route; batched RAG questions are answered together,
+        so each one's latency is the time until the batch is answered.
+        """
+        started = time.perf_counter()
+        results = [None] * len(queries)
+        
+        rag_positions = []
+        for position, query in enumerate(queries):
+            question_started = time.perf_counter()
+            with span('route'):
+                route = self.router.route(query)
+            if route == ROUTE_STOCK:
+                try:
+                    results[position] = self._stock_result(query)
+                finally:
+                    self._record_route(route, question_started)
+            else:
+                rag_positions.append(position)
+        
+        if not rag_positions:
+            return results
+        
+        try:
+            answers = self._rag_results([queries[position] for position in rag_positions])
+        finally:
+            for _ in rag_positions:
+                self._record_route(ROUTE_RAG, started)
+        
+        for position, result in zip(rag_positions, answers):
+            results[position] = result
+        return results
+    
+    def _rag_results(self, rag_queries):
+        """Answers to many RAG questions, searched in one batch, in input order"""
+        results = [None] * len(rag_queries)
+        docs_per_query = [[] for _ in rag_queries]
+        if self.index is not None:
+            try:
+                embeddings = self._encode_queries(rag_queries)
+                with span('search'):
+                    docs_per_query = self._search_embeddings(embeddings, self._retrieval_depth(), queries=rag_queries)
+                docs_per_query = self._rerank(rag_queries, docs_per_query)
+            except Exception as e:
+                print(f"Error during batch search: {e}")
+        
+        # Group uncached questions by answer cache key so duplicates share a generation
+        pending = {}
+        for position, (query, relevant_docs) in enumerate(zip(rag_queries, docs_per_query)):
+            if not relevant_docs:
+                results[position] = {'answer': NO_CONTEXT_MESSAGE, 'sources': []}
+                continue
+            
+            cached = self._cached_answer(query, relevant_docs)
+            if cached is not None:
+                results[position] = cached
+                continue
+            
+            key = self._answer_cache_key(query, relevant_docs)
+            pending.setdefault(key, (query, relevant_docs, []))[2].append(position)
+        
+        if pending:
+            with ThreadPoolExecutor(max_workers=BATCH_LLM_CONCURRENCY) as pool:
+                answers = {
+                    key: pool.submit(bind(self.generate_answer), query, relevant_docs)
+                    for key, (query, relevant_docs, _) in pending.items()
+                }
+            
+            for key, (query, relevant_docs, positions) in pending.items():
+                result = self._finish_answer(query, relevant_docs, answers[key].result())
+                for position in positions:
+                    results[position] = dict(result)
+        
+        return results
+    
+    def process_query_stream(self, query):
+        """Process a user query, yielding answer tokens as they are generated.
+        
+        Yields ``('token', text)`` events followed by a final
+        ``('sources', sources)`` event. Stock and cached answers arrive as a
+        single token.
+        """
+        started = time.perf_counter()
+        with span('route'):
+            route = self.router.route(query)
+        try:
+            yield from self._stream_routed(query, route)
+        finally:
+            self._record_route(route, started)
+    
+    def _stream_routed(self, query, route):
+        """Answer events for a question that has already been routed"""
+        if route == ROUTE_STOCK:
+            result = self._stock_result(query)
+        else:
+            relevant_docs, result = self._retrieve(query)
+            if not relevant_docs:
+                result = {'answer': NO_CONTEXT_MESSAGE, 'sources': []}
+            
+            if result is None:
+                pieces = []
+                for piece in self.generate_answer_stream(query, relevant_docs):
+                    pieces.append(piece)
+                    yield 'token', piece
+                
+                if not pieces:
+                    pieces.append(GENERATION_ERROR_MESSAGE)
+                    yield 'token', GENERATION_ERROR_MESSAGE
+                
+                result = self._finish_answer(query, relevant_docs, self._join_pieces(pieces))
+                yield 'sources', result['sources']
+                return
+        
+        yield 'token', result['answer']
+        yield 'sources', result['sources']
+    
+    async def process_query_async(self, query):
+        """Asynchronous ``process_query``.
+        
+        Embedding, FAISS search, cache lookups and pandas work run in a
+        thread pool while the Gemini call is awaited, so a single event loop
+        can keep many generations in flight.
+        """
+        started = time.perf_counter()
+        route = await self._route_async(query)
+        try:
+            if route == ROUTE_STOCK:
+                return await self._run_blocking(self._stock_result, query)
+            return await self._rag_result_async(query)
+        finally:
+            self._record_route(route, started)
+    
+    async def _rag_result_async(self, query):
+        """Asynchronous ``_rag_result``"""
+        relevant_docs, cached = await self._run_blocking(self._retrieve, query)
         
         if not relevant_docs:
             return {
-                'answer': 'I don\'t have enough information to answer your question. Please try asking about stock prices or business performance.',
+                'answer': NO_CONTEXT_MESSAGE,
                 'sources': []
             }
         
-        answer = self.generate_answer(query, relevant_docs)
-        sources = list(set([doc['metadata']['source'] for doc in relevant_docs]))
+        if cached is not None:
+            return cached
         
+        answer = await self.generate_answer_async(query, relevant_docs)
+        return await self._run_blocking(self._finish_answer, query, relevant_docs, answer)
+    
+    async def process_query_stream_async(self, query):
+        """Asynchronous ``process_query_stream``"""
+        started = time.perf_counter()
+        route = await self._route_async(query)
+        try:
+            async for event in self._stream_routed_async(query, route):
+                yield event
+        finally:
+            self._record_route(route, started)
+    
+    async def _stream_routed_async(self, query, route):
+        """Asynchronous ``_stream_routed``"""
+        if route == ROUTE_STOCK:
+            result = await self._run_blocking(self._stock_result, query)
+        else:
+            relevant_docs, result = await self._run_blocking(self._retrieve, query)
+            if not relevant_docs:
+                result = {'answer': NO_CONTEXT_MESSAGE, 'sources': []}
+            
+            if result is None:
+                pieces = []
+                async for piece in self.generate_answer_stream_async(query, relevant_docs):
+                    pieces.append(piece)
+                    yield 'token', piece
+                
+                if not pieces:
+                    pieces.append(GENERATION_ERROR_MESSAGE)
+                    yield 'token', GENERATION_ERROR_MESSAGE
+                
+                result = await self._run_blocking(
+                    self._finish_answer, query, relevant_docs, self._join_pieces(pieces)
+                )
+                yield 'sources', result['sources']
+                return
+        
+        yield 'token', result['answer']
+        yield 'sources', result['sources']
+    
+    async def _route_async(self, query):
+        """Route by rules on the event loop, classifying ambiguous questions in the thread pool"""
+        with span('route'):
+            route = self.router.route(query, classify=False)
+            if route is None:
+                route = await self._run_blocking(self.router.route, query)
+        return route
+    
+    def _retrieve(self, query):
+        """Search for context and look up a cached answer for it"""
+        relevant_docs = self._rerank([query], [self.search(query, k=self._retrieval_depth())])[0]
+        cached = self._cached_answer(query, relevant_docs) if relevant_docs else None
+        return relevant_docs, cached
+    
+    def _retrieval_depth(self):
+        """Chunks to retrieve per question: reranking starts from a wider candidate set"""
+        return RERANK_CANDIDATES if self.reranker is not None else DEFAULT_SEARCH_RESULTS
+    
+    def _rerank(self, queries, docs_per_query):
+        """Rerank retrieved chunks, falling back to the top search results if the cross-encoder fails"""
+        if self.reranker is None or not any(docs_per_query):
+            return docs_per_query
+        try:
+            with span('rerank'):
+                return self.reranker.rerank_many(queries, docs_per_query)
+        except Exception as e:
+            print(f"Error reranking results: {e}")
+            return [docs[:DEFAULT_SEARCH_RESULTS] for docs in docs_per_query]
+    
+    @staticmethod
+    def _join_pieces(pieces):
+        """Full answer from streamed pieces; failed streams become the error message"""
+        if pieces[-1] == GENERATION_ERROR_MESSAGE:
+            return GENERATION_ERROR_MESSAGE
+        return ''.join(pieces)
+    
+    def _run_blocking(self, func, *args):
+        """Run CPU-bound or blocking work in the RAG thread pool"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=ASYNC_EXECUTOR_WORKERS, thread_name_prefix='rag')
+        # run_in_executor does not carry context variables, so bind the request's trace
+        return asyncio.get_running_loop().run_in_executor(self._executor, bind(func), *args)
+    
+    def _get_async_llm(self):
+        """Asynchronous Gemini client, created inside the running event loop"""
+        if self._async_llm is None:
+            # httpx is only needed by the asynchronous serving path
+            from gemini_client import AsyncGeminiClient
+            self._async_llm = AsyncGeminiClient()
+        return self._async_llm
+    
+    async def aclose(self):
+        """Release the resources used by the asynchronous serving path"""
+        if self._async_llm is not None:
+            await self._async_llm.aclose()
+            self._async_llm = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
+    def _stock_result(self, query):
+        """Answer a stock question from the price data of the ticker it names"""
+        with span('stock'):
+            analyzer = self._analyzer_for(query)
+            answer = analyzer.get_stock_stats_response(query)
         return {
+            'answer': answer,
+            'sources': [analyzer.source or STOCK_DATA_FILE]
+        }
+    
+    def _analyzer_for(self, query):
+        """StockAnalyzer for the stored ticker a question names, the default ticker otherwise"""
+        ticker = self.router.find_ticker(query)
+        if ticker is None:
+            return self.stock_analyzer
+        with self._stock_lock:
+            analyzer = self._stock_analyzers.get(ticker)
+            if analyzer is None:
+                analyzer = StockAnalyzer(ticker, self.stock_store)
+                self._stock_analyzers[ticker] = analyzer
+            return analyzer
+    
+    def _cached_answer(self, query, relevant_docs):
+        """Look up an exact or semantically similar cached answer"""
+        with span('cache_lookup'):
+            return self._lookup_answer(query, relevant_docs)
+    
+    def _lookup_answer(self, query, relevant_docs):
+        """``_cached_answer`` without the span"""
+        # Identical questions over the same retrieved chunks reuse the cached answer
+        if self.answer_cache is not None:
+            cached = self.answer_cache.get(self._answer_cache_key(query, relevant_docs))
+            if cached is not None:
+                return dict(cached)
+        
+        # Paraphrases that retrieved the same chunks reuse a semantically cached answer
+        if self.semantic_cache is not None:
+            chunk_ids = [doc['id'] for doc in relevant_docs]
+            cached = self.semantic_cache.lookup(self._encode_query(query), chunk_ids, self.index_version)
+            if cached is not None:
+                return dict(cached)
+        
+        return None
+    
+    def _finish_answer(self, query, relevant_docs, answer):
+        """Build the response for a generated answer and cache it when it succeeded"""
+        sources = list(set([doc['metadata']['source'] for doc in relevant_docs]))
+        
+        result = {
             'answer': answer,
             'sources': sources
         }
+        if answer != GENERATION_ERROR_MESSAGE:
+            if self.answer_cache is not None:
+                self.answer_cache.put(self._answer_cache_key(query, relevant_docs), result)
+            if self.semantic_cache is not None:
+                chunk_ids = [doc['id'] for doc in relevant_docs]
+                self.semantic_cache.add(self._encode_query(query), chunk_ids, self.index_version, result)
+        
+        return result
+    
+    def _answer_cache_key(self, query, relevant_docs):
+        """Key combining the normalised query, retrieved chunk ids and index version"""
+        chunk_ids = ','.join(str(doc['id']) for doc in relevant_docs)
+        key = f"{self.index_version}|{chunk_ids}|{normalize_query(query)}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
@@ -0,0 +1,111 @@
+"""
+Cross-encoder reranking of retrieved chunks for FinSage Pro
+"""
+
+import threading
+import time
+from cache import LRUCache, normalize_query
+
+
+class Reranker:
+    """Rescore retrieved chunks with a cross-encoder and trim them to a budget.
+
+    The cross-encoder reads each (question, chunk) pair together, which
+    ranks far better than embedding distance but costs a forward pass per
+    pair, so it only sees the candidates the index returned. Pairs are
+    scored in batches and their scores cached per normalised question and
+    chunk id. ``select`` keeps the best chunks scoring at least
+    ``min_score`` until ``token_budget`` tokens are used; the best chunk
+    is always kept so the model can still say what is missing.
+    """
+
+    def __init__(self, model_name, batch_size=32, cache_size=4096, min_score=0.0, token_budget=600,
+                 count_tokens=None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.min_score = min_score
+        self.token_budget = token_budget
+        self.count_tokens = count_tokens
+        self.cache = LRUCache(cache_size)
+        self._model = None
+        self._lock = threading.Lock()
+        self._counters = {'calls': 0, 'pairs_scored': 0, 'total_seconds': 0.0}
+
+    def _get_model(self):
+        """Load the cross-encoder on first use"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name)
+        return self._model
+
+    def load(self):
+        """Load the cross-encoder now instead of on first use"""
+        self._get_model()
+
+    def warm_up(self, queries, docs_per_query):
+        """Run the cross-encoder once on sample pairs, without caching the scores or counting the call"""
+        pairs = [(query, doc['content']) for query, docs in zip(queries, docs_per_query) for doc in docs]
+        self._get_model().predict(pairs[:self.batch_size] or [(query, query) for query in queries],
+                                  batch_size=self.batch_size, show_progress_bar=False)
+
+    def score_many(self, queries, docs_per_query):
+        """Cross-encoder scores for each query's docs, scoring all cache misses in one batched call"""
+        started = time.perf_counter()
+        keys = [normalize_query(query) for query in queries]
+        scores = [[self.cache.get(f"{key}|{doc['id']}") for doc in docs] for key, docs in zip(keys, docs_per_query)]
+
+        missing = [(row, col) for row, row_scores in enumerate(scores) for col, score in enumerate(row_scores)
+                   if score is None]
+        if missing:
+            pairs = [(queries[row], docs_per_query[row][col]['content']) for row, col in missing]
+            predicted = self._get_model().predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            for (row, col), score in zip(missing, predicted):
+                scores[row][col] = float(score)
+                self.cache.put(f"{keys[row]}|{docs_per_query[row][col]['id']}", float(score))
+
+        with self._lock:
+            self._counters['calls'] += 1
+            self._counters['pairs_scored'] += len(missing)
+            self._counters['total_seconds'] += time.perf_counter() - started
+        return scores
+
+    def select(self, docs, scores):
+        """Best-first docs above the score cutoff that fit in the token budget"""
+        ranked = sorted(zip(docs, scores), key=lambda pair: pair[1], reverse=True)
+        ranked = [pair for i, pair in enumerate(ranked) if i == 0 or pair[1] >= self.min_score]
+        if self.count_tokens is not None:
+            tokens = self.count_tokens([doc['content'] for doc, _ in ranked])
+        else:
+            tokens = [len(doc['content'].split()) for doc, _ in ranked]
+
+        selected = []
+        used = 0
+        for (doc, score), count in zip(ranked, tokens):
+            if selected and used + count > self.token_budget:
+                break
+            selected.append(dict(doc, score=score, retrieval_score=doc['score']))
+            used += count
+        return selected
+
+    def rerank(self, query, docs):
+        """Rerank one query's retrieved docs and trim them to the budget"""
+        return self.rerank_many([query], [docs])[0]
+
+    def rerank_many(self, queries, docs_per_query):
+        """``rerank`` for many queries with a single cross-encoder call"""
+        scores = self.score_many(queries, docs_per_query)
+        return [self.select(docs, row_scores) if docs else [] for docs, row_scores in zip(docs_per_query, scores)]
+
+    def stats(self):
+        """Scoring calls, pairs scored, mean latency and score cache counters"""
+        with self._lock:
+            calls = self._counters['calls']
+            stats = {
+                'calls': calls,
+                'pairs_scored': self._counters['pairs_scored'],
+                'mean_ms': self._counters['total_seconds'] / calls * 1000 if calls else 0.0
+            }
+        stats['score_cache'] = self.cache.stats()
+        return stats
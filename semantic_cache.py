@@ -0,0 +1,117 @@
+"""
+Semantic answer cache for FinSage Pro
+"""
+
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+class SemanticCache:
+    """Reuse answers for paraphrased questions.
+
+    Past query embeddings live in a small inner-product FAISS index. A new
+    question hits when a cached question is at least ``threshold`` cosine
+    similar and retrieved exactly the same chunks from the same index
+    version, so the answer was generated from identical context. Entries
+    are evicted least recently used first once ``maxsize`` is reached.
+    """
+
+    # Neighbours inspected per lookup; later ones may match on retrieved chunks
+    CANDIDATES = 5
+
+    def __init__(self, maxsize, threshold, ttl=None):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl = ttl
+        self._index = None
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.array(embedding, dtype='float32').reshape(1, -1)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def lookup(self, embedding, chunk_ids, index_version):
+        """Return the cached answer for a similar question, or None"""
+        with self._lock:
+            self.lookups += 1
+            if self._index is None or not self._entries:
+                return None
+
+            scores, ids = self._index.search(self._normalize(embedding), self.CANDIDATES)
+            chunk_key = frozenset(chunk_ids)
+            now = time.monotonic()
+
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id < 0 or score < self.threshold:
+                    break
+                entry = self._entries.get(int(entry_id))
+                if entry is None:
+                    continue
+                if entry['expires_at'] is not None and entry['expires_at'] <= now:
+                    self._remove(int(entry_id))
+                    self.expirations += 1
+                    continue
+                if entry['chunks'] == chunk_key and entry['version'] == index_version:
+                    self._entries.move_to_end(int(entry_id))
+                    self.hits += 1
+                    return entry['value']
+
+            return None
+
+    def add(self, embedding, chunk_ids, index_version, value):
+        """Cache an answer for a question embedding"""
+        if self.maxsize <= 0:
+            return
+
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._index is None:
+                # FAISS is imported on first use so importing this module stays cheap
+                import faiss
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.array([entry_id], dtype='int64'))
+            self._entries[entry_id] = {
+                'value': value,
+                'chunks': frozenset(chunk_ids),
+                'version': index_version,
+                'expires_at': time.monotonic() + self.ttl if self.ttl else None
+            }
+
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, entry_id):
+        del self._entries[entry_id]
+        self._index.remove_ids(np.array([entry_id], dtype='int64'))
+
+    def stats(self):
+        """Counters, including how many LLM calls were avoided"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'threshold': self.threshold,
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'misses': self.lookups - self.hits,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'llm_calls_saved': self.hits,
+                'hit_rate': self.hits / self.lookups if self.lookups else 0.0
+            }
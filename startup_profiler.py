@@ -0,0 +1,159 @@
+"""
+Startup profiler for FinSage Pro
+
+Enabled with STARTUP_PROFILE=true or the --profile-startup flag, it times
+each startup phase and the import of every top-level package, and prints
+the breakdown once the RAG system is ready:
+
+    python app.py --profile-startup
+
+The app imports this module before anything else so the import timer
+sees every package the app pulls in.
+"""
+
+import sys
+import threading
+import time
+from config import STARTUP_PROFILE
+
+
+ENABLED = STARTUP_PROFILE or '--profile-startup' in sys.argv
+
+
+class ImportTimer:
+    """Meta path finder timing the import of each top-level package.
+
+    Self time excludes other top-level packages imported while the package
+    was executing, so the times of all packages add up to the time spent
+    importing.
+    """
+
+    def __init__(self):
+        self.times = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def find_spec(self, name, path=None, target=None):
+        if '.' in name or name in self.times or getattr(self._local, 'finding', False):
+            return None
+        # Let the other finders locate the module, then time its execution
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+        if spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+            return spec
+        spec.loader = TimedLoader(spec.loader, self)
+        return spec
+
+    def begin(self):
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append([time.perf_counter(), 0.0])
+
+    def end(self, name):
+        started, children = self._local.stack.pop()
+        elapsed = time.perf_counter() - started
+        if self._local.stack:
+            self._local.stack[-1][1] += elapsed
+        with self._lock:
+            self.times[name] = {'cumulative': elapsed, 'self': elapsed - children}
+
+
+class TimedLoader:
+    """Loader wrapper that times exec_module and then gets out of the way"""
+
+    def __init__(self, loader, timer):
+        self.loader = loader
+        self.timer = timer
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Put the real loader back so nothing downstream sees the wrapper
+        module.__spec__.loader = self.loader
+        module.__loader__ = self.loader
+        self.timer.begin()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer.end(module.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class StartupProfiler:
+    """Wall time and imported packages of consecutive startup phases"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.timer = ImportTimer()
+        self.reported = False
+        self._last = self.started
+        self._modules = self._top_level()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _top_level():
+        return {name.partition('.')[0] for name in list(sys.modules)}
+
+    def mark(self, name):
+        """End the current phase, naming it ``name``"""
+        with self._lock:
+            now = time.perf_counter()
+            modules = self._top_level()
+            self.phases.append({
+                'phase': name,
+                'seconds': now - self._last,
+                'imports': sorted(modules - self._modules)
+            })
+            self._last = now
+            self._modules = modules
+
+    def report(self, top=5):
+        """Print the phase and import breakdown, once"""
+        with self._lock:
+            if self.reported:
+                return
+            self.reported = True
+            times = dict(self.timer.times)
+
+        print(f"Startup profile ({time.perf_counter() - self.started:.2f}s since the profiler was imported):")
+        for phase in self.phases:
+            imports = sorted(phase['imports'], key=lambda name: -times.get(name, {}).get('self', 0))
+            slowest = ', '.join(f"{name} {times[name]['self']:.2f}s" for name in imports[:top] if name in times)
+            print(f"  {phase['phase']:<16} {phase['seconds']:7.2f}s  {len(imports)} packages imported"
+                  + (f" (slowest: {slowest})" if slowest else ''))
+
+        total = sum(entry['self'] for entry in times.values())
+        print(f"  importing took {total:.2f}s in all; slowest packages:")
+        for name, entry in sorted(times.items(), key=lambda item: -item[1]['self'])[:top * 2]:
+            print(f"    {name:<28} self {entry['self']:6.3f}s  cumulative {entry['cumulative']:6.3f}s")
+
+
+profiler = StartupProfiler() if ENABLED else None
+
+if profiler is not None:
+    sys.meta_path.insert(0, profiler.timer)
+
+
+def mark(name):
+    """End the current startup phase when profiling is enabled"""
+    if profiler is not None:
+        profiler.mark(name)
+
+
+def report():
+    """Print the startup profile when profiling is enabled"""
+    if profiler is not None:
+        profiler.report()
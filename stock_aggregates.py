@@ -0,0 +1,191 @@
+"""
+Precomputed price aggregates for fast stock range queries
+"""
+
+import numpy as np
+
+
+# Rollup periods and the per-bucket arrays kept for each
+PERIODS = ('year', 'quarter', 'month', 'week')
+ROLLUP_FIELDS = ('codes', 'start', 'end', 'open', 'high', 'low', 'close', 'mean', 'count')
+
+
+def _sparse_table(values, reduce):
+    """Sparse table answering idempotent range reductions (min/max) in O(1).
+
+    Level k holds ``reduce`` over every window of length 2**k.
+    """
+    table = [values]
+    width = 1
+    while width * 2 <= len(values):
+        previous = table[-1]
+        table.append(reduce(previous[:-width], previous[width:]))
+        width *= 2
+    return table
+
+
+def _period_codes(dates):
+    """Sortable integer bucket codes for every date, per period"""
+    import pandas as pd
+    index = pd.DatetimeIndex(dates)
+    iso = index.isocalendar()
+    return {
+        'year': index.year.to_numpy(dtype='int64'),
+        'quarter': index.year.to_numpy(dtype='int64') * 10 + index.quarter.to_numpy(dtype='int64'),
+        'month': index.year.to_numpy(dtype='int64') * 100 + index.month.to_numpy(dtype='int64'),
+        'week': iso['year'].to_numpy(dtype='int64') * 100 + iso['week'].to_numpy(dtype='int64')
+    }
+
+
+def period_code(period, year, number=None):
+    """Bucket code for a year, (year, quarter), (year, month) or (ISO year, week)"""
+    if period == 'year':
+        return year
+    if period == 'quarter':
+        return year * 10 + number
+    return year * 100 + number
+
+
+class PriceAggregates:
+    """Rollups and range-query structures over a date-sorted price series.
+
+    Built once at load time: per-year, -quarter, -month and -week OHLC,
+    min, max, mean and count rollups, plus prefix sums for range means and
+    sparse tables for range min/max. Any contiguous date range is then
+    answered with two binary searches and O(1) lookups, without touching
+    the raw rows.
+
+    Everything lives in the flat ``arrays`` mapping, which the stock store
+    saves next to the price columns and passes back memory-mapped, so
+    workers share one copy instead of rebuilding it for every ticker.
+    """
+
+    def __init__(self, dates, prices, arrays=None):
+        self.dates = np.asarray(dates, dtype='datetime64[ns]')
+        self.prices = np.asarray(prices, dtype='float64')
+        self.arrays = self._build_arrays() if arrays is None else arrays
+
+        # Level 0 of both sparse tables is the price column itself
+        levels = range(1, max(len(self.prices).bit_length() - 1, 0) + 1)
+        self.prefix_sum = self.arrays['prefix_sum']
+        self._min_table = [self.prices] + [self.arrays[f"min_{level}"] for level in levels]
+        self._max_table = [self.prices] + [self.arrays[f"max_{level}"] for level in levels]
+
+        self.rollups = {
+            period: {field: self.arrays[f"{period}_{field}"] for field in ROLLUP_FIELDS}
+            for period in PERIODS
+        }
+
+    def __len__(self):
+        return len(self.prices)
+
+    def _build_arrays(self):
+        """Compute the prefix sums, sparse table levels and rollups"""
+        arrays = {'prefix_sum': np.concatenate([[0.0], np.cumsum(self.prices)])}
+        for name, reduce in (('min', np.minimum), ('max', np.maximum)):
+            for level, values in enumerate(_sparse_table(self.prices, reduce)[1:], 1):
+                arrays[f"{name}_{level}"] = values
+        for period, codes in _period_codes(self.dates).items():
+            for field, values in self._build_rollup(codes).items():
+                arrays[f"{period}_{field}"] = values
+        return arrays
+
+    def _build_rollup(self, codes):
+        """OHLC/min/max/mean/count per bucket of consecutive equal codes"""
+        starts = np.flatnonzero(np.diff(codes, prepend=codes[:1] - 1)).astype('int64')
+        ends = np.append(starts[1:], len(codes)).astype('int64')[:len(starts)]
+        counts = ends - starts
+        high = np.maximum.reduceat(self.prices, starts)
+        low = np.minimum.reduceat(self.prices, starts)
+
+        return {
+            'codes': codes[starts],
+            'start': starts,
+            'end': ends,
+            'open': self.prices[starts],
+            'high': high,
+            'low': low,
+            'close': self.prices[ends - 1],
+            'mean': np.add.reduceat(self.prices, starts) / counts,
+            'count': counts
+        }
+
+    def date_range(self, start=None, end=None):
+        """Row slice (lo, hi) covering start <= date <= end by binary search"""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, 'ns'), side='left'))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, 'ns'), side='right'))
+        return lo, max(lo, hi)
+
+    def _bucket_index(self, period, code):
+        """Position of a bucket by binary search over its sorted codes, or None"""
+        codes = self.rollups[period]['codes']
+        i = int(np.searchsorted(codes, code))
+        return i if i < len(codes) and codes[i] == code else None
+
+    def bucket_range(self, period, code):
+        """Row slice of one precomputed bucket, or None if it has no data"""
+        rollup = self.rollups[period]
+        i = self._bucket_index(period, code)
+        if i is None:
+            return None
+        return int(rollup['start'][i]), int(rollup['end'][i])
+
+    def bucket_stats(self, period, code):
+        """Precomputed statistics of one bucket, or None if it has no data"""
+        rollup = self.rollups[period]
+        i = self._bucket_index(period, code)
+        if i is None:
+            return None
+
+        return self._format_stats(
+            int(rollup['start'][i]),
+            int(rollup['end'][i]),
+            highest=rollup['high'][i],
+            lowest=rollup['low'][i],
+            average=rollup['mean'][i],
+            first=rollup['open'][i]
+        )
+
+    def range_min(self, lo, hi):
+        return self._query_table(self._min_table, lo, hi, np.minimum)
+
+    def range_max(self, lo, hi):
+        return self._query_table(self._max_table, lo, hi, np.maximum)
+
+    def range_mean(self, lo, hi):
+        return (self.prefix_sum[hi] - self.prefix_sum[lo]) / (hi - lo)
+
+    @staticmethod
+    def _query_table(table, lo, hi, reduce):
+        """Reduce rows [lo, hi) with two overlapping power-of-two windows"""
+        level = int(hi - lo).bit_length() - 1
+        width = 1 << level
+        return float(reduce(table[level][lo], table[level][hi - width]))
+
+    def range_stats(self, lo, hi):
+        """Statistics of rows [lo, hi) in O(1), or None for an empty range"""
+        lo, hi = int(lo), int(hi)
+        if hi <= lo:
+            return None
+
+        return self._format_stats(
+            lo,
+            hi,
+            highest=self.range_max(lo, hi),
+            lowest=self.range_min(lo, hi),
+            average=self.range_mean(lo, hi),
+            first=self.prices[lo]
+        )
+
+    def _format_stats(self, lo, hi, highest, lowest, average, first):
+        import pandas as pd
+        return {
+            'highest': float(highest),
+            'lowest': float(lowest),
+            'average': float(average),
+            'first': float(first),
+            'latest': float(self.prices[hi - 1]),
+            'period_start': pd.Timestamp(self.dates[lo]),
+            'period_end': pd.Timestamp(self.dates[hi - 1]),
+            'total_records': hi - lo
+        }
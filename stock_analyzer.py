@@ -2,35 +2,105 @@
 Stock data analysis module for Bajaj Finserv
 """
 
-import pandas as pd
-import re
-from config import STOCK_DATA_FILE
+import threading
+import numpy as np
+from config import DEFAULT_TICKER
+from indicators import IndicatorEngine, detect_indicator
+from query_router import QueryRouter, ROUTE_STOCK
+from stock_aggregates import PriceAggregates
+from stock_store import StockStore, PRICE_COLUMNS, stock_sources
 
 
 class StockAnalyzer:
-    def __init__(self):
-        self.df = None
+    def __init__(self, ticker=None, store=None):
+        self.ticker = (ticker or DEFAULT_TICKER).upper()
+        self.name = 'Bajaj Finserv' if self.ticker == DEFAULT_TICKER else self.ticker
+        self.store = store or StockStore()
+        self.source = None
+        self.columns = None
+        self._signature = None
+        self._aggregates = None
+        self._indicators = None
+        self._df = None
+        self._router = None
+        self._lock = threading.Lock()
         self.load_data()
     
     def load_data(self):
-        """Load stock price data from CSV"""
+        """Memory-map the ticker's price columns, importing its CSV if it changed"""
         try:
-            self.df = pd.read_csv(STOCK_DATA_FILE)
-            self.df['Date'] = pd.to_datetime(self.df['Date'], dayfirst=True)
-            print(f"Loaded {len(self.df)} stock price records")
+            source = stock_sources().get(self.ticker)
+            if source is not None:
+                self.store.sync({self.ticker: source})
+            self.columns = self.store.load(self.ticker)
+            if self.columns is None:
+                raise ValueError(f"no price data stored for {self.ticker}")
+            info = self.store.info(self.ticker)
+            self.source = info['source']
+            self._signature = info['signature']
+            self._reset()
+            # Map the aggregates and build the indicators now, before the app reports ready
+            # and before Gunicorn forks, rather than on the first stock question
+            self.aggregates
+            self.indicators
+            print(f"Loaded {len(self.columns['close'])} stock price records for {self.ticker}")
         except Exception as e:
             print(f"Error loading stock data: {e}")
-            self.df = None
+            self.columns = None
+            self._reset()
+    
+    def _reset(self):
+        """Drop views built over the previous columns"""
+        with self._lock:
+            self._aggregates = None
+            self._indicators = None
+            self._df = None
+    
+    @property
+    def aggregates(self):
+        """Range aggregates over the close prices, mapped from the store when the data is loaded"""
+        if self.columns is None:
+            return None
+        with self._lock:
+            if self._aggregates is None:
+                self._aggregates = self.store.load_aggregates(self.ticker, self.columns)
+            if self._aggregates is None:
+                self._aggregates = PriceAggregates(self.columns['dates'], self.columns['close'])
+            return self._aggregates
+    
+    @property
+    def indicators(self):
+        """Technical indicator engine, built when the data is loaded"""
+        if self.columns is None:
+            return None
+        with self._lock:
+            if self._indicators is None:
+                self._indicators = IndicatorEngine(self.columns['dates'], self.columns['close'], version=self._signature)
+            return self._indicators
+    
+    @property
+    def df(self):
+        """DataFrame over the memory-mapped columns, built on first use"""
+        if self.columns is None:
+            return None
+        if self._df is None:
+            import pandas as pd
+            data = {'Date': self.columns['dates']}
+            for column, name in PRICE_COLUMNS.items():
+                if name in self.columns:
+                    data[column] = self.columns[name]
+            self._df = pd.DataFrame(data, copy=False)
+        return self._df
     
     def get_stock_summary(self):
         """Generate stock data summary for RAG context"""
-        if self.df is None:
+        if self.columns is None:
             return None
         
         stats = self._calculate_stats()
         
         summary = f"""
-        Bajaj Finserv Stock Price Data Summary:
+        {self.name} Stock Price Data Summary:
         - Total records: {stats['total_records']}
         - Date range: {stats['date_range']}
         - Highest price: ₹{stats['highest_price']:.2f}
@@ -38,60 +108,87 @@ class StockAnalyzer:
         - Average price: ₹{stats['average_price']:.2f}
         - Latest price: ₹{stats['latest_price']:.2f} on {stats['latest_date']}
         
-        The stock price data covers daily closing prices for Bajaj Finserv shares.
+        The stock price data covers daily closing prices for {self.name} shares.
         This data can be used for price analysis, trend identification, and performance evaluation.
         """
         
         return {
             'content': summary,
-            'source': STOCK_DATA_FILE,
+            'source': self.source,
             'type': 'stock_data'
         }
     
     def _calculate_stats(self):
         """Calculate basic statistics from stock data"""
-        if self.df is None:
+        if self.columns is None or len(self.columns['close']) == 0:
             return {}
         
+        # Read straight from the memory-mapped columns
+        prices = self.columns['close']
+        first, last = np.datetime_as_string(self.columns['dates'][[0, -1]], unit='D')
         return {
-            'total_records': len(self.df),
-            'date_range': f"{self.df['Date'].min().strftime('%Y-%m-%d')} to {self.df['Date'].max().strftime('%Y-%m-%d')}",
-            'highest_price': self.df['Close Price'].max(),
-            'lowest_price': self.df['Close Price'].min(),
-            'average_price': self.df['Close Price'].mean(),
-            'latest_price': self.df.iloc[-1]['Close Price'],
-            'latest_date': self.df.iloc[-1]['Date'].strftime('%Y-%m-%d')
+            'total_records': len(prices),
+            'date_range': f"{first} to {last}",
+            'highest_price': float(np.max(prices)),
+            'lowest_price': float(np.min(prices)),
+            'average_price': float(np.mean(prices)),
+            'latest_price': float(prices[-1]),
+            'latest_date': last
         }
     
+    def _query_period(self, query):
+        """Date range named by the query, resolved against the latest price date"""
+        if len(self.aggregates) == 0:
+            return None
+        # Date parsing needs pandas, so it is imported with the first stock question
+        from date_parser import parse_date_range
+        return parse_date_range(query, anchor=self.aggregates.dates[-1])
+    
+    def _period_rows(self, period):
+        """Row slice (start, end) of the sorted data inside a period, by binary search"""
+        if period is None:
+            return 0, len(self.aggregates)
+        if 'bucket' in period:
+            return self.aggregates.bucket_range(*period['bucket']) or (0, 0)
+        start, end = self.aggregates.date_range(period['start'], period['end'])
+        if 'rows' in period:
+            start = max(start, end - period['rows'])
+        return start, end
+    
     def get_filtered_data(self, query):
-        """Filter stock data based on query (e.g., by year)"""
+        """Filter stock data based on query (e.g., by year, quarter or date range)"""
         if self.df is None:
             return None
         
-        # Extract year from query if present
-        year_match = re.search(r'(\d{4})', query)
-        if year_match:
-            year = int(year_match.group(1))
-            filtered_df = self.df[self.df['Date'].dt.year == year]
-            if filtered_df.empty:
-                return None
-            return filtered_df
-        
-        return self.df
+        start, end = self._period_rows(self._query_period(query))
+        if end <= start:
+            return None
+        return self.df.iloc[start:end]
     
     def get_stock_stats_response(self, query):
         """Generate response for stock-specific queries"""
-        if self.df is None:
+        if self.aggregates is None:
             return "Sorry, I couldn't load the stock price data."
         
-        filtered_df = self.get_filtered_data(query)
-        if filtered_df is None:
-            year_match = re.search(r'(\d{4})', query)
-            if year_match:
-                return f"No stock data available for {year_match.group(1)}."
+        period = self._query_period(query)
+        start, end = self._period_rows(period)
+        if end <= start:
+            if period is not None:
+                return f"No stock data available for the requested period ({period['label']})."
             return "No data available for the specified criteria."
         
-        stats = self._calculate_stats_for_df(filtered_df)
+        indicator = detect_indicator(query)
+        if indicator is not None:
+            return self._indicator_response(indicator[0], indicator[1], start, end)
+        
+        if end - start == 1:
+            return f"{self.name} stock closed at ₹{self.aggregates.prices[start]:.2f} on {self._format_date(start)}."
+        
+        if period is not None and 'bucket' in period:
+            stats = self.aggregates.bucket_stats(*period['bucket'])
+        else:
+            stats = self.aggregates.range_stats(start, end)
+        stats = self._format_period(stats)
         
         if 'highest' in query.lower():
             return f"The highest stock price was ₹{stats['highest']:.2f} during the period {stats['period_start']} to {stats['period_end']}."
@@ -108,19 +205,64 @@ class StockAnalyzer:
 • Latest Price: ₹{stats['latest']:.2f}
 • Total Records: {stats['total_records']}"""
     
-    def _calculate_stats_for_df(self, df):
-        """Calculate statistics for a specific dataframe"""
-        return {
-            'highest': df['Close Price'].max(),
-            'lowest': df['Close Price'].min(),
-            'average': df['Close Price'].mean(),
-            'latest': df.iloc[-1]['Close Price'],
-            'period_start': df['Date'].min().strftime('%d-%b-%Y'),
-            'period_end': df['Date'].max().strftime('%d-%b-%Y'),
-            'total_records': len(df)
-        }
+    def _indicator_response(self, indicator, window, start, end):
+        """Answer a technical-indicator question over rows [start, end)"""
+        engine = self.indicators
+        period_start = self._format_date(start)
+        period_end = self._format_date(end - 1)
+        
+        if indicator in ('sma', 'ema', 'rsi'):
+            series = {'sma': engine.sma, 'ema': engine.ema, 'rsi': engine.rsi}[indicator](window)
+            label = {
+                'sma': f"{window}-day simple moving average",
+                'ema': f"{window}-day exponential moving average",
+                'rsi': f"{window}-day RSI"
+            }[indicator]
+            value = series[end - 1]
+            if value != value:
+                return f"Not enough price history to compute the {label} on {period_end}."
+            if indicator == 'rsi':
+                return f"The {label} was {value:.1f} on {period_end} (above 70 is usually read as overbought, below 30 as oversold)."
+            return f"The {label} was ₹{value:.2f} on {period_end}, against a close of ₹{engine.prices[end - 1]:.2f}."
+        
+        if end - start < 2:
+            return f"Not enough price data between {period_start} and {period_end} to calculate this."
+        
+        first = engine.prices[start]
+        last = engine.prices[end - 1]
+        if indicator == 'drawdown':
+            drawdown, peak, trough = engine.max_drawdown(start, end)
+            if drawdown >= 0:
+                return f"There was no drawdown during the period {period_start} to {period_end}; the price never closed below a previous peak."
+            return (f"The maximum drawdown was {-drawdown:.2%}, from a peak of ₹{engine.prices[peak]:.2f} on "
+                    f"{self._format_date(peak)} to ₹{engine.prices[trough]:.2f} on {self._format_date(trough)}, "
+                    f"during the period {period_start} to {period_end}.")
+        if indicator == 'volatility':
+            volatility = engine.volatility(start, end)
+            if volatility is None:
+                return f"Not enough price data between {period_start} and {period_end} to calculate volatility."
+            return f"The annualised volatility of daily returns was {volatility:.2%} during the period {period_start} to {period_end}."
+        if indicator == 'cagr':
+            cagr = engine.cagr(start, end)
+            if cagr is None:
+                return f"Not enough price data between {period_start} and {period_end} to calculate CAGR."
+            return f"The compound annual growth rate (CAGR) was {cagr:.2%}, from ₹{first:.2f} on {period_start} to ₹{last:.2f} on {period_end}."
+        return f"The stock returned {engine.period_return(start, end):+.2%} during the period {period_start} to {period_end} (₹{first:.2f} to ₹{last:.2f})."
+    
+    def _format_date(self, row):
+        import pandas as pd
+        return pd.Timestamp(self.aggregates.dates[row]).strftime('%d-%b-%Y')
+    
+    def _format_period(self, stats):
+        """Format aggregate statistics for display"""
+        return dict(
+            stats,
+            period_start=stats['period_start'].strftime('%d-%b-%Y'),
+            period_end=stats['period_end'].strftime('%d-%b-%Y')
+        )
     
     def is_stock_query(self, query):
         """Check if query is related to stock prices"""
-        stock_keywords = ['stock', 'price', 'highest', 'lowest', 'average', 'trading', 'share']
-        return any(word in query.lower() for word in stock_keywords)
+        if self._router is None:
+            self._router = QueryRouter(tickers=[self.ticker])
+        return self._router.route(query) == ROUTE_STOCK
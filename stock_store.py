@@ -0,0 +1,238 @@
+"""
+Columnar, memory-mapped stock price store for FinSage Pro
+"""
+
+import glob
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+import numpy as np
+from stock_aggregates import PriceAggregates
+from config import (
+    STOCK_STORE_DIR,
+    STOCK_DATA_FILE,
+    STOCK_DATA_DIR,
+    DEFAULT_TICKER
+)
+
+try:
+    import fcntl
+except ImportError:
+    # No fcntl on Windows, where the store is only written by a single process
+    fcntl = None
+
+
+# Bump whenever the on-disk layout changes so stale stores are ignored
+STORE_FORMAT_VERSION = 2
+
+# CSV price columns and the column files they are stored in
+PRICE_COLUMNS = {
+    'Open Price': 'open',
+    'High Price': 'high',
+    'Low Price': 'low',
+    'Close Price': 'close'
+}
+
+
+def stock_sources():
+    """Map every configured ticker to its price CSV"""
+    sources = {}
+    if STOCK_DATA_DIR:
+        for path in sorted(glob.glob(os.path.join(STOCK_DATA_DIR, '*.csv'))):
+            sources[os.path.splitext(os.path.basename(path))[0].upper()] = path
+    sources[DEFAULT_TICKER] = STOCK_DATA_FILE
+    return sources
+
+
+class StockStore:
+    """Date-sorted price columns for many tickers as ``.npy`` files.
+
+    Each ticker is stored as an int64 nanosecond timestamp column plus one
+    float64 column per price, in a directory named after the source CSV's
+    size and modification time, with the close price aggregates in an
+    ``aggregates`` subdirectory. Readers memory-map the columns, so every
+    worker on a machine shares the same page cache instead of holding its
+    own DataFrame, and a re-import switches to a new directory atomically
+    while existing mappings stay valid.
+    """
+
+    MANIFEST_FILE = 'manifest.json'
+    LOCK_FILE = 'manifest.lock'
+    AGGREGATES_DIR = 'aggregates'
+
+    def __init__(self, root=STOCK_STORE_DIR):
+        self.path = os.path.join(root, f"v{STORE_FORMAT_VERSION}")
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        """Load the store manifest, or start an empty one"""
+        manifest_path = os.path.join(self.path, self.MANIFEST_FILE)
+        try:
+            if os.path.exists(manifest_path):
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Error reading stock store manifest: {e}")
+        return {'tickers': {}}
+
+    def _save_manifest(self):
+        """Atomically write the manifest to disk"""
+        os.makedirs(self.path, exist_ok=True)
+        manifest_path = os.path.join(self.path, self.MANIFEST_FILE)
+        tmp_path = f"{manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+
+    @contextmanager
+    def _manifest_lock(self):
+        """Hold an exclusive lock on the manifest across worker processes"""
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, self.LOCK_FILE), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _update_manifest(self):
+        """Re-read the manifest under the lock, let the caller change it and write it back"""
+        with self._manifest_lock():
+            self.manifest = self._load_manifest()
+            yield self.manifest
+            self._save_manifest()
+
+    @staticmethod
+    def _signature(path):
+        """Size and modification time identifying a version of a CSV"""
+        stat = os.stat(path)
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+    def _ticker_dir(self, ticker):
+        return os.path.join(self.path, ticker)
+
+    def tickers(self):
+        """Tickers available in the store"""
+        return sorted(self.manifest['tickers'])
+
+    def info(self, ticker):
+        """Manifest entry of a ticker (source, rows, columns, dates), or None"""
+        return self.manifest['tickers'].get(ticker)
+
+    def is_current(self, ticker, path):
+        """Whether the stored columns match the CSV currently on disk"""
+        entry = self.info(ticker)
+        return (
+            entry is not None
+            and entry['source'] == path
+            and entry['signature'] == self._signature(path)
+            and os.path.isdir(os.path.join(self._ticker_dir(ticker), entry['signature']))
+        )
+
+    def import_csv(self, ticker, path):
+        """Convert one price CSV into date-sorted columns; returns the row count"""
+        import pandas as pd
+        df = pd.read_csv(path)
+        df['Date'] = pd.to_datetime(df['Date'], dayfirst=True)
+        df = df.dropna(subset=['Date', 'Close Price']).sort_values('Date', kind='stable')
+        columns = [column for column in PRICE_COLUMNS if column in df.columns]
+
+        signature = self._signature(path)
+        version_dir = os.path.join(self._ticker_dir(ticker), signature)
+        if not os.path.isdir(version_dir):
+            # Build the columns in a private directory and rename it into
+            # place, so readers never see a half-written ticker
+            tmp_dir = f"{version_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+            os.makedirs(tmp_dir, exist_ok=True)
+            dates = df['Date'].to_numpy(dtype='datetime64[ns]')
+            np.save(os.path.join(tmp_dir, 'dates.npy'), dates.view('int64'))
+            for column in columns:
+                np.save(os.path.join(tmp_dir, f"{PRICE_COLUMNS[column]}.npy"), df[column].to_numpy(dtype='float64'))
+            aggregates_dir = os.path.join(tmp_dir, self.AGGREGATES_DIR)
+            os.makedirs(aggregates_dir, exist_ok=True)
+            aggregates = PriceAggregates(dates, df['Close Price'].to_numpy(dtype='float64'))
+            for name, array in aggregates.arrays.items():
+                np.save(os.path.join(aggregates_dir, f"{name}.npy"), array)
+            try:
+                os.replace(tmp_dir, version_dir)
+            except OSError:
+                # Another worker imported the same version first
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        with self._update_manifest() as manifest:
+            manifest['tickers'][ticker] = {
+                'source': path,
+                'signature': signature,
+                'rows': len(df),
+                'columns': [PRICE_COLUMNS[column] for column in columns],
+                'start': df['Date'].iloc[0].strftime('%Y-%m-%d') if len(df) else None,
+                'end': df['Date'].iloc[-1].strftime('%Y-%m-%d') if len(df) else None
+            }
+
+            # Open mappings of older versions stay valid after their files are unlinked
+            for name in os.listdir(self._ticker_dir(ticker)):
+                if name != signature and not name.endswith('.tmp'):
+                    shutil.rmtree(os.path.join(self._ticker_dir(ticker), name), ignore_errors=True)
+
+        return len(df)
+
+    def sync(self, sources=None):
+        """Import every CSV that is new or changed since it was last stored"""
+        sources = stock_sources() if sources is None else sources
+        self.manifest = self._load_manifest()
+
+        for ticker, path in sources.items():
+            if not os.path.exists(path):
+                print(f"Warning: stock data file {path} not found")
+                continue
+            if self.is_current(ticker, path):
+                continue
+            try:
+                rows = self.import_csv(ticker, path)
+                print(f"Imported {rows} stock price records for {ticker}")
+            except Exception as e:
+                print(f"Error importing stock data for {ticker} from {path}: {e}")
+
+    def load(self, ticker):
+        """Memory-map the columns of a ticker, or return None if it is not stored"""
+        entry = self.info(ticker)
+        if entry is None:
+            return None
+
+        version_dir = os.path.join(self._ticker_dir(ticker), entry['signature'])
+        try:
+            columns = {'dates': np.load(os.path.join(version_dir, 'dates.npy'), mmap_mode='r').view('datetime64[ns]')}
+            for name in entry['columns']:
+                columns[name] = np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode='r')
+            return columns
+        except Exception as e:
+            print(f"Error loading stock data for {ticker}: {e}")
+            return None
+
+    def load_aggregates(self, ticker, columns):
+        """Memory-map the saved close price aggregates over ``columns``, or return None"""
+        entry = self.info(ticker)
+        if entry is None:
+            return None
+
+        aggregates_dir = os.path.join(self._ticker_dir(ticker), entry['signature'], self.AGGREGATES_DIR)
+        try:
+            arrays = {
+                name[:-len('.npy')]: np.load(os.path.join(aggregates_dir, name), mmap_mode='r')
+                for name in os.listdir(aggregates_dir) if name.endswith('.npy')
+            }
+            return PriceAggregates(columns['dates'], columns['close'], arrays)
+        except Exception as e:
+            print(f"Error loading stock aggregates for {ticker}: {e}")
+            return None
+
+
+if __name__ == '__main__':
+    store = StockStore()
+    store.sync()
+    print(f"Stock store holds {len(store.tickers())} tickers in {store.path}")
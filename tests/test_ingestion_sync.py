@@ -0,0 +1,62 @@
+"""
+Two RAG instances sharing one index store, as two Gunicorn workers do
+"""
+
+import pytest
+import rag_system
+from rag_system import SimpleRAG
+from benchmarks.stub_embedder import HashEmbedder
+
+
+NEW_DOC = "The zorblax platypus segment grew premiums by forty one percent this quarter. " * 20
+
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch):
+    """Two loaded instances on one store in an empty working directory, checking for changes on every search"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(rag_system, 'INGEST_SYNC_INTERVAL', 0)
+
+    def load():
+        rag = SimpleRAG()
+        rag._embeddings_model = HashEmbedder(dimension=64)
+        assert rag.create_vector_index()
+        return rag
+
+    return load(), load()
+
+
+def sources(rag, query):
+    return {doc['metadata']['source'] for doc in rag.search(query, k=3)}
+
+
+def test_ingestion_reaches_other_worker_after_its_own_manifest_write(workers):
+    a, b = workers
+    a.ingest_document('new_doc.txt', NEW_DOC)
+
+    # B's own write re-reads the manifest, which must not hide A's change
+    b._save_index()
+
+    assert 'new_doc.txt' in sources(b, 'zorblax platypus premiums')
+
+
+def test_deletion_reaches_other_worker_after_its_own_manifest_write(workers):
+    a, b = workers
+    a.ingest_document('new_doc.txt', NEW_DOC)
+    assert 'new_doc.txt' in sources(b, 'zorblax platypus premiums')
+
+    a.delete_document('new_doc.txt')
+    b._save_index()
+
+    assert 'new_doc.txt' not in sources(b, 'zorblax platypus premiums')
+
+
+def test_concurrent_ingestion_survives_restart(workers):
+    a, b = workers
+    a.ingest_document('a.txt', "Alpha wombat lending book expanded steadily. " * 20)
+    b.ingest_document('b.txt', "Beta quokka insurance premiums rose sharply. " * 20)
+
+    restarted = SimpleRAG()
+    restarted._embeddings_model = HashEmbedder(dimension=64)
+    assert restarted.create_vector_index()
+    assert {'a.txt', 'b.txt'} <= set(restarted.doc_hashes)
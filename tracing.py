@@ -0,0 +1,107 @@
+"""
+Per-request stage tracing for FinSage Pro
+"""
+
+import contextvars
+import threading
+import time
+from config import METRICS_ENABLED, TRACE_TIMINGS
+from metrics import STAGE_SECONDS
+
+
+# The trace of the request being handled, if timings are being collected
+_current_trace = contextvars.ContextVar('finsage_trace', default=None)
+
+
+class Trace:
+    """Stage timings of one request, collected by the spans run inside it.
+
+    Enter it around the work for a request; spans in the same context,
+    including work handed to thread pools with ``bind``, add their time to
+    it. Does nothing unless ``enabled`` (TRACE_TIMINGS by default).
+    """
+
+    def __init__(self, enabled=TRACE_TIMINGS):
+        self.enabled = enabled
+        self.stages = {}
+        self.total = 0.0
+        self._lock = threading.Lock()
+        self._token = None
+        self._started = None
+
+    def __enter__(self):
+        if self.enabled:
+            self._started = time.perf_counter()
+            self._token = _current_trace.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.enabled:
+            self.total = time.perf_counter() - self._started
+            _current_trace.reset(self._token)
+        return False
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def timings(self):
+        """Milliseconds per stage and in total"""
+        with self._lock:
+            stages = {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()}
+        return {'total_ms': round(self.total * 1000, 3), 'stages_ms': stages}
+
+    def attach(self, result):
+        """Copy of a response dict with the timings added, when tracing is enabled"""
+        if self.enabled:
+            return dict(result, timings=self.timings())
+        return result
+
+
+class Span:
+    """Times one pipeline stage into the stage histogram and the current trace"""
+
+    __slots__ = ('stage', 'trace', 'started')
+
+    def __init__(self, stage, trace):
+        self.stage = stage
+        self.trace = trace
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        STAGE_SECONDS.observe(elapsed, stage=self.stage)
+        if self.trace is not None:
+            self.trace.add(self.stage, elapsed)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(stage):
+    """Context manager timing a stage; free when metrics and tracing are both off"""
+    trace = _current_trace.get()
+    if trace is None and not METRICS_ENABLED:
+        return _NULL_SPAN
+    return Span(stage, trace)
+
+
+def bind(func):
+    """Wrap ``func`` to run in a copy of the caller's context, keeping its trace in worker threads"""
+    context = contextvars.copy_context()
+    return lambda *args: context.run(func, *args)
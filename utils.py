@@ -3,9 +3,157 @@ Utility functions for FinSage Pro
 """
 
 import os
+import threading
+import time
+from contextlib import contextmanager
 from config import TEMPLATES_DIR
 
 
+class ReadWriteLock:
+    """Lock allowing many concurrent readers or a single writer.
+
+    Writers are given priority so a steady stream of searches cannot starve
+    an index update.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read_lock(self):
+        with self._condition:
+            while self._writer or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write_lock(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+INIT_IDLE = 'idle'
+INIT_LOADING = 'loading'
+INIT_WARMING = 'warming'
+INIT_READY = 'ready'
+INIT_FAILED = 'failed'
+
+
+class BackgroundInitializer:
+    """Build an expensive object once, in a background thread.
+
+    ``start`` is single-flight: however many requests call it, one thread
+    runs ``load`` and then ``warm_up`` on the result, moving through the
+    loading, warming and ready states. The object is only published,
+    through ``value`` and ``on_ready``, once it is warm. A failed load
+    moves to the failed state, and ``start`` tries again once
+    ``retry_interval`` seconds have passed; a failed warm-up is only logged.
+    """
+
+    def __init__(self, load, warm_up=None, on_ready=None, retry_interval=30):
+        self.load = load
+        self.warm_up = warm_up
+        self.on_ready = on_ready
+        self.retry_interval = retry_interval
+        self.state = INIT_IDLE
+        self.error = None
+        self.value = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._changed = time.monotonic()
+        self._durations = {}
+
+    @property
+    def ready(self):
+        return self.state == INIT_READY
+
+    def _set_state(self, state):
+        now = time.monotonic()
+        with self._lock:
+            if self.state in (INIT_LOADING, INIT_WARMING):
+                self._durations[self.state] = now - self._changed
+            self.state = state
+            self._changed = now
+
+    def start(self, force=False):
+        """Begin initialising unless it is running, done, or failed too recently to retry"""
+        with self._lock:
+            if self.state in (INIT_LOADING, INIT_WARMING, INIT_READY):
+                return
+            if self.state == INIT_FAILED and not force and time.monotonic() - self._changed < self.retry_interval:
+                return
+            self.state = INIT_LOADING
+            self.error = None
+            self._changed = time.monotonic()
+            self._durations = {}
+            self._thread = threading.Thread(target=self._run, name='background-init', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            value = self.load()
+        except Exception as e:
+            print(f"Background initialization failed: {e}")
+            self.error = str(e)
+            self._set_state(INIT_FAILED)
+            return
+
+        if self.warm_up is not None:
+            self._set_state(INIT_WARMING)
+            try:
+                self.warm_up(value)
+            except Exception as e:
+                print(f"Warm-up failed: {e}")
+
+        self.value = value
+        if self.on_ready is not None:
+            self.on_ready(value)
+        self._set_state(INIT_READY)
+
+    def wait(self, timeout=None):
+        """Block until the running initialisation finishes; True if ready"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.ready
+
+    def retry_after(self, default=5):
+        """Seconds a client should wait before retrying a request"""
+        if self.state == INIT_FAILED:
+            return max(1, int(self.retry_interval - (time.monotonic() - self._changed)) + 1)
+        return default
+
+    def status(self):
+        """State, error, seconds in the current state and durations of finished phases"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'error': self.error,
+                'seconds_in_state': time.monotonic() - self._changed,
+                'durations': dict(self._durations)
+            }
+
+
 def ensure_templates_directory():
     """Ensure templates directory exists"""
     os.makedirs(TEMPLATES_DIR, exist_ok=True)
@@ -315,42 +463,139 @@ def get_html_template_content():
                 chatMessages.appendChild(typingIndicator);
                 chatMessages.scrollTop = chatMessages.scrollHeight;
 
-                processQuery(message)
-                    .then(response => {
-                        if (typingIndicator && typingIndicator.parentNode) {
-                            typingIndicator.parentNode.removeChild(typingIndicator);
-                        }
-                        addMessage(response.answer, 'assistant', response.sources);
-                    })
+                streamQuery(message, typingIndicator)
                     .catch(error => {
-                        if (typingIndicator && typingIndicator.parentNode) {
-                            typingIndicator.parentNode.removeChild(typingIndicator);
-                        }
+                        removeTypingIndicator(typingIndicator);
                         addMessage('Sorry, I encountered an error. Please try again.', 'assistant');
                         console.error('Error:', error);
                     });
             }
 
-            function addMessage(text, sender, sources = []) {
-                const messageElement = document.createElement('div');
-                messageElement.className = `message ${sender}-message`;
-                
-                let formattedText = text
+            function removeTypingIndicator(typingIndicator) {
+                if (typingIndicator && typingIndicator.parentNode) {
+                    typingIndicator.parentNode.removeChild(typingIndicator);
+                }
+            }
+
+            function formatText(text) {
+                return text
                     .replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>')
                     .replace(/\*(.*?)\*/g, '<em>$1</em>')
                     .replace(/\n/g, '<br>');
+            }
+
+            function addMessage(text, sender, sources = []) {
+                const messageElement = document.createElement('div');
+                messageElement.className = `message ${sender}-message`;
+                messageElement.innerHTML = formatText(text);
+                addSources(messageElement, sources);
                 
-                messageElement.innerHTML = formattedText;
-                
+                chatMessages.appendChild(messageElement);
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+                return messageElement;
+            }
+
+            function addSources(messageElement, sources) {
                 if (sources && sources.length > 0) {
                     const sourcesElement = document.createElement('div');
                     sourcesElement.className = 'sources';
                     sourcesElement.innerHTML = 'Sources: ' + sources.join(', ');
                     messageElement.appendChild(sourcesElement);
                 }
-                
-                chatMessages.appendChild(messageElement);
-                chatMessages.scrollTop = chatMessages.scrollHeight;
+            }
+
+            function parseEvent(block) {
+                let type = 'message';
+                const dataLines = [];
+                block.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) {
+                        type = line.slice(6).trim();
+                    } else if (line.startsWith('data:')) {
+                        dataLines.push(line.slice(5).trim());
+                    }
+                });
+                if (dataLines.length === 0) return null;
+                return { type: type, data: JSON.parse(dataLines.join('\n')) };
+            }
+
+            // Checked before sending, so browsers without streaming fetch make
+            // one request to the blocking endpoint instead of two
+            const canStream = Boolean(window.ReadableStream && window.TextDecoder
+                && window.Response && 'body' in Response.prototype);
+
+            async function streamQuery(query, typingIndicator) {
+                if (!canStream) {
+                    const result = await processQuery(query);
+                    removeTypingIndicator(typingIndicator);
+                    addMessage(result.answer, 'assistant', result.sources);
+                    return;
+                }
+
+                const response = await fetch('/api/query/stream', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({ query: query }),
+                });
+
+                // The server answers 503 while it is still starting up
+                if (response.status === 503) {
+                    const result = await response.json();
+                    removeTypingIndicator(typingIndicator);
+                    addMessage(result.answer, 'assistant');
+                    return;
+                }
+
+                if (!response.ok) {
+                    throw new Error(`HTTP error ${response.status}`);
+                }
+
+                let answer = '';
+                let messageElement = null;
+
+                function handleBlock(block) {
+                    const event = parseEvent(block);
+                    if (!event) return;
+
+                    if (event.type === 'error') {
+                        throw new Error(event.data.message);
+                    }
+
+                    if (!messageElement) {
+                        removeTypingIndicator(typingIndicator);
+                        messageElement = addMessage('', 'assistant');
+                    }
+
+                    if (event.type === 'token') {
+                        answer += event.data.text;
+                        messageElement.innerHTML = formatText(answer);
+                    } else if (event.type === 'sources') {
+                        addSources(messageElement, event.data.sources);
+                    }
+                    chatMessages.scrollTop = chatMessages.scrollHeight;
+                }
+
+                // The answer has already been generated, so read it whole rather than asking again
+                if (!response.body) {
+                    (await response.text()).split('\n\n').forEach(handleBlock);
+                    return;
+                }
+
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+
+                    buffer += decoder.decode(value, { stream: true });
+                    const blocks = buffer.split('\n\n');
+                    buffer = blocks.pop();
+                    blocks.forEach(handleBlock);
+                }
+                handleBlock(buffer);
             }
 
             async function processQuery(query) {
@@ -363,7 +608,8 @@ def get_html_template_content():
                         body: JSON.stringify({ query: query }),
                     });
                     
-                    if (!response.ok) {
+                    // The server answers 503 with a message while it is still starting up
+                    if (!response.ok && response.status !== 503) {
                         throw new Error(`HTTP error ${response.status}`);
                     }
                     
@@ -0,0 +1,249 @@
+"""
+FAISS index construction and tuning for FinSage Pro
+"""
+
+import numpy as np
+from config import (
+    INDEX_TYPE,
+    IVF_NLIST,
+    IVF_NPROBE,
+    PQ_M,
+    PQ_NBITS,
+    HNSW_M,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+    INDEX_TRAINING_SAMPLE,
+    BINARY_RESCORE_FACTOR
+)
+
+
+# FAISS is imported inside the functions that use it, so importing this
+# module (and the index store) does not load it
+
+INDEX_TYPES = ('flat', 'sq8', 'ivf_flat', 'ivf_pq', 'hnsw', 'binary')
+
+# FAISS k-means asks for at least this many training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+
+def index_params(index_type=INDEX_TYPE, **overrides):
+    """Return the configured index parameters, with optional overrides"""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}")
+
+    params = {
+        'type': index_type,
+        'nlist': IVF_NLIST,
+        'nprobe': IVF_NPROBE,
+        'pq_m': PQ_M,
+        'pq_nbits': PQ_NBITS,
+        'hnsw_m': HNSW_M,
+        'ef_construction': HNSW_EF_CONSTRUCTION,
+        'ef_search': HNSW_EF_SEARCH,
+        'rescore_factor': BINARY_RESCORE_FACTOR
+    }
+    params.update(overrides)
+    return params
+
+
+def factory_string(params):
+    """FAISS index_factory description of an id-addressable index"""
+    index_type = params['type']
+    if index_type == 'ivf_flat':
+        return f"IDMap2,IVF{params['nlist']},Flat"
+    if index_type == 'ivf_pq':
+        return f"IDMap2,IVF{params['nlist']},PQ{params['pq_m']}x{params['pq_nbits']}"
+    if index_type == 'hnsw':
+        return f"IDMap2,HNSW{params['hnsw_m']}"
+    if index_type == 'sq8':
+        return "IDMap2,SQ8"
+    return "IDMap2,Flat"
+
+
+def min_training_size(params):
+    """Number of vectors needed to train the index, 0 for untrained types"""
+    index_type = params['type']
+    if index_type == 'ivf_flat':
+        return MIN_POINTS_PER_CENTROID * params['nlist']
+    if index_type == 'ivf_pq':
+        return MIN_POINTS_PER_CENTROID * max(params['nlist'], 2 ** params['pq_nbits'])
+    if index_type == 'sq8':
+        # Only the per-dimension minimum and maximum are learned
+        return 1
+    return 0
+
+
+class BinaryIndex:
+    """Sign-bit codes searched by Hamming distance and re-scored with float vectors.
+
+    Every dimension is stored as one bit, 32x smaller than float32. A
+    search fetches ``rescore_factor`` times ``k`` Hamming candidates and
+    ranks them by exact L2 distance using ``vectors``, a callable mapping
+    an int64 id array to float32 rows (normally the memory-mapped
+    embeddings). Without it the Hamming distances are returned as is.
+    """
+
+    def __init__(self, dimension, rescore_factor=BINARY_RESCORE_FACTOR, index=None):
+        self.d = dimension
+        self.rescore_factor = rescore_factor
+        if index is None:
+            import faiss
+            index = faiss.IndexBinaryIDMap2(faiss.IndexBinaryFlat(dimension))
+        self.index = index
+        self.vectors = None
+
+    @property
+    def ntotal(self):
+        return self.index.ntotal
+
+    @property
+    def is_trained(self):
+        return True
+
+    @staticmethod
+    def binarize(x):
+        """Pack the sign bits of a float matrix, one byte per 8 dimensions"""
+        return np.packbits(np.asarray(x) > 0, axis=1)
+
+    def add_with_ids(self, x, ids):
+        self.index.add_with_ids(self.binarize(x), np.asarray(ids, dtype='int64'))
+
+    def remove_ids(self, ids):
+        return self.index.remove_ids(np.asarray(ids, dtype='int64'))
+
+    def search(self, x, k):
+        x = np.asarray(x, dtype='float32')
+        depth = k * self.rescore_factor if self.vectors is not None else k
+        hamming, labels = self.index.search(self.binarize(x), depth)
+        if self.vectors is None:
+            return hamming.astype('float32'), labels
+
+        distances = np.full((len(x), k), np.inf, dtype='float32')
+        ids = np.full((len(x), k), -1, dtype='int64')
+        for row in range(len(x)):
+            candidates = labels[row][labels[row] >= 0]
+            exact = ((self.vectors(candidates) - x[row]) ** 2).sum(axis=1)
+            # Ids the caller no longer knows come back as NaN and sort last
+            order = np.argsort(np.nan_to_num(exact, nan=np.inf), kind='stable')[:k]
+            distances[row, :len(order)] = exact[order]
+            ids[row, :len(order)] = candidates[order]
+        return distances, ids
+
+
+def build_index(dimension, blocks=None, params=None):
+    """Create and train an empty index for the given embedding blocks.
+
+    ``blocks`` is a list of embedding matrices used as training data. Falls
+    back to an exact flat index when there are too few vectors to train the
+    configured type. Returns ``(index, params)`` with the parameters that
+    were actually used.
+    """
+    import faiss
+
+    params = dict(params or index_params())
+    total = sum(len(block) for block in blocks or [])
+
+    if total < min_training_size(params):
+        print(f"Only {total} vectors available, too few to train a {params['type']} index; using flat")
+        params['type'] = 'flat'
+
+    if params['type'] == 'binary':
+        return BinaryIndex(dimension, params['rescore_factor']), params
+
+    index = faiss.index_factory(dimension, factory_string(params), faiss.METRIC_L2)
+
+    if params['type'] == 'hnsw':
+        faiss.downcast_index(index.index).hnsw.efConstruction = params['ef_construction']
+
+    if not index.is_trained:
+        sample = training_sample(blocks, INDEX_TRAINING_SAMPLE)
+        print(f"Training {params['type']} index on {len(sample)} vectors...")
+        index.train(sample)
+
+    configure_search(index, params)
+    return index, params
+
+
+def training_sample(blocks, size):
+    """Evenly spaced rows drawn from a list of embedding blocks"""
+    lengths = np.array([len(block) for block in blocks], dtype='int64')
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    total = int(offsets[-1])
+
+    rows = np.unique(np.linspace(0, total - 1, min(size, total)).astype('int64'))
+    block_ids = np.searchsorted(offsets, rows, side='right') - 1
+
+    sample = np.empty((len(rows), blocks[0].shape[1]), dtype='float32')
+    for block_id in np.unique(block_ids):
+        mask = block_ids == block_id
+        sample[mask] = np.asarray(blocks[block_id])[rows[mask] - offsets[block_id]]
+    return sample
+
+
+def configure_search(index, params):
+    """Apply query-time tuning parameters such as nprobe and efSearch"""
+    import faiss
+    parameter_space = faiss.ParameterSpace()
+    if params['type'] in ('ivf_flat', 'ivf_pq'):
+        parameter_space.set_index_parameter(index, 'nprobe', params['nprobe'])
+    elif params['type'] == 'hnsw':
+        parameter_space.set_index_parameter(index, 'efSearch', params['ef_search'])
+
+
+def remove_ids(index, ids):
+    """Remove ids from the index, returning False if the type cannot delete.
+
+    HNSW graphs do not support removal; their stale vectors stay in the
+    index, are filtered out during search by a ``StaleFilter`` and are
+    dropped when the index is compacted.
+    """
+    try:
+        index.remove_ids(np.asarray(ids, dtype='int64'))
+        return True
+    except RuntimeError:
+        return False
+
+
+class StaleFilter:
+    """Search parameters that skip ids an index could not remove.
+
+    The graph search itself leaves the ids out, so a query asks for ``k``
+    results however many vectors are stale. Holds the selectors as well,
+    since the search parameters only point at them.
+    """
+
+    def __init__(self, params, ids):
+        import faiss
+        self.ids = np.asarray(ids, dtype='int64')
+        self._batch = faiss.IDSelectorBatch(self.ids)
+        self._selector = faiss.IDSelectorNot(self._batch)
+        if params['type'] == 'hnsw':
+            self.search_params = faiss.SearchParametersHNSW(sel=self._selector, efSearch=params['ef_search'])
+        else:
+            self.search_params = faiss.SearchParameters(sel=self._selector)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, index, x, k):
+        return index.search(x, k, params=self.search_params)
+
+
+def write_index(index, path):
+    """Write a float or binary index to a file"""
+    import faiss
+    if isinstance(index, BinaryIndex):
+        faiss.write_index_binary(index.index, path)
+    else:
+        faiss.write_index(index, path)
+
+
+def read_index(path, params, mmap=False):
+    """Read an index written by ``write_index``, built with ``params``"""
+    import faiss
+    if params['type'] == 'binary':
+        index = faiss.read_index_binary(path)
+        return BinaryIndex(index.d, params['rescore_factor'], index)
+    if mmap:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP)
+    return faiss.read_index(path)